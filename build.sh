@@ -34,4 +34,7 @@ python manage.py collectstatic --noinput
 echo "Applying migrations..."
 python manage.py migrate
 
+# Create database cache tables (no-op unless CACHE_BACKEND=db)
+python manage.py createcachetable
+
 echo "Build process completed successfully!"
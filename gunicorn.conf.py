@@ -0,0 +1,30 @@
+"""
+Gunicorn configuration, picked up automatically from the project root.
+
+Command-line flags (as in the Procfile) still take precedence over these.
+"""
+import os
+
+# Load the app, and the embedding model weights, in the master so forked
+# workers share the memory copy-on-write
+preload_app = os.environ.get('WARMUP_ON_STARTUP', 'True').lower() == 'true'
+
+
+def when_ready(server):
+    """Runs in the master once the app is loaded, before any worker is forked"""
+    if not preload_app:
+        return
+    from resume_analyzer_project.resume_analyzer.warmup import load_models
+    try:
+        load_models()
+        server.log.info("Embedding model preloaded in master")
+    except Exception as e:
+        server.log.error(f"Error preloading embedding model: {str(e)}")
+
+
+def post_worker_init(worker):
+    """Runs in each worker after the app is loaded"""
+    if os.environ.get('WARMUP_ON_STARTUP', 'True').lower() != 'true':
+        return
+    from resume_analyzer_project.resume_analyzer.warmup import start_background_warm_up
+    start_background_warm_up()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'resume_analyzer_project.settings')
+# Under an ASGI server chat messages are answered by the async view
+os.environ.setdefault('ASYNC_CHAT', 'True')
 
 application = get_asgi_application()
@@ -1,3 +1,56 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from resume_analyzer_project.resume_analyzer import warmup
+
+
+@override_settings(VECTOR_STORE_BACKEND='local', INDEX_NAME='readiness-tests')
+class ReadinessCheckTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        local_dir = override_settings(VECTOR_STORE_LOCAL_DIR=root.name)
+        local_dir.enable()
+        self.addCleanup(local_dir.disable)
+
+        patch = mock.patch.dict(warmup._state, {component: False for component in warmup.COMPONENTS})
+        patch.start()
+        self.addCleanup(patch.stop)
+        patch = mock.patch.dict(warmup._errors, clear=True)
+        patch.start()
+        self.addCleanup(patch.stop)
+        # Stands in for the embedding model so load_models does not download weights
+        patch = mock.patch.object(warmup.EmbeddingModelSingleton, 'get_instance')
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def ready(self):
+        return self.client.get(reverse('readiness_check'), secure=True)
+
+    def test_not_ready_until_warmed_up(self):
+        response = self.ready()
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['ready'])
+
+        warmup.load_models()
+        response = self.ready()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['components']['embedding_model'], True)
+
+        warmup.warm_up()
+        response = self.ready()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['components'], {component: True for component in warmup.COMPONENTS})
+
+    def test_failed_components_keep_the_worker_out_of_rotation(self):
+        with mock.patch.object(warmup, '_warm_vector_client', side_effect=ConnectionError('index unreachable')):
+            warmup.warm_up()
+        response = self.ready()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['errors'], {'vector_client': 'index unreachable'})
+
+    def test_health_check_does_not_wait_for_warm_up(self):
+        self.assertEqual(self.client.get(reverse('health_check'), secure=True).status_code, 200)
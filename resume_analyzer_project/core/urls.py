@@ -3,5 +3,6 @@ from . import views
 
 urlpatterns = [
     path('health/', views.health_check, name='health_check'),
+    path('ready/', views.readiness_check, name='readiness_check'),
     path('', views.index, name='index'),
 ]
@@ -1,5 +1,5 @@
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 
 # Create your views here.
 
@@ -10,6 +10,16 @@ def health_check(request):
     """
     return HttpResponse("Application is running correctly!", content_type="text/plain")
 
+def readiness_check(request):
+    """
+    Readiness probe for the load balancer. Returns 503 until this worker has
+    loaded the embedding model and tokenizer and connected the vector client.
+    """
+    from resume_analyzer_project.resume_analyzer.warmup import readiness
+
+    state = readiness()
+    return JsonResponse(state, status=200 if state['ready'] else 503)
+
 def index(request):
     """
     A simple view that renders the index page.
@@ -1,9 +1,13 @@
 from django.contrib import admin
-from .models import Resume, ChatMessage
+from .models import (
+    Resume, ChatMessage, ResumeText, IngestionJob, EmbeddingCacheEntry, VectorTombstone, ConversationSummary,
+    ScreeningReport, ScreeningAnswer
+)
 
 @admin.register(Resume)
 class ResumeAdmin(admin.ModelAdmin):
-    list_display = ('original_filename', 'file_hash', 'uploaded_at', 'vector_namespace')
+    list_display = ('original_filename', 'file_hash', 'uploaded_at', 'vector_namespace', 'status')
+    list_filter = ('status',)
     search_fields = ('original_filename', 'file_hash')
     readonly_fields = ('file_hash', 'vector_namespace')
 
@@ -17,3 +21,47 @@ class ChatMessageAdmin(admin.ModelAdmin):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
 
     short_content.short_description = 'Content'
+
+@admin.register(ResumeText)
+class ResumeTextAdmin(admin.ModelAdmin):
+    list_display = ('file_hash', 'text_length', 'chunker', 'updated_at')
+    search_fields = ('file_hash',)
+    readonly_fields = ('file_hash', 'text_length', 'chunker', 'created_at', 'updated_at')
+    exclude = ('compressed_text', 'compressed_chunks')
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'status', 'stage', 'progress', 'attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status', 'stage')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+@admin.register(EmbeddingCacheEntry)
+class EmbeddingCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('model_name', 'text_hash', 'dimensions', 'created_at', 'last_used_at')
+    list_filter = ('model_name',)
+    search_fields = ('text_hash',)
+    exclude = ('vector',)
+
+@admin.register(VectorTombstone)
+class VectorTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('namespace', 'index_name', 'reason', 'attempts', 'created_at', 'swept_at')
+    list_filter = ('reason', 'index_name')
+    search_fields = ('namespace',)
+    readonly_fields = ('created_at',)
+
+@admin.register(ConversationSummary)
+class ConversationSummaryAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'summarized_messages', 'last_message_id', 'updated_at')
+    readonly_fields = ('updated_at',)
+
+class ScreeningAnswerInline(admin.TabularInline):
+    model = ScreeningAnswer
+    extra = 0
+    readonly_fields = ('position', 'question', 'answer', 'error', 'cached', 'seconds')
+
+@admin.register(ScreeningReport)
+class ScreeningReportAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'model', 'status', 'seconds', 'created_at')
+    list_filter = ('status', 'model')
+    readonly_fields = ('created_at', 'finished_at')
+    inlines = [ScreeningAnswerInline]
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ResumeAnalyzerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resume_analyzer_project.resume_analyzer'
+
+    def ready(self):
+        import os
+        from django.conf import settings
+
+        # Under runserver, warm up the autoreloader's serving process only.
+        # Gunicorn workers are warmed from gunicorn.conf.py hooks instead.
+        if settings.WARMUP_ON_STARTUP and os.environ.get('RUN_MAIN') == 'true':
+            from .warmup import start_background_warm_up
+            start_background_warm_up()
@@ -0,0 +1,145 @@
+"""
+Cross-resume candidate search.
+
+Besides its own ``resume_<hash>`` namespace, every resume's chunks are upserted
+into one shared ``SEARCH_NAMESPACE`` with ``resume_id`` (the file hash) and
+section metadata. A search is a single vector query over that namespace,
+optionally filtered by section; chunk hits are grouped by resume and each
+resume is ranked by its best chunks:
+
+    score = best + 0.3 * second + 0.1 * third
+
+Chunks of resumes that were deleted, or are not ready yet, can still be in
+the namespace, so they are dropped before ranking. When that leaves fewer
+than ``SEARCH_TOP_K`` chunks, the index is queried again for twice as many
+until enough live chunks are found or the namespace runs out.
+
+Chunk hits are cached per (search index version, normalized query, sections).
+The cache is invalidated whenever a resume is added to or removed from the
+search namespace.
+"""
+import logging
+
+from django.conf import settings
+
+from .caching import LRUCache
+from .models import EmbeddingModelSingleton, Resume
+from .embeddings import CachedEmbeddings
+from .vector_stores import LOCAL, LocalVectorIndex
+from .utils import get_index_name, get_pinecone_index, get_vectors_version, normalize_query
+
+logger = logging.getLogger(__name__)
+
+CHUNK_WEIGHTS = (1.0, 0.3, 0.1)
+SNIPPETS_PER_RESUME = 2
+SNIPPET_LENGTH = 300
+# Pinecone's upper bound for top_k
+MAX_TOP_K = 10000
+
+_search_cache = LRUCache(max_size=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+
+
+def search_cache_stats():
+    return _search_cache.stats()
+
+
+def _query_index(vector, top_k, metadata_filter):
+    """Return ``(text, metadata, score)`` for the best chunks in the search namespace"""
+    index_name = get_index_name()
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        index = LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR)
+        return [
+            (text, metadata, score)
+            for _, text, metadata, score in index.search(settings.SEARCH_NAMESPACE, vector, top_k, metadata_filter)
+        ]
+
+    response = get_pinecone_index(index_name).query(
+        vector=list(vector),
+        top_k=top_k,
+        namespace=settings.SEARCH_NAMESPACE,
+        filter=metadata_filter or None,
+        include_metadata=True
+    )
+    return [
+        (match.metadata.get('text', ''), match.metadata, match.score)
+        for match in response.matches
+    ]
+
+
+def _rank(hits):
+    """Group chunk hits by resume and rank the resumes"""
+    by_resume = {}
+    for text, metadata, score in hits:
+        resume_id = metadata.get('resume_id')
+        if resume_id:
+            by_resume.setdefault(resume_id, []).append((score, text, metadata))
+
+    ranked = []
+    for resume_id, chunks in by_resume.items():
+        chunks.sort(key=lambda chunk: chunk[0], reverse=True)
+        ranked.append({
+            'resume_id': resume_id,
+            'score': sum(weight * chunk[0] for weight, chunk in zip(CHUNK_WEIGHTS, chunks)),
+            'hits': len(chunks),
+            'snippets': [
+                {
+                    'section': metadata.get('section', ''),
+                    'text': text[:SNIPPET_LENGTH] + ('...' if len(text) > SNIPPET_LENGTH else ''),
+                    'score': score,
+                }
+                for score, text, metadata in chunks[:SNIPPETS_PER_RESUME]
+            ],
+        })
+    ranked.sort(key=lambda result: result['score'], reverse=True)
+    return ranked
+
+
+def _live_hits(hits):
+    """Keep the chunks of resumes that still exist and are ready"""
+    live = set(
+        Resume.objects.filter(
+            file_hash__in={metadata.get('resume_id') for _, metadata, _ in hits},
+            status=Resume.READY
+        ).values_list('file_hash', flat=True)
+    )
+    return [hit for hit in hits if hit[1].get('resume_id') in live]
+
+
+def search_candidates(query, sections=None):
+    """
+    Rank resumes for ``query`` with one vector query across all resumes.
+
+    Returns a list of ``{"resume_id", "score", "hits", "snippets"}`` dicts,
+    best first, limited to resumes that still exist and are ready.
+    """
+    sections = tuple(sorted(set(sections or ())))
+    key = (get_vectors_version(settings.SEARCH_NAMESPACE), normalize_query(query), sections)
+    metadata_filter = {'sections': {'$in': list(sections)}} if sections else None
+    vector = None
+
+    # Cached as (top_k the index was queried with, chunk hits)
+    cached = _search_cache.get(key)
+    top_k, hits = cached if cached is not None else (0, [])
+    while True:
+        live_hits = _live_hits(hits)
+        exhausted = top_k and (len(hits) < top_k or top_k >= MAX_TOP_K)
+        if len(live_hits) >= settings.SEARCH_TOP_K or exhausted:
+            break
+
+        if vector is None:
+            embedding_singleton = EmbeddingModelSingleton.get_instance()
+            embedding_model = CachedEmbeddings(
+                embedding_singleton.get_embedding_model(),
+                embedding_singleton.cache_name
+            )
+            vector = embedding_model.embed_query(query)
+        top_k = min(max(settings.SEARCH_TOP_K, 2 * top_k), MAX_TOP_K)
+        hits = _query_index(vector, top_k, metadata_filter)
+        _search_cache.put(key, (top_k, hits))
+
+    ranked = _rank(live_hits[:settings.SEARCH_TOP_K])
+    logger.info(
+        f"Candidate search for '{query}' matched {len(live_hits)} live chunks of {len(hits)} "
+        f"(top_k={top_k}) in {len(ranked)} resumes"
+    )
+    return ranked
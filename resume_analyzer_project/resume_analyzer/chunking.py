@@ -0,0 +1,231 @@
+"""
+Section-aware chunking for resume text.
+
+Resumes are short and strongly structured, so instead of fixed-size
+character windows with overlap, ``chunk_resume`` works in three passes:
+
+1. On multi-page documents, lines repeated at the top or bottom of most
+   pages (headers, footers, "Page 2 of 3") are stripped, keeping only the
+   first page's copy. Pages are separated by ``PAGE_BREAK``, which
+   ``load_resume`` puts between them. Nothing is stripped from a single
+   page, so repeated dates and titles in the body are never touched.
+2. Section headings (Experience, Education, Skills, Projects, ...) are
+   detected and split the text into sections.
+3. Each section's paragraphs are packed greedily into chunks of at most
+   ``max_tokens`` tokens, with no overlap. Sections too small to stand on
+   their own are folded into the previous chunk.
+
+Every chunk carries ``section``/``sections`` metadata for filtering.
+"""
+import re
+from collections import Counter
+
+PAGE_BREAK = "\f"
+
+SECTION_ALIASES = {
+    'summary': ['summary', 'professional summary', 'profile', 'about me', 'objective', 'career objective'],
+    'experience': [
+        'experience', 'work experience', 'professional experience', 'employment',
+        'employment history', 'work history', 'career history', 'internships', 'internship',
+    ],
+    'education': ['education', 'academic background', 'academics', 'qualifications', 'education and training'],
+    'skills': ['skills', 'technical skills', 'core skills', 'key skills', 'competencies', 'technologies', 'tech stack'],
+    'projects': ['projects', 'personal projects', 'academic projects', 'key projects'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'licenses and certifications'],
+    'awards': ['awards', 'honors', 'achievements', 'honors and awards', 'accomplishments'],
+    'publications': ['publications', 'research', 'papers'],
+    'languages': ['languages'],
+    'volunteering': ['volunteering', 'volunteer experience', 'leadership', 'activities', 'extracurricular activities'],
+    'interests': ['interests', 'hobbies'],
+}
+
+_heading_lookup = {
+    alias: section
+    for section, aliases in SECTION_ALIASES.items()
+    for alias in aliases
+}
+
+_token_pattern = re.compile(r"\w+|[^\w\s]")
+_digits = re.compile(r"\d+")
+_page_number = re.compile(r"^\s*(page\s*)?\d+(\s*(of|/)\s*\d+)?\s*$", re.IGNORECASE)
+_heading_strip = re.compile(r"[^a-z& ]+")
+
+
+def count_tokens(text):
+    """Estimate tokens as words plus punctuation marks, close to a WordPiece count for English prose"""
+    return len(_token_pattern.findall(text))
+
+
+def _line_key(line):
+    return _digits.sub("#", line.strip().lower())
+
+
+def _edge_positions(lines, edge_lines):
+    """Map line index to its position among the first (0, 1, ...) or last (-1, -2, ...) non-blank lines"""
+    non_blank = [number for number, line in enumerate(lines) if line.strip()]
+    positions = {}
+    for position, number in enumerate(non_blank[:edge_lines]):
+        positions.setdefault(number, []).append(position)
+    for position, number in enumerate(reversed(non_blank[-edge_lines:])):
+        positions.setdefault(number, []).append(-1 - position)
+    return positions
+
+
+def strip_page_boilerplate(text, edge_lines=3, max_line_length=80):
+    """
+    Remove headers and footers from a ``PAGE_BREAK``-separated document.
+
+    A short line is boilerplate when the same line (ignoring digits) sits at
+    the same position from the top or bottom of at least half the pages, and
+    of at least two. Page-number lines at those positions are dropped too.
+    Lines elsewhere on the page are never touched, and single-page text is
+    returned as is.
+    """
+    pages = [page.split("\n") for page in text.split(PAGE_BREAK)]
+    if len(pages) < 2:
+        return text
+
+    edges = [_edge_positions(lines, edge_lines) for lines in pages]
+    counts = Counter()
+    for lines, positions in zip(pages, edges):
+        counts.update({
+            (position, _line_key(lines[number]))
+            for number, line_positions in positions.items()
+            if len(lines[number].strip()) <= max_line_length and not _heading_for(lines[number])
+            for position in line_positions
+        })
+    needed = max(2, (len(pages) + 1) // 2)
+    repeated = {edge for edge, count in counts.items() if count >= needed}
+
+    kept = []
+    seen = set()
+    for lines, positions in zip(pages, edges):
+        for number, line in enumerate(lines):
+            if number in positions:
+                if _page_number.match(line):
+                    continue
+                key = _line_key(line)
+                matches = [(position, key) for position in positions[number] if (position, key) in repeated]
+                if matches:
+                    if any(edge in seen for edge in matches):
+                        continue
+                    seen.update(matches)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def _heading_for(line):
+    """Return the canonical section name if the line is a section heading"""
+    candidate = line.strip().rstrip(":").strip().lower()
+    if not candidate or len(candidate) > 40:
+        return None
+    candidate = _heading_strip.sub(" ", candidate.replace("&", " and "))
+    candidate = " ".join(candidate.split())
+    return _heading_lookup.get(candidate)
+
+
+def split_sections(text):
+    """Split text into ``(section, start, body)`` tuples, starting with a 'header' section"""
+    sections = []
+    current = 'header'
+    start = 0
+    offset = 0
+    buffer = []
+    for line in text.splitlines(keepends=True):
+        section = _heading_for(line)
+        if section is not None:
+            if "".join(buffer).strip():
+                sections.append((current, start, "".join(buffer)))
+            current = section
+            start = offset
+            buffer = []
+        buffer.append(line)
+        offset += len(line)
+    if "".join(buffer).strip():
+        sections.append((current, start, "".join(buffer)))
+    return sections
+
+
+def _split_oversized(block, max_tokens):
+    """Split a block larger than the budget on lines, then on words"""
+    pieces = []
+    for line in block.split("\n"):
+        if count_tokens(line) <= max_tokens:
+            pieces.append(line)
+            continue
+        words = line.split(" ")
+        current = []
+        for word in words:
+            if current and count_tokens(" ".join(current + [word])) > max_tokens:
+                pieces.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_resume(text, max_tokens=112, min_section_tokens=24):
+    """
+    Chunk resume text by section and token budget.
+
+    Returns a list of ``{"text", "start", "metadata"}`` dicts, where
+    ``start`` is the offset of the chunk's first block in the cleaned text.
+    """
+    cleaned = strip_page_boilerplate(text)
+    chunks = []
+
+    for section, section_start, body in split_sections(cleaned):
+        section_tokens = count_tokens(body)
+        if chunks and section_tokens < min_section_tokens and \
+                chunks[-1]["tokens"] + section_tokens <= max_tokens:
+            previous = chunks[-1]
+            previous["text"] = previous["text"] + "\n\n" + body.strip()
+            previous["tokens"] += section_tokens
+            previous["sections"].append(section)
+            continue
+
+        current, current_tokens, current_start = [], 0, section_start
+        search_from = 0
+        for block in re.split(r"\n\s*\n", body):
+            if not block.strip():
+                continue
+            block_offset = body.find(block, search_from)
+            search_from = block_offset + len(block)
+            for piece in (_split_oversized(block, max_tokens) if count_tokens(block) > max_tokens else [block]):
+                if not piece.strip():
+                    continue
+                piece_tokens = count_tokens(piece)
+                if current and current_tokens + piece_tokens > max_tokens:
+                    chunks.append({
+                        "text": "\n\n".join(current).strip(),
+                        "start": current_start,
+                        "tokens": current_tokens,
+                        "sections": [section],
+                    })
+                    current, current_tokens = [], 0
+                    current_start = section_start + block_offset
+                current.append(piece.strip("\n"))
+                current_tokens += piece_tokens
+        if current:
+            chunks.append({
+                "text": "\n\n".join(current).strip(),
+                "start": current_start,
+                "tokens": current_tokens,
+                "sections": [section],
+            })
+
+    return [
+        {
+            "text": chunk["text"],
+            "start": chunk["start"],
+            "metadata": {
+                "section": chunk["sections"][0],
+                "sections": chunk["sections"],
+                "chunk_index": index,
+                "start_index": chunk["start"],
+                "tokens": chunk["tokens"],
+            },
+        }
+        for index, chunk in enumerate(chunks)
+    ]
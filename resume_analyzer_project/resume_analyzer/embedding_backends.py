@@ -0,0 +1,99 @@
+"""
+Embedding model backends selectable with the ``EMBEDDING_BACKEND`` setting.
+
+``torch``
+    ``HuggingFaceEmbeddings`` running sentence-transformers on PyTorch.
+
+``onnx``
+    The same model exported to ONNX and run with ONNX Runtime and the
+    ``tokenizers`` fast tokenizer, with no PyTorch import. With
+    ``EMBEDDING_ONNX_QUANTIZED`` the int8 dynamically-quantized export is
+    used. Export a model directory with the ``export_onnx_embedding_model``
+    management command.
+
+This module deliberately does not import Django models so it can be loaded
+in benchmark subprocesses without setting up Django.
+"""
+import logging
+import os
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+TORCH = 'torch'
+ONNX = 'onnx'
+BACKENDS = (TORCH, ONNX)
+
+ONNX_MODEL_FILE = 'model.onnx'
+ONNX_QUANTIZED_MODEL_FILE = 'model_quantized.onnx'
+TOKENIZER_FILE = 'tokenizer.json'
+
+
+def backend_id(backend, model_name, quantized=False):
+    """Name that identifies the vectors a backend produces, for use in cache keys"""
+    if backend == ONNX:
+        return f"{model_name}:onnx{'-int8' if quantized else ''}"
+    return model_name
+
+
+class OnnxEmbeddings(Embeddings):
+    """Mean-pooled sentence embeddings from an ONNX export of a sentence-transformers model"""
+
+    def __init__(self, model_dir, quantized=True, max_length=128, batch_size=32, threads=0):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.isfile(model_path):
+            raise ValueError(f"ONNX embedding model not found at {model_path}")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts):
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled.tolist()
+
+    def embed_documents(self, texts):
+        texts = [text.replace("\n", " ") for text in texts]
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start:start + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def load_embedding_backend(backend, model_name, onnx_model_dir='', quantized=True, max_length=128, threads=0):
+    """Load the embedding model for ``backend``"""
+    if backend == TORCH:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend == ONNX:
+        if not onnx_model_dir:
+            raise ValueError("EMBEDDING_ONNX_MODEL_DIR must be set to use the onnx embedding backend")
+        return OnnxEmbeddings(onnx_model_dir, quantized=quantized, max_length=max_length, threads=threads)
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,203 @@
+"""
+Shared embedding sidecar.
+
+One ``run_embedding_server`` process owns the embedding model and serves every
+gunicorn worker on the host over a Unix domain socket, so the model is held
+in memory once per host instead of once per worker. Requests from all workers
+are coalesced by the server's ``BatchingEmbeddings``.
+
+Wire format (all integers big-endian, vectors little-endian float32)::
+
+    request:  op:uint8  count:uint32  then count x (length:uint32, utf-8 bytes)
+    response: status:uint8 (0 ok)  count:uint32  dims:uint32  count*dims float32
+    error:    status:uint8 (1)     length:uint32  utf-8 message
+
+``op`` is ``OP_DOCUMENTS`` or ``OP_QUERY``; ``OP_PING`` carries no texts and
+answers with an empty ok response.
+"""
+import logging
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+OP_PING = 0
+OP_DOCUMENTS = 1
+OP_QUERY = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_request_header = struct.Struct('!BI')
+_response_header = struct.Struct('!BII')
+_length = struct.Struct('!I')
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Embedding sidecar connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _pack_vectors(vectors):
+    dims = len(vectors[0]) if vectors else 0
+    values = array('f', (value for vector in vectors for value in vector))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return _response_header.pack(STATUS_OK, len(vectors), dims) + values.tobytes()
+
+
+def _unpack_vectors(data, count, dims):
+    values = array('f')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return [values[row * dims:(row + 1) * dims].tolist() for row in range(count)]
+
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one persistent client connection until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                op, count = _request_header.unpack(_recv_exact(self.request, _request_header.size))
+                texts = []
+                for _ in range(count):
+                    (length,) = _length.unpack(_recv_exact(self.request, _length.size))
+                    texts.append(_recv_exact(self.request, length).decode('utf-8'))
+            except ConnectionError:
+                return
+
+            try:
+                if op == OP_PING:
+                    vectors = []
+                elif op == OP_QUERY:
+                    vectors = [self.server.embedding_model.embed_query(text) for text in texts]
+                elif op == OP_DOCUMENTS:
+                    vectors = self.server.embedding_model.embed_documents(texts)
+                else:
+                    raise ValueError(f"Unknown sidecar op {op}")
+                response = _pack_vectors(vectors)
+            except Exception as e:
+                logger.error(f"Error serving embedding request: {str(e)}")
+                message = str(e).encode('utf-8')
+                response = struct.pack('!B', STATUS_ERROR) + _length.pack(len(message)) + message
+
+            self.request.sendall(response)
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, embedding_model):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.embedding_model = embedding_model
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+
+class SidecarEmbeddings(Embeddings):
+    """
+    Thin client for the embedding sidecar. Each thread keeps its own
+    persistent connection. If the sidecar cannot be reached, requests are
+    served by the in-process model returned by ``fallback`` (loaded on first
+    need) and the sidecar is retried every ``retry_interval`` seconds.
+    """
+
+    def __init__(self, socket_path, fallback=None, timeout=30.0, retry_interval=30.0):
+        self.socket_path = socket_path
+        self.fallback = fallback
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._local = threading.local()
+        self._fallback_model = None
+        self._fallback_lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or getattr(self._local, 'pid', None) != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+            self._local.pid = os.getpid()
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _request(self, op, texts):
+        payload = bytearray(_request_header.pack(op, len(texts)))
+        for text in texts:
+            encoded = text.encode('utf-8')
+            payload += _length.pack(len(encoded)) + encoded
+
+        sock = self._connection()
+        try:
+            sock.sendall(payload)
+            status = _recv_exact(sock, 1)[0]
+            if status != STATUS_OK:
+                (length,) = _length.unpack(_recv_exact(sock, _length.size))
+                raise ValueError(f"Embedding sidecar error: {_recv_exact(sock, length).decode('utf-8')}")
+            count, dims = struct.unpack('!II', _recv_exact(sock, 8))
+            return _unpack_vectors(_recv_exact(sock, count * dims * 4), count, dims)
+        except (OSError, ConnectionError):
+            self._close()
+            raise
+
+    def _fallback(self):
+        if self.fallback is None:
+            raise ConnectionError(f"Embedding sidecar at {self.socket_path} is unavailable")
+        if self._fallback_model is None:
+            with self._fallback_lock:
+                if self._fallback_model is None:
+                    logger.warning("Embedding sidecar unavailable, loading the model in-process")
+                    self._fallback_model = self.fallback()
+        return self._fallback_model
+
+    def _call(self, op, texts):
+        if time.monotonic() >= self._down_until:
+            try:
+                return self._request(op, texts)
+            except (OSError, ConnectionError) as e:
+                logger.warning(f"Embedding sidecar request failed: {str(e)}")
+                self._down_until = time.monotonic() + self.retry_interval
+        model = self._fallback()
+        if op == OP_QUERY:
+            return [model.embed_query(text) for text in texts]
+        return model.embed_documents(texts)
+
+    def ping(self):
+        """Return True if the sidecar answers"""
+        try:
+            self._request(OP_PING, [])
+            return True
+        except (OSError, ConnectionError):
+            return False
+
+    def embed_documents(self, texts):
+        return self._call(OP_DOCUMENTS, list(texts))
+
+    def embed_query(self, text):
+        return self._call(OP_QUERY, [text])[0]
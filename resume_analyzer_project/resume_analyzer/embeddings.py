@@ -0,0 +1,313 @@
+"""
+Embedding helpers layered on top of ``EmbeddingModelSingleton``.
+
+``CachedEmbeddings`` wraps the embedding model with a persistent,
+content-addressed cache of chunk vectors keyed by (model name, hash of the
+normalized chunk text). Resumes built from the same template, boilerplate
+sections and re-uploads share cache entries, so only genuinely new chunks are
+sent to the model, in a single batch. The table is trimmed to
+``EMBEDDING_CACHE_MAX_ENTRIES`` by last use, checked once a process has
+inserted ``EMBEDDING_CACHE_EVICT_INTERVAL`` entries rather than on every
+miss. Query embeddings go through a process-wide LRU keyed by (model name,
+normalized query), shared by all resumes and threads, and optionally
+persisted to the same table.
+
+``BatchingEmbeddings`` is the executor that ``EmbeddingModelSingleton`` hands
+out: every thread's query and document embeddings go through one queue, and
+a dispatcher thread coalesces them into batches before calling the model.
+"""
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.utils import timezone
+from langchain_core.embeddings import Embeddings
+
+from .caching import LRUCache
+from .models import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return _whitespace.sub(" ", text).strip()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _pack(vector):
+    return array("f", vector).tobytes()
+
+
+def _unpack(data):
+    vector = array("f")
+    vector.frombytes(bytes(data))
+    return vector.tolist()
+
+
+# Query vectors keyed by (model name, normalized query), shared across resumes
+_query_cache = LRUCache(max_size=settings.QUERY_EMBEDDING_CACHE_SIZE)
+
+
+def query_cache_stats():
+    return _query_cache.stats()
+
+
+# Entries this process inserted since it last checked the table size
+_unchecked_inserts = 0
+_unchecked_lock = threading.Lock()
+
+
+def _note_inserts(count):
+    """Evict once this process has inserted ``EMBEDDING_CACHE_EVICT_INTERVAL`` entries since the last check"""
+    global _unchecked_inserts
+    with _unchecked_lock:
+        _unchecked_inserts += count
+        if _unchecked_inserts < settings.EMBEDDING_CACHE_EVICT_INTERVAL:
+            return
+        _unchecked_inserts = 0
+    evict_embedding_cache()
+
+
+def evict_embedding_cache(max_entries=None):
+    """Delete the least recently used entries beyond ``max_entries``"""
+    max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    overflow = EmbeddingCacheEntry.objects.count() - max_entries
+    if overflow <= 0:
+        return 0
+    stale_ids = list(
+        EmbeddingCacheEntry.objects.order_by('last_used_at').values_list('pk', flat=True)[:overflow]
+    )
+    deleted, _ = EmbeddingCacheEntry.objects.filter(pk__in=stale_ids).delete()
+    logger.info(f"Evicted {deleted} embedding cache entries")
+    return deleted
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document embeddings from the persistent cache"""
+
+    def __init__(self, embedding_model, model_name):
+        self.embedding_model = embedding_model
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return self.embedding_model.embed_documents(texts)
+
+        hashes = [text_hash(text) for text in texts]
+        cached = {
+            entry.text_hash: entry
+            for entry in EmbeddingCacheEntry.objects.filter(
+                model_name=self.model_name,
+                text_hash__in=set(hashes)
+            )
+        }
+        if cached:
+            EmbeddingCacheEntry.objects.filter(pk__in=[entry.pk for entry in cached.values()]).update(
+                last_used_at=timezone.now()
+            )
+
+        vectors = {text_hash_: _unpack(entry.vector) for text_hash_, entry in cached.items()}
+
+        # Embed each distinct missing chunk once, in one batch
+        missing = {}
+        for text, text_hash_ in zip(texts, hashes):
+            if text_hash_ not in vectors and text_hash_ not in missing:
+                missing[text_hash_] = text
+
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+
+        if missing:
+            new_vectors = self.embedding_model.embed_documents(list(missing.values()))
+            now = timezone.now()
+            EmbeddingCacheEntry.objects.bulk_create([
+                EmbeddingCacheEntry(
+                    model_name=self.model_name,
+                    text_hash=text_hash_,
+                    vector=_pack(vector),
+                    dimensions=len(vector),
+                    last_used_at=now
+                )
+                for text_hash_, vector in zip(missing.keys(), new_vectors)
+            ], ignore_conflicts=True)
+            vectors.update(zip(missing.keys(), (list(vector) for vector in new_vectors)))
+            _note_inserts(len(missing))
+
+        return [vectors[text_hash_] for text_hash_ in hashes]
+
+    def embed_query(self, text):
+        if not settings.QUERY_EMBEDDING_CACHE_ENABLED:
+            return self.embedding_model.embed_query(text)
+
+        key = (self.model_name, normalize_text(text))
+        vector = _query_cache.get(key)
+        if vector is not None:
+            return list(vector)
+
+        # Persisted query vectors live beside chunk vectors under their own model name
+        persisted_name = f"{self.model_name}:query"
+        entry = None
+        if settings.QUERY_EMBEDDING_CACHE_PERSIST:
+            entry = EmbeddingCacheEntry.objects.filter(
+                model_name=persisted_name,
+                text_hash=text_hash(text)
+            ).first()
+
+        if entry is not None:
+            vector = _unpack(entry.vector)
+            EmbeddingCacheEntry.objects.filter(pk=entry.pk).update(last_used_at=timezone.now())
+        else:
+            vector = list(self.embedding_model.embed_query(text))
+            if settings.QUERY_EMBEDDING_CACHE_PERSIST:
+                EmbeddingCacheEntry.objects.bulk_create([
+                    EmbeddingCacheEntry(
+                        model_name=persisted_name,
+                        text_hash=text_hash(text),
+                        vector=_pack(vector),
+                        dimensions=len(vector),
+                        last_used_at=timezone.now()
+                    )
+                ], ignore_conflicts=True)
+                _note_inserts(1)
+
+        _query_cache.put(key, tuple(vector))
+        return vector
+
+    def embed_queries(self, texts):
+        """Embed several queries, sending every one not in the LRU to the model in a single batch"""
+        if not settings.QUERY_EMBEDDING_CACHE_ENABLED:
+            return [list(vector) for vector in self.embedding_model.embed_documents(texts)]
+
+        keys = [(self.model_name, normalize_text(text)) for text in texts]
+        vectors = {key: _query_cache.get(key) for key in set(keys)}
+        missing = {key: text for key, text in zip(keys, texts) if vectors[key] is None}
+
+        if missing:
+            # Query and document embeddings are the same for the sentence-transformer models used here
+            for key, vector in zip(missing, self.embedding_model.embed_documents(list(missing.values()))):
+                vectors[key] = tuple(vector)
+                _query_cache.put(key, vectors[key])
+        logger.info(f"Query embeddings: {len(vectors) - len(missing)} cached, {len(missing)} embedded in one batch")
+
+        return [list(vectors[key]) for key in keys]
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Micro-batching executor around an embedding model.
+
+    Requests from all threads are queued in slices of at most
+    ``max_batch_size`` texts. The dispatcher thread takes the first waiting
+    slice, then keeps collecting for up to ``max_wait`` seconds or until
+    ``max_batch_size`` texts are gathered, runs one model call for the whole
+    batch and hands each caller its slice of the result. Queries are served
+    before document slices, so a query arriving during a large ingest waits
+    for at most one batch.
+    """
+    QUERY = 0
+    DOCUMENTS = 1
+
+    def __init__(self, embedding_model, max_batch_size=32, max_wait=0.005):
+        self.embedding_model = embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._dispatcher_pid = None
+        self.batches = 0
+        self.texts = 0
+
+    def _get_queue(self):
+        """The queue served by this process's dispatcher, starting the dispatcher if needed"""
+        with self._lock:
+            if self._dispatcher_pid != os.getpid():
+                # A forked child inherits the object but not the thread, and must not share the parent's queue
+                self._queue = queue.PriorityQueue()
+                self._dispatcher = None
+                self._dispatcher_pid = os.getpid()
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                # A restarted dispatcher keeps serving the same queue, so waiting requests are not lost
+                self._dispatcher = threading.Thread(
+                    target=self._run, args=(self._queue,), name="embedding-batcher", daemon=True
+                )
+                self._dispatcher.start()
+            return self._queue
+
+    def _submit(self, texts, priority):
+        texts = list(texts)
+        if not texts:
+            return []
+        requests = self._get_queue()
+        futures = []
+        for start in range(0, len(texts), self.max_batch_size):
+            future = Future()
+            requests.put((priority, next(self._sequence), texts[start:start + self.max_batch_size], future))
+            futures.append(future)
+        return [vector for future in futures for vector in future.result()]
+
+    def _collect(self, requests):
+        batch = [requests.get()]
+        size = len(batch[0][2])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(request[2]) > self.max_batch_size:
+                # Keeps its place: the sequence number still orders it before later requests
+                requests.put(request)
+                break
+            batch.append(request)
+            size += len(request[2])
+        return batch
+
+    def _run(self, requests):
+        while True:
+            batch = self._collect(requests)
+            texts = [text for _, _, request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = self.embedding_model.embed_documents(texts)
+            except Exception as e:
+                logger.error(f"Error embedding batch of {len(texts)} texts: {str(e)}")
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for _, _, request_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'mean_batch_size': self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def embed_documents(self, texts):
+        return [list(vector) for vector in self._submit(texts, self.DOCUMENTS)]
+
+    def embed_query(self, text):
+        return list(self._submit([text], self.QUERY)[0])
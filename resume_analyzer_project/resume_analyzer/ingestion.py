@@ -0,0 +1,192 @@
+"""
+Database-backed ingestion queue.
+
+``upload_resume`` saves the file, creates the ``Resume`` in the pending state
+and calls ``enqueue_ingestion``. Jobs are picked up by the
+``process_ingestion_jobs`` management command, which runs a pool of worker
+threads; each claims a job with a conditional UPDATE so several workers (or
+several worker processes) never run the same job twice.
+
+Workers may run on another machine than the web process, so with
+``INGESTION_ASYNC`` the uploaded PDF is also stored on the job row and
+cleared once the job ends. Without it, the worker reads ``Resume.file``
+through its storage.
+"""
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import IngestionJob, Resume
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentIngestionError(Exception):
+    """Raised for failures that retrying will not fix, such as a PDF with no text"""
+
+
+def worker_name():
+    """Identify the current worker thread in job rows and logs"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def enqueue_ingestion(resume):
+    """Queue a resume for ingestion and return the job"""
+    upload = None
+    if settings.INGESTION_ASYNC:
+        with resume.file.open('rb') as uploaded:
+            upload = uploaded.read()
+    job = IngestionJob.objects.create(resume=resume, stage='queued', upload=upload)
+    logger.info(f"Queued ingestion job {job.pk} for resume {resume.pk}")
+    return job
+
+
+def requeue_stale_jobs():
+    """Return running jobs whose worker died (no finish within the timeout) to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=settings.INGESTION_JOB_TIMEOUT)
+    count = IngestionJob.objects.filter(
+        status=IngestionJob.RUNNING,
+        started_at__lt=cutoff
+    ).update(status=IngestionJob.QUEUED, stage='queued', worker='')
+    if count:
+        logger.warning(f"Requeued {count} stale ingestion jobs")
+    return count
+
+
+def claim_next_job():
+    """Atomically claim the oldest queued job, or return None if the queue is empty"""
+    candidates = IngestionJob.objects.filter(status=IngestionJob.QUEUED).order_by('created_at')
+    for job_id in candidates.values_list('pk', flat=True)[:10]:
+        claimed = IngestionJob.objects.filter(pk=job_id, status=IngestionJob.QUEUED).update(
+            status=IngestionJob.RUNNING,
+            started_at=timezone.now(),
+            worker=worker_name()
+        )
+        if claimed:
+            return IngestionJob.objects.select_related('resume').get(pk=job_id)
+    return None
+
+
+def _set_stage(job, stage, progress):
+    job.stage = stage
+    job.progress = progress
+    job.save(update_fields=['stage', 'progress'])
+    logger.info(f"Ingestion job {job.pk}: {stage} ({progress}%)")
+
+
+@contextmanager
+def _local_pdf(job):
+    """Path to the job's PDF on this machine, copied to a temporary file unless storage has it on local disk"""
+    resume = job.resume
+    if job.upload is None:
+        try:
+            path = resume.file.path
+        except NotImplementedError:
+            # Remote storage has no local path
+            path = None
+        if path and os.path.isfile(path):
+            yield path
+            return
+
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as local_copy:
+        if job.upload is not None:
+            local_copy.write(bytes(job.upload))
+        else:
+            with resume.file.open('rb') as stored:
+                shutil.copyfileobj(stored, local_copy)
+    try:
+        yield local_copy.name
+    finally:
+        os.remove(local_copy.name)
+
+
+def run_ingestion_job(job):
+    """Extract, chunk and embed the job's resume, recording progress on the job"""
+    from .utils import get_embeddings, get_stored_resume_text, load_resume, store_resume_text
+
+    resume = job.resume
+    job.attempts += 1
+    job.save(update_fields=['attempts'])
+    Resume.objects.filter(pk=resume.pk).update(status=Resume.PROCESSING)
+
+    try:
+        _set_stage(job, 'extracting', 10)
+        resume_text = get_stored_resume_text(resume.file_hash)
+        if resume_text is None:
+            with _local_pdf(job) as pdf_path:
+                resume_text = load_resume(pdf_path)
+            if not resume_text or len(resume_text) < 10:
+                raise PermanentIngestionError("Could not extract text from this PDF. Please try another file.")
+            store_resume_text(resume.file_hash, resume_text)
+
+        _set_stage(job, 'embedding', 40)
+        get_embeddings(resume_text, resume.file_hash)
+
+        job.status = IngestionJob.DONE
+        job.stage = 'done'
+        job.progress = 100
+        job.error = ''
+        job.finished_at = timezone.now()
+        job.upload = None
+        job.save(update_fields=['status', 'stage', 'progress', 'error', 'finished_at', 'upload'])
+        Resume.objects.filter(pk=resume.pk).update(status=Resume.READY)
+        logger.info(f"Ingestion job {job.pk} completed for resume {resume.pk}")
+
+    except Exception as e:
+        logger.error(f"Ingestion job {job.pk} failed: {str(e)}")
+        retry = not isinstance(e, PermanentIngestionError) and job.attempts < settings.INGESTION_MAX_ATTEMPTS
+        job.status = IngestionJob.QUEUED if retry else IngestionJob.FAILED
+        job.stage = 'queued' if retry else 'failed'
+        job.error = str(e)
+        job.finished_at = None if retry else timezone.now()
+        if not retry:
+            job.upload = None
+        job.save(update_fields=['status', 'stage', 'error', 'finished_at', 'upload'])
+        Resume.objects.filter(pk=resume.pk).update(status=Resume.PENDING if retry else Resume.FAILED)
+
+    return job
+
+
+def process_next_job():
+    """Claim and run one job. Returns False if the queue was empty."""
+    close_old_connections()
+    try:
+        job = claim_next_job()
+        if job is None:
+            return False
+        run_ingestion_job(job)
+        return True
+    finally:
+        close_old_connections()
+
+
+def get_ingestion_status(resume):
+    """Return a JSON-serialisable summary of a resume's latest ingestion job"""
+    job = resume.ingestion_jobs.defer('upload').order_by('-created_at').first()
+    status = {
+        'resume_id': resume.pk,
+        'status': resume.status,
+        'ready': resume.is_ready,
+    }
+    if job is not None:
+        status.update({
+            'job_id': job.pk,
+            'job_status': job.status,
+            'stage': job.stage,
+            'progress': job.progress,
+            'attempts': job.attempts,
+            'error': job.error,
+            'created_at': job.created_at.isoformat(),
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        })
+    return status
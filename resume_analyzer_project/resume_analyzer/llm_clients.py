@@ -0,0 +1,227 @@
+"""
+Reusable chat model clients.
+
+``ChatClientRegistry`` hands out one ``ChatGroq`` per (model, temperature,
+max_tokens). All of them share a single pooled ``httpx.Client``, and one
+``httpx.AsyncClient`` for ``ainvoke``, so after the first request a worker's
+chat calls reuse keep-alive connections instead of opening a new TCP and TLS
+session per message. The async pool belongs to the event loop that first used
+it; clients are rebuilt if a different loop asks for them, and the old pool's
+close is scheduled on its own loop if that loop is still open. Code that runs a private
+loop, such as ``asyncio.run``, should await ``aclose`` before the loop ends.
+
+Every request is traced through httpcore, which separates the time spent
+opening a connection (zero when a pooled connection is reused) from the time
+until the response headers arrive. Totals are reported by ``stats``.
+
+Set ``GROQ_API_BASE`` to point the clients at another OpenAI-compatible
+server, such as the one started by ``run_fake_llm_server``.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from langchain_groq import ChatGroq
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestTimings:
+    """Connection and time-to-headers totals over all traced requests"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_seconds = 0.0
+        self.headers_seconds = 0.0
+        self.generations = 0
+        self.generation_seconds = 0.0
+
+    def record_request(self, connect_seconds, headers_seconds, new_connection):
+        with self.lock:
+            self.requests += 1
+            self.new_connections += int(new_connection)
+            self.connect_seconds += connect_seconds
+            self.headers_seconds += headers_seconds
+
+    def record_generation(self, seconds):
+        with self.lock:
+            self.generations += 1
+            self.generation_seconds += seconds
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': self.requests - self.new_connections,
+                'mean_connect_ms': 1000 * self.connect_seconds / self.new_connections if self.new_connections else 0.0,
+                'mean_time_to_headers_ms': 1000 * self.headers_seconds / self.requests if self.requests else 0.0,
+                'generations': self.generations,
+                'mean_generation_ms': 1000 * self.generation_seconds / self.generations if self.generations else 0.0,
+            }
+
+
+class ChatClientRegistry:
+    """Singleton registry of chat clients sharing one pooled HTTP transport"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._http_client = None
+        self._async_http_client = None
+        self._pid = None
+        self._loop = None
+        self.timings = _RequestTimings()
+
+    def _trace_request(self, request):
+        started = time.perf_counter()
+        marks = {}
+
+        def trace(event_name, info):
+            marks[event_name] = time.perf_counter()
+
+        request.extensions['trace'] = trace
+        request.extensions['timing'] = (started, marks)
+
+    async def _atrace_request(self, request):
+        started = time.perf_counter()
+        marks = {}
+
+        async def trace(event_name, info):
+            marks[event_name] = time.perf_counter()
+
+        request.extensions['trace'] = trace
+        request.extensions['timing'] = (started, marks)
+
+    async def _arecord_response(self, response):
+        self._record_response(response)
+
+    def _record_response(self, response):
+        started, marks = response.request.extensions.get('timing', (None, None))
+        if started is None:
+            return
+        connect_started = marks.get('connection.connect_tcp.started')
+        connect_done = marks.get('connection.start_tls.complete') or marks.get('connection.connect_tcp.complete')
+        connect_seconds = connect_done - connect_started if connect_started and connect_done else 0.0
+        self.timings.record_request(
+            connect_seconds,
+            time.perf_counter() - started,
+            new_connection=connect_started is not None
+        )
+
+    def _pool_options(self):
+        return {
+            'limits': httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+            ),
+            'timeout': httpx.Timeout(settings.LLM_HTTP_TIMEOUT, connect=settings.LLM_HTTP_CONNECT_TIMEOUT),
+        }
+
+    def _close_async_pool(self, client, loop):
+        """Close an async pool on the event loop its connections belong to"""
+        try:
+            if loop.is_closed():
+                # Nothing can run on a closed loop any more; its sockets are released with the client
+                logger.info("Dropping the async LLM connection pool of a closed event loop")
+            else:
+                # The loop is not ours to run; the close happens on its next iteration
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        except Exception as e:
+            logger.warning(f"Could not close the previous async LLM connection pool: {str(e)}")
+
+    def _ensure_pool(self, loop):
+        # Connections must not be shared with a forked parent, so each process builds its own pool
+        if self._pid != os.getpid():
+            if self._http_client is not None:
+                # Closing only releases this process's copies of the sockets; the parent keeps its own
+                self._http_client.close()
+            self._clients = {}
+            self._http_client = httpx.Client(
+                event_hooks={'request': [self._trace_request], 'response': [self._record_response]},
+                **self._pool_options()
+            )
+            # The inherited async pool belongs to a loop of the parent process
+            self._async_http_client = None
+            self._loop = None
+            self._pid = os.getpid()
+        # Async connections are bound to the event loop that opened them
+        if loop is not None and loop is not self._loop:
+            if self._async_http_client is not None:
+                self._close_async_pool(self._async_http_client, self._loop)
+            self._clients = {}
+            self._async_http_client = httpx.AsyncClient(
+                event_hooks={'request': [self._atrace_request], 'response': [self._arecord_response]},
+                **self._pool_options()
+            )
+            self._loop = loop
+
+    def _current(self, loop):
+        return self._pid == os.getpid() and (loop is None or loop is self._loop)
+
+    def get(self, model, temperature, max_tokens):
+        """Return the shared chat client for these parameters, creating it on first use"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        key = (model, float(temperature), int(max_tokens))
+        client = self._clients.get(key) if self._current(loop) else None
+        if client is not None:
+            return client
+
+        with self._lock:
+            self._ensure_pool(loop)
+            client = self._clients.get(key)
+            if client is None:
+                groq_api_key = settings.GROQ_API_KEY or os.environ.get('GROQ_API_KEY')
+                if not groq_api_key:
+                    raise ValueError("Groq API key not found in settings or environment variables")
+
+                logger.info(f"Setting up LLM with model: {model}, temperature: {temperature}")
+                client = ChatGroq(
+                    api_key=groq_api_key,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    base_url=settings.GROQ_API_BASE or None,
+                    http_client=self._http_client,
+                    http_async_client=self._async_http_client
+                )
+                self._clients[key] = client
+        return client
+
+    async def aclose(self):
+        """Close the async pool of the running event loop; the next ``get`` on any loop builds a new one"""
+        with self._lock:
+            client = self._async_http_client if self._loop is asyncio.get_running_loop() else None
+            if client is not None:
+                self._clients = {}
+                self._async_http_client = None
+                self._loop = None
+        if client is not None:
+            await client.aclose()
+
+    def record_generation(self, seconds):
+        self.timings.record_generation(seconds)
+
+    def stats(self):
+        return {'clients': len(self._clients), **self.timings.as_dict()}
@@ -0,0 +1,159 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from langchain.schema import Document
+from langchain_core.retrievers import BaseRetriever
+
+from resume_analyzer_project.resume_analyzer.llm_clients import ChatClientRegistry
+from resume_analyzer_project.resume_analyzer.utils import aquery_resume, invalidate_vector_store_cache, query_resume
+from .run_fake_llm_server import FakeChatHandler
+
+NAMESPACE = 'resume_benchmark'
+
+
+class StandInRetriever(BaseRetriever):
+    """Returns fixed chunks after a fixed latency, blocking or awaiting like a remote index would"""
+    documents: list
+    latency: float
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        time.sleep(self.latency)
+        return self.documents
+
+    async def _aget_relevant_documents(self, query, *, run_manager=None):
+        await asyncio.sleep(self.latency)
+        return self.documents
+
+
+class StandInVectorStore:
+    """Enough of a vector store for ``get_retriever``"""
+
+    def __init__(self, retriever):
+        self.retriever = retriever
+
+    def as_retriever(self, search_kwargs=None):
+        return self.retriever
+
+
+class BenchmarkLLMServer(ThreadingHTTPServer):
+    # Every benchmark request may connect at once
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class Command(BaseCommand):
+    """
+    Compare chat throughput of the WSGI and ASGI paths against local fake
+    backends: a stand-in retriever and the fake OpenAI-compatible LLM server.
+    All requests arrive at once. The WSGI run pushes them through
+    ``query_resume`` on a fixed pool of worker threads, as gunicorn's
+    threaded workers do. The ASGI run awaits ``aquery_resume`` for every
+    request on one event loop. Answer caches are disabled so each request
+    does the full retrieval and LLM round trip.
+    """
+    help = "Benchmark concurrent chat requests on the sync (WSGI) and async (ASGI) paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Concurrent chat requests")
+        parser.add_argument('--wsgi-threads', type=int, default=2, help="Worker threads on the WSGI path")
+        parser.add_argument('--retrieval-ms', type=float, default=50.0, help="Latency of each retrieval")
+        parser.add_argument('--llm-latency-ms', type=float, default=500.0, help="Latency of each LLM call")
+        parser.add_argument('--model', default='llama3-8b-8192')
+
+    def report(self, label, latencies, seconds):
+        latencies = sorted(latencies)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        throughput = len(latencies) / seconds if seconds else 0.0
+        self.stdout.write(
+            f"{label:<8}{len(latencies):>10}{seconds:>10.2f}{throughput:>12.1f}"
+            f"{1000 * statistics.median(latencies):>10.0f}{1000 * p95:>10.0f}"
+        )
+        return throughput
+
+    def run_wsgi(self, options, vector_store):
+        def one(number, submitted):
+            query_resume(
+                query=f"What did the candidate do in role {number}?",
+                vector_store=vector_store,
+                chat_history=[],
+                model=options['model'],
+                resume_id='benchmark'
+            )
+            # Latency runs from arrival, so time spent queued for a thread counts
+            return time.perf_counter() - submitted
+
+        submitted = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['wsgi_threads']) as pool:
+            futures = [pool.submit(one, number, submitted) for number in range(options['requests'])]
+            latencies = [future.result() for future in futures]
+        return latencies, time.perf_counter() - submitted
+
+    def run_asgi(self, options, vector_store):
+        async def one(number, submitted):
+            await aquery_resume(
+                query=f"What did the candidate do in role {number}?",
+                vector_store=vector_store,
+                chat_history=[],
+                model=options['model'],
+                resume_id='benchmark'
+            )
+            return time.perf_counter() - submitted
+
+        async def main():
+            submitted = time.perf_counter()
+            latencies = await asyncio.gather(*(one(number, submitted) for number in range(options['requests'])))
+            seconds = time.perf_counter() - submitted
+            # The pooled connections belong to this loop, which ends with asyncio.run
+            await ChatClientRegistry.get_instance().aclose()
+            return list(latencies), seconds
+
+        return asyncio.run(main())
+
+    def handle(self, **options):
+        server = BenchmarkLLMServer(('127.0.0.1', 0), FakeChatHandler)
+        server.latency = options['llm_latency_ms'] / 1000.0
+        server.token_delay = 0.0
+        server.response_text = "The candidate led the migration of a monolith to services."
+        server.verbose = False
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        retriever = StandInRetriever(
+            documents=[Document(page_content=f"Experience entry {number}") for number in range(5)],
+            latency=options['retrieval_ms'] / 1000.0
+        )
+        vector_store = StandInVectorStore(retriever)
+        connections = max(options['requests'], settings.LLM_HTTP_MAX_CONNECTIONS)
+
+        try:
+            with override_settings(
+                # The stand-in retriever never touches an index, but query_resume resolves its name
+                INDEX_NAME=settings.INDEX_NAME or 'benchmark',
+                CHAT_LLM_BACKEND='groq',
+                GROQ_API_BASE=f"http://127.0.0.1:{server.server_address[1]}",
+                GROQ_API_KEY=settings.GROQ_API_KEY or 'benchmark',
+                LLM_HTTP_MAX_CONNECTIONS=connections,
+                LLM_HTTP_MAX_KEEPALIVE=connections,
+                LLM_CACHE_ENABLED=False,
+                SEMANTIC_CACHE_ENABLED=False,
+                RETRIEVAL_CACHE_ENABLED=False,
+            ):
+                invalidate_vector_store_cache(NAMESPACE)
+                self.stdout.write(f"{'path':<8}{'requests':>10}{'seconds':>10}{'requests/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+                wsgi = self.report('wsgi', *self.run_wsgi(options, vector_store))
+                asgi = self.report('asgi', *self.run_asgi(options, vector_store))
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            server.shutdown()
+            server.server_close()
+            invalidate_vector_store_cache(NAMESPACE)
+
+        if wsgi:
+            self.stdout.write(self.style.SUCCESS(f"The async path served {asgi / wsgi:.1f}x the throughput"))
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from resume_analyzer_project.resume_analyzer.chunking import chunk_resume, count_tokens
+from resume_analyzer_project.resume_analyzer.models import ResumeText
+from resume_analyzer_project.resume_analyzer.utils import get_chunk_tokens, load_resume
+
+
+class Command(BaseCommand):
+    """
+    Compare the generic 1000/200 character splitter with the section-aware
+    chunker on chunk count and embedded tokens. Tokens past the embedding
+    model's input limit are reported as truncated, since the model never sees
+    them. Uses the given PDF or text files, or the stored extracted text of up
+    to --limit resumes.
+    """
+    help = "Report chunk-count and token reduction of the section chunker against the recursive splitter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help="PDF or text files to chunk")
+        parser.add_argument('--limit', type=int, default=1000, help="Stored resumes to use when no files are given")
+        parser.add_argument('--max-tokens', type=int, default=get_chunk_tokens())
+        parser.add_argument('--min-section-tokens', type=int, default=settings.RESUME_MIN_SECTION_TOKENS)
+
+    def load_texts(self, options):
+        if not options['files']:
+            for stored in ResumeText.objects.order_by('-updated_at')[:options['limit']]:
+                yield stored.text
+            return
+        for path in options['files']:
+            if path.lower().endswith('.pdf'):
+                text = load_resume(path)
+            else:
+                with open(path, encoding='utf-8') as file:
+                    text = file.read()
+            if text:
+                yield text
+
+    def handle(self, **options):
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            separators=["\n\n", "\n", " ", ""]
+        )
+        model_tokens = settings.EMBEDDING_MAX_SEQ_LENGTH - 2
+        totals = {'resumes': 0}
+        for name in ('recursive', 'section'):
+            totals.update({f'{name}_chunks': 0, f'{name}_tokens': 0, f'{name}_truncated': 0})
+
+        for text in self.load_texts(options):
+            recursive = [chunk.page_content for chunk in splitter.create_documents([text])]
+            section = [
+                chunk['text'] for chunk in chunk_resume(
+                    text,
+                    max_tokens=options['max_tokens'],
+                    min_section_tokens=options['min_section_tokens']
+                )
+            ]
+            totals['resumes'] += 1
+            for name, chunks in (('recursive', recursive), ('section', section)):
+                tokens = [count_tokens(chunk) for chunk in chunks]
+                totals[f'{name}_chunks'] += len(chunks)
+                totals[f'{name}_tokens'] += sum(tokens)
+                totals[f'{name}_truncated'] += sum(max(0, count - model_tokens) for count in tokens)
+
+        if not totals['resumes']:
+            raise CommandError("No resume text to benchmark")
+
+        def reduction(before, after):
+            return 100.0 * (before - after) / before if before else 0.0
+
+        self.stdout.write(f"Resumes: {totals['resumes']}")
+        self.stdout.write(f"Model input limit: {model_tokens} tokens")
+        self.stdout.write(f"{'chunker':<12}{'chunks':>10}{'tokens':>12}{'tokens/chunk':>14}{'truncated':>12}")
+        for name in ('recursive', 'section'):
+            chunks = totals[f'{name}_chunks']
+            tokens = totals[f'{name}_tokens']
+            self.stdout.write(
+                f"{name:<12}{chunks:>10}{tokens:>12}{tokens / chunks if chunks else 0:>14.1f}"
+                f"{totals[f'{name}_truncated']:>12}"
+            )
+        self.stdout.write(
+            f"Chunk reduction: {reduction(totals['recursive_chunks'], totals['section_chunks']):.1f}%, "
+            f"token reduction: {reduction(totals['recursive_tokens'], totals['section_tokens']):.1f}%"
+        )
@@ -0,0 +1,137 @@
+import math
+import multiprocessing
+import resource
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer_project.resume_analyzer.embedding_backends import ONNX, TORCH, load_embedding_backend
+
+SAMPLE_SENTENCES = [
+    "Senior software engineer with eight years of experience building Python web services.",
+    "Led a team of five developers migrating a monolith to Kubernetes-hosted microservices.",
+    "Bachelor of Science in Computer Science, University of Michigan, 2015.",
+    "Skills: Python, Django, PostgreSQL, Redis, Docker, AWS, Terraform, Go.",
+    "Designed and maintained CI/CD pipelines with GitHub Actions and ArgoCD.",
+    "Reduced API p99 latency by 40% by introducing caching and query batching.",
+    "Projects: open-source contributor to a popular data validation library.",
+    "Certified Kubernetes Administrator; AWS Solutions Architect Associate.",
+]
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is the peak, in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _run_backend(backend, quantized, options, texts, compare_count, results):
+    """Load one backend in a fresh process and measure it. Runs in a subprocess."""
+    try:
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        model = load_embedding_backend(
+            backend,
+            options['model_name'],
+            onnx_model_dir=options['onnx_model_dir'],
+            quantized=quantized,
+            max_length=options['max_length'],
+        )
+        model.embed_documents(texts[:1])
+        load_time = time.perf_counter() - start
+        rss_loaded = _rss_mb()
+
+        start = time.perf_counter()
+        vectors = model.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+
+        results.put({
+            'load_time': load_time,
+            'rss_mb': rss_loaded,
+            'model_rss_mb': rss_loaded - rss_before,
+            'per_second': len(texts) / elapsed if elapsed else 0.0,
+            'vectors': [list(vector) for vector in vectors[:compare_count]],
+        })
+    except Exception as e:
+        results.put({'error': str(e)})
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class Command(BaseCommand):
+    """
+    Compare embedding backends on load time, resident memory and throughput.
+    Each backend is loaded in its own spawned process so memory figures are
+    not shared. The onnx backends' vectors are checked against the torch
+    backend and the command fails if any cosine similarity is below
+    --tolerance.
+    """
+    help = "Benchmark the torch and onnx embedding backends"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--texts', type=int, default=512, help="Number of texts to embed")
+        parser.add_argument('--compare', type=int, default=64, help="Number of vectors compared across backends")
+        parser.add_argument('--tolerance', type=float, default=0.99,
+                            help="Minimum cosine similarity of onnx vectors to torch vectors")
+        parser.add_argument('--onnx-model-dir', default=settings.EMBEDDING_ONNX_MODEL_DIR)
+
+    def handle(self, **options):
+        texts = [
+            f"{SAMPLE_SENTENCES[number % len(SAMPLE_SENTENCES)]} ({number})"
+            for number in range(options['texts'])
+        ]
+        backend_options = {
+            'model_name': settings.EMBEDDING_MODEL_NAME,
+            'onnx_model_dir': options['onnx_model_dir'],
+            'max_length': settings.EMBEDDING_MAX_SEQ_LENGTH,
+        }
+        variants = [('torch', TORCH, False)]
+        if options['onnx_model_dir']:
+            variants += [('onnx', ONNX, False), ('onnx-int8', ONNX, True)]
+        else:
+            self.stdout.write(self.style.WARNING("No ONNX model directory given, benchmarking torch only"))
+
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        for label, backend, quantized in variants:
+            queue = context.Queue()
+            process = context.Process(
+                target=_run_backend,
+                args=(backend, quantized, backend_options, texts, options['compare'], queue)
+            )
+            process.start()
+            results[label] = queue.get()
+            process.join()
+
+        self.stdout.write(f"{'backend':<12}{'load s':>10}{'RSS MB':>10}{'model MB':>10}{'emb/s':>10}{'min cos':>10}")
+        failed = []
+        reference = results.get('torch', {}).get('vectors')
+        for label, result in results.items():
+            if 'error' in result:
+                self.stdout.write(f"{label:<12} failed: {result['error']}")
+                failed.append(label)
+                continue
+            similarity = 1.0
+            if reference and label != 'torch':
+                similarity = min(_cosine(a, b) for a, b in zip(reference, result['vectors']))
+                if similarity < options['tolerance']:
+                    failed.append(label)
+            self.stdout.write(
+                f"{label:<12}{result['load_time']:>10.2f}{result['rss_mb']:>10.0f}"
+                f"{result['model_rss_mb']:>10.0f}{result['per_second']:>10.1f}{similarity:>10.4f}"
+            )
+
+        if failed:
+            raise CommandError(f"Backends failed or exceeded tolerance: {', '.join(failed)}")
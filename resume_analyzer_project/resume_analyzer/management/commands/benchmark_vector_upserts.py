@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer_project.resume_analyzer.vector_upserts import UpsertError, chunk_vector_id, upsert_in_batches
+
+
+class StandInIndex:
+    """
+    In-process stand-in for a vector index server. Each upsert costs a fixed
+    round-trip latency plus a per-vector cost, and fails with the given
+    probability. Vectors are stored by id, so repeated upserts are idempotent.
+    """
+
+    def __init__(self, latency, per_vector, failure_rate, seed=0):
+        self.latency = latency
+        self.per_vector = per_vector
+        self.failure_rate = failure_rate
+        self.vectors = {}
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=None):
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.failure_rate
+        time.sleep(self.latency + self.per_vector * len(vectors))
+        if fail:
+            raise ConnectionError("Stand-in index dropped the request")
+        with self._lock:
+            for vector in vectors:
+                self.vectors[(namespace, vector['id'])] = vector
+
+
+class Command(BaseCommand):
+    """
+    Measure upsert throughput against a stand-in index: first one vector per
+    request with no concurrency (the old path), then the configured batch
+    size and concurrency. The batched run is repeated to check that
+    deterministic ids make re-ingestion leave the vector count unchanged.
+    """
+    help = "Benchmark batched, concurrent vector upserts against a stand-in index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vectors', type=int, default=2000, help="Number of vectors to upsert")
+        parser.add_argument('--dimensions', type=int, default=384)
+        parser.add_argument('--latency-ms', type=float, default=20.0, help="Round-trip latency per request")
+        parser.add_argument('--per-vector-ms', type=float, default=0.05, help="Server cost per vector")
+        parser.add_argument('--failure-rate', type=float, default=0.05, help="Probability a request fails")
+        parser.add_argument('--batch-size', type=int, default=settings.VECTOR_UPSERT_BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int, default=settings.VECTOR_UPSERT_CONCURRENCY)
+        parser.add_argument('--max-retries', type=int, default=settings.VECTOR_UPSERT_MAX_RETRIES)
+
+    def run(self, label, records, options, batch_size, concurrency, index=None):
+        index = index or StandInIndex(
+            options['latency_ms'] / 1000.0,
+            options['per_vector_ms'] / 1000.0,
+            options['failure_rate']
+        )
+        try:
+            stats = upsert_in_batches(
+                lambda batch: index.upsert(vectors=batch, namespace='benchmark'),
+                records,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                max_retries=options['max_retries'],
+                backoff=0.01
+            )
+        except UpsertError as e:
+            raise CommandError(f"{label}: {str(e)}")
+        self.stdout.write(
+            f"{label:<22}{stats['batches']:>9}{stats['retries']:>9}{index.requests:>10}"
+            f"{len(index.vectors):>10}{stats['seconds']:>10.2f}{stats['vectors_per_second']:>12.0f}"
+        )
+        return index, stats
+
+    def handle(self, **options):
+        rng = random.Random(0)
+        records = [
+            {
+                'id': chunk_vector_id('benchmark', number, f"chunk {number}"),
+                'values': [rng.random() for _ in range(options['dimensions'])],
+                'metadata': {'chunk_index': number},
+            }
+            for number in range(options['vectors'])
+        ]
+
+        self.stdout.write(
+            f"{'run':<22}{'batches':>9}{'retried':>9}{'requests':>10}{'stored':>10}{'seconds':>10}{'vectors/s':>12}"
+        )
+        _, serial = self.run('serial, 1 per request', records, options, 1, 1)
+        index, batched = self.run('batched', records, options, options['batch_size'], options['concurrency'])
+        self.run('batched, re-ingest', records, options, options['batch_size'], options['concurrency'], index=index)
+
+        if len(index.vectors) != len(records):
+            raise CommandError(f"Re-ingestion left {len(index.vectors)} vectors, expected {len(records)}")
+        if serial['vectors_per_second']:
+            speedup = batched['vectors_per_second'] / serial['vectors_per_second']
+            self.stdout.write(self.style.SUCCESS(f"Batched upserts are {speedup:.1f}x faster"))
@@ -0,0 +1,69 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer_project.resume_analyzer.embedding_backends import (
+    ONNX_MODEL_FILE,
+    ONNX_QUANTIZED_MODEL_FILE,
+)
+
+
+class Command(BaseCommand):
+    """
+    Export the sentence-transformers embedding model to ONNX, and an int8
+    dynamically-quantized copy, for the onnx embedding backend. This needs
+    torch and transformers, but only on the machine running the export; the
+    web processes only need onnxruntime and tokenizers.
+    """
+    help = "Export the embedding model to ONNX for EMBEDDING_BACKEND=onnx"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help="Directory to write the model and tokenizer to")
+        parser.add_argument('--model', default=settings.EMBEDDING_MODEL_NAME,
+                            help="HuggingFace model name to export")
+        parser.add_argument('--no-quantize', action='store_true',
+                            help="Skip writing the int8 quantized model")
+        parser.add_argument('--opset', type=int, default=14)
+
+    def handle(self, **options):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError as e:
+            raise CommandError(f"Exporting requires torch and transformers: {str(e)}")
+
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+
+        self.stdout.write(f"Loading {options['model']}")
+        tokenizer = AutoTokenizer.from_pretrained(options['model'])
+        model = AutoModel.from_pretrained(options['model'])
+        model.eval()
+
+        sample = tokenizer(["An example resume sentence."], return_tensors='pt')
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+        self.stdout.write(f"Exporting to {model_path}")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                model_path,
+                input_names=input_names,
+                output_names=['last_hidden_state'],
+                dynamic_axes=dynamic_axes,
+                opset_version=options['opset'],
+            )
+        tokenizer.save_pretrained(output_dir)
+
+        if not options['no_quantize']:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+            self.stdout.write(f"Writing int8 quantized model to {quantized_path}")
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {options['model']} to {output_dir}"))
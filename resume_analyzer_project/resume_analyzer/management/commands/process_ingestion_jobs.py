@@ -0,0 +1,64 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from resume_analyzer_project.resume_analyzer.ingestion import process_next_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    """
+    Run a pool of worker threads that process queued resume ingestion jobs.
+    Start one or more of these alongside the web process; throughput scales
+    with --workers and with the number of processes running the command.
+    """
+    help = "Process queued resume ingestion jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.INGESTION_WORKERS,
+                            help="Number of worker threads")
+        parser.add_argument('--poll-interval', type=float, default=settings.INGESTION_POLL_INTERVAL,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty instead of polling")
+
+    def handle(self, **options):
+        self.stop_event = threading.Event()
+        requeue_stale_jobs()
+
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(options['poll_interval'], options['once']),
+                name=f"ingestion-{number}",
+                daemon=True
+            )
+            for number in range(options['workers'])
+        ]
+        self.stdout.write(f"Starting {len(threads)} ingestion workers")
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1.0)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping ingestion workers after their current job")
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS("Ingestion workers stopped"))
+
+    def work(self, poll_interval, once):
+        while not self.stop_event.is_set():
+            try:
+                if process_next_job():
+                    continue
+            except Exception as e:
+                self.stderr.write(f"Ingestion worker error: {str(e)}")
+            if once:
+                return
+            requeue_stale_jobs()
+            self.stop_event.wait(poll_interval)
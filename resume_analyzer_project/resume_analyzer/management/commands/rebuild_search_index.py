@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer_project.resume_analyzer.models import Resume
+from resume_analyzer_project.resume_analyzer.utils import get_embeddings, get_stored_resume_text, load_resume
+
+
+class Command(BaseCommand):
+    """
+    Re-upsert the chunks of ready resumes so they appear in the shared search
+    namespace. Vector ids are deterministic and chunk embeddings are cached,
+    so running it again only rewrites vectors and does not re-embed.
+    """
+    help = "Backfill the cross-resume search namespace from ready resumes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=0, help="Only index this many resumes (0 for all)")
+
+    def handle(self, **options):
+        resumes = Resume.objects.filter(status=Resume.READY).order_by('pk')
+        if options['limit']:
+            resumes = resumes[:options['limit']]
+
+        indexed, failed = 0, 0
+        for resume in resumes.iterator():
+            try:
+                resume_text = get_stored_resume_text(resume.file_hash) or load_resume(resume.file.path)
+                if not resume_text:
+                    raise ValueError("no extractable text")
+                get_embeddings(resume_text, resume.file_hash)
+                indexed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Resume {resume.pk} ({resume.original_filename}): {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} resumes for search"))
+        if failed:
+            raise CommandError(f"{failed} resumes could not be indexed")
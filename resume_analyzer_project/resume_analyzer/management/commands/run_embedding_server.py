@@ -0,0 +1,45 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer_project.resume_analyzer.embedding_server import EmbeddingServer
+from resume_analyzer_project.resume_analyzer.models import EmbeddingModelSingleton
+
+
+def _interrupt(signum, frame):
+    # serve_forever() runs on this thread, so server.shutdown() here would wait
+    # for the loop it is blocking; unwind it instead and close in finally
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    """
+    Run the shared embedding sidecar. Start one per host and set
+    EMBEDDING_SIDECAR_SOCKET in the web processes to the same path; they will
+    use it instead of loading their own copy of the model.
+    """
+    help = "Serve the embedding model to local workers over a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.EMBEDDING_SIDECAR_SOCKET,
+                            help="Path of the Unix socket to listen on")
+
+    def handle(self, **options):
+        socket_path = options['socket']
+        if not socket_path:
+            raise CommandError("Pass --socket or set EMBEDDING_SIDECAR_SOCKET")
+
+        self.stdout.write(f"Loading {settings.EMBEDDING_MODEL_NAME} with the {settings.EMBEDDING_BACKEND} backend")
+        model = EmbeddingModelSingleton.get_instance().load_local_model()
+        model.embed_query("warm up")
+
+        server = EmbeddingServer(socket_path, model)
+        signal.signal(signal.SIGTERM, _interrupt)
+        self.stdout.write(self.style.SUCCESS(f"Embedding server listening on {socket_path}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
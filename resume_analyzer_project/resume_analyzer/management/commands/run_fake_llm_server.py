@@ -0,0 +1,121 @@
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    """Answers OpenAI-style chat completion requests with a canned reply, streamed or not"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_chunk(self, data):
+        payload = f"data: {data}\n\n".encode('utf-8')
+        self.wfile.write(f"{len(payload):X}\r\n".encode('ascii') + payload + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        model = request.get('model', 'fake')
+        words = self.server.response_text.split(' ')
+        tokens = [word + (' ' if number < len(words) - 1 else '') for number, word in enumerate(words)]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        time.sleep(self.server.latency)
+
+        if not request.get('stream'):
+            time.sleep(self.server.token_delay * len(tokens))
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(tokens), 'total_tokens': len(tokens)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for number, token in enumerate(tokens):
+            self._send_chunk(json.dumps({
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'delta': {'role': 'assistant', 'content': token} if number == 0 else {'content': token},
+                    'finish_reason': None,
+                }],
+            }))
+            time.sleep(self.server.token_delay)
+        self._send_chunk(json.dumps({
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': created,
+            'model': model,
+            'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+        }))
+        self._send_chunk('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class Command(BaseCommand):
+    """
+    Run a local OpenAI-compatible chat completions server for exercising the
+    chat clients without Groq. Point the app at it with
+    GROQ_API_BASE=http://127.0.0.1:<port> and any GROQ_API_KEY.
+    """
+    help = "Serve canned chat completions on a local OpenAI-compatible endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=100.0, help="Delay before the first token")
+        parser.add_argument('--token-delay-ms', type=float, default=10.0, help="Delay between tokens")
+        parser.add_argument('--response', default="The candidate has experience with Python, Django and cloud deployment.")
+        parser.add_argument('--verbose', action='store_true', help="Log every request")
+
+    def handle(self, **options):
+        server = ThreadingHTTPServer((options['host'], options['port']), FakeChatHandler)
+        server.daemon_threads = True
+        server.latency = options['latency_ms'] / 1000.0
+        server.token_delay = options['token_delay_ms'] / 1000.0
+        server.response_text = options['response']
+        server.verbose = options['verbose']
+
+        self.stdout.write(f"Fake LLM server listening on http://{options['host']}:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write(self.style.SUCCESS("Fake LLM server stopped"))
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from resume_analyzer_project.resume_analyzer.vector_gc import reconcile_namespaces, sweep_tombstones
+
+
+class Command(BaseCommand):
+    """
+    Delete the vector namespaces of deleted resumes in the background, and
+    every --reconcile-interval seconds tombstone namespaces in the index that
+    no resume points at. Run it alongside the ingestion worker, or with
+    --once from a scheduler.
+    """
+    help = "Delete tombstoned vector namespaces and purge orphaned ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.VECTOR_GC_BATCH_SIZE,
+                            help="Tombstones processed per sweep")
+        parser.add_argument('--concurrency', type=int, default=settings.VECTOR_GC_CONCURRENCY,
+                            help="Namespace deletes in flight at once")
+        parser.add_argument('--interval', type=float, default=settings.VECTOR_GC_INTERVAL,
+                            help="Seconds to sleep when there is nothing to sweep")
+        parser.add_argument('--reconcile-interval', type=float, default=settings.VECTOR_GC_RECONCILE_INTERVAL,
+                            help="Seconds between orphan reconciliations (0 disables them)")
+        parser.add_argument('--once', action='store_true',
+                            help="Reconcile once, sweep until no tombstones are left, then exit")
+
+    def handle(self, **options):
+        stop_event = threading.Event()
+        next_reconcile = time.monotonic() if options['once'] or options['reconcile_interval'] else None
+
+        try:
+            while not stop_event.is_set():
+                if next_reconcile is not None and time.monotonic() >= next_reconcile:
+                    try:
+                        orphans = reconcile_namespaces()
+                        self.stdout.write(f"Reconciled namespaces: {len(orphans)} orphans tombstoned")
+                    except Exception as e:
+                        self.stderr.write(f"Namespace reconciliation failed: {str(e)}")
+                    next_reconcile = (
+                        time.monotonic() + options['reconcile_interval']
+                        if options['reconcile_interval'] and not options['once'] else None
+                    )
+
+                try:
+                    swept = sweep_tombstones(options['batch_size'], options['concurrency'])
+                except Exception as e:
+                    self.stderr.write(f"Vector sweep failed: {str(e)}")
+                    swept = 0
+                if swept:
+                    self.stdout.write(f"Swept {swept} namespaces")
+                    continue
+                if options['once']:
+                    break
+                stop_event.wait(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping vector sweeper")
+
+        self.stdout.write(self.style.SUCCESS("Vector sweeper stopped"))
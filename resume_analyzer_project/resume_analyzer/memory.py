@@ -0,0 +1,177 @@
+"""
+Token-budgeted conversation memory.
+
+The prompt carries at most the last ``MEMORY_MAX_TURNS`` turns verbatim, cut
+further to fit ``MEMORY_TOKEN_BUDGET`` tokens. Older messages are folded into
+a ``ConversationSummary`` for the resume. Each fold only sends the previous
+summary plus the messages that have left the window to the LLM, so the cost
+of a fold does not grow with the length of the chat. Prompt size stays flat
+however long the conversation runs.
+
+Folds run in batches: only once ``MEMORY_FOLD_BATCH`` messages have left the
+window, so a long chat costs one summary call every few turns rather than one
+per reply. Until then those messages stay in the prompt verbatim, as far as
+the token budget allows.
+
+Folding happens in a background thread after an answer has been saved, so
+it is never on the path of the next question.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .chunking import count_tokens
+from .models import ChatMessage, ConversationSummary
+
+logger = logging.getLogger(__name__)
+
+SUMMARY = 'summary'
+
+_folding = set()
+_folding_lock = threading.Lock()
+
+
+def _fold_batch():
+    return max(1, settings.MEMORY_FOLD_BATCH)
+
+
+def _window(messages, slack=0):
+    """
+    Split messages (oldest first) into those folded away and those kept
+    verbatim. ``slack`` extra messages may be kept beyond the window.
+    """
+    kept = []
+    tokens = 0
+    for message in reversed(messages[-(settings.MEMORY_MAX_TURNS * 2 + slack):]):
+        message_tokens = count_tokens(message.content)
+        if tokens + message_tokens > settings.MEMORY_TOKEN_BUDGET:
+            break
+        kept.append(message)
+        tokens += message_tokens
+    kept.reverse()
+    return messages[:len(messages) - len(kept)], kept
+
+
+def build_chat_history(resume, exclude_message=None):
+    """
+    Chat history for the prompt: a ``{"type": "summary"}`` entry when earlier
+    turns have been summarized, then the recent turns verbatim.
+    """
+    summary = ConversationSummary.objects.filter(resume=resume).first()
+    last_message_id = summary.last_message_id if summary else 0
+
+    recent = resume.chat_messages.filter(pk__gt=last_message_id)
+    if exclude_message is not None:
+        recent = recent.exclude(pk=exclude_message.pk)
+    # Messages waiting for the next fold are still shown verbatim
+    slack = _fold_batch() - 1
+    recent = list(recent.order_by('-pk')[:settings.MEMORY_MAX_TURNS * 2 + slack])
+    recent.reverse()
+    _, kept = _window(recent, slack)
+
+    history = []
+    if summary and summary.summary:
+        history.append({"type": SUMMARY, "content": summary.summary})
+    history.extend({"type": message.message_type, "content": message.content} for message in kept)
+    return history
+
+
+async def abuild_chat_history(resume, exclude_message=None):
+    """Async ``build_chat_history`` using the async ORM"""
+    summary = await ConversationSummary.objects.filter(resume=resume).afirst()
+    last_message_id = summary.last_message_id if summary else 0
+
+    recent = resume.chat_messages.filter(pk__gt=last_message_id)
+    if exclude_message is not None:
+        recent = recent.exclude(pk=exclude_message.pk)
+    slack = _fold_batch() - 1
+    recent = [message async for message in recent.order_by('-pk')[:settings.MEMORY_MAX_TURNS * 2 + slack]]
+    recent.reverse()
+    _, kept = _window(recent, slack)
+
+    history = []
+    if summary and summary.summary:
+        history.append({"type": SUMMARY, "content": summary.summary})
+    history.extend({"type": message.message_type, "content": message.content} for message in kept)
+    return history
+
+
+def _summarize(previous_summary, messages):
+    from .utils import get_chat_model
+
+    transcript = "\n".join(
+        f"{'User' if message.message_type == ChatMessage.HUMAN else 'Assistant'}: {message.content}"
+        for message in messages
+    )
+    prompt = f"""
+        You maintain a running summary of a conversation about a candidate's resume.
+        Update the summary with the new messages. Keep facts, names, numbers and open
+        questions; drop pleasantries. Answer with the updated summary only.
+
+        Current summary:
+        {previous_summary or "(none)"}
+
+        New messages:
+        {transcript}
+
+        Updated summary:
+        """
+    llm = get_chat_model(settings.MEMORY_SUMMARY_MODEL, 0.0, settings.MEMORY_SUMMARY_MAX_TOKENS)
+    response = llm.invoke(prompt)
+    return (response.content if hasattr(response, 'content') else str(response)).strip()
+
+
+def fold_old_messages(resume):
+    """Fold messages that have left the verbatim window into the resume's summary, once there are enough of them"""
+    summary, _ = ConversationSummary.objects.get_or_create(resume=resume)
+    pending = list(resume.chat_messages.filter(pk__gt=summary.last_message_id).order_by('pk'))
+    folded, _ = _window(pending)
+    if len(folded) < _fold_batch():
+        return summary
+
+    logger.info(f"Summarizing {len(folded)} chat messages for resume {resume.pk}")
+    new_summary = _summarize(summary.summary, folded)
+
+    # Only move the pointer if no other process folded these messages first
+    updated = ConversationSummary.objects.filter(
+        pk=summary.pk,
+        last_message_id=summary.last_message_id
+    ).update(
+        summary=new_summary,
+        last_message_id=folded[-1].pk,
+        summarized_messages=summary.summarized_messages + len(folded)
+    )
+    if not updated:
+        logger.info(f"Summary for resume {resume.pk} was updated concurrently, discarding this fold")
+    return ConversationSummary.objects.get(pk=summary.pk)
+
+
+def _fold_in_background(resume):
+    try:
+        close_old_connections()
+        fold_old_messages(resume)
+    except Exception as e:
+        logger.error(f"Error summarizing conversation for resume {resume.pk}: {str(e)}")
+    finally:
+        with _folding_lock:
+            _folding.discard(resume.pk)
+        close_old_connections()
+
+
+def schedule_fold(resume):
+    """Fold old messages after a reply, in a background thread unless MEMORY_SUMMARY_ASYNC is off"""
+    with _folding_lock:
+        if resume.pk in _folding:
+            return
+        _folding.add(resume.pk)
+    if not settings.MEMORY_SUMMARY_ASYNC:
+        _fold_in_background(resume)
+        return
+    threading.Thread(
+        target=_fold_in_background,
+        args=(resume,),
+        name=f"memory-fold-{resume.pk}",
+        daemon=True
+    ).start()
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_analyzer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True)),
+                ('compressed_text', models.BinaryField()),
+                ('compressed_chunks', models.BinaryField(blank=True, null=True)),
+                ('chunker', models.CharField(blank=True, max_length=100)),
+                ('text_length', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
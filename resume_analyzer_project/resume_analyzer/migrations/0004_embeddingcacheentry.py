@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_analyzer', '0003_resume_status_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=200)),
+                ('text_hash', models.CharField(max_length=64)),
+                ('vector', models.BinaryField()),
+                ('dimensions', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'unique_together': {('model_name', 'text_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_analyzer', '0004_embeddingcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VectorTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(db_index=True, max_length=100)),
+                ('index_name', models.CharField(max_length=200)),
+                ('reason', models.CharField(default='deleted', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('swept_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
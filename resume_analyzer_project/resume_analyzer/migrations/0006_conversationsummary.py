@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_analyzer', '0005_vectortombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary', models.TextField(blank=True)),
+                ('last_message_id', models.BigIntegerField(default=0)),
+                ('summarized_messages', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resume', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summary', to='resume_analyzer.resume')),
+            ],
+        ),
+    ]
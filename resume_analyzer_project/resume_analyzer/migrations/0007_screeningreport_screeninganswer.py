@@ -0,0 +1,45 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_analyzer', '0006_conversationsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('temperature', models.FloatField(default=0.0)),
+                ('max_tokens', models.PositiveIntegerField(default=1000)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('seconds', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screening_reports', to='resume_analyzer.resume')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScreeningAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('question', models.TextField()),
+                ('answer', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('cached', models.BooleanField(default=False)),
+                ('seconds', models.FloatField(default=0.0)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='resume_analyzer.screeningreport')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+    ]
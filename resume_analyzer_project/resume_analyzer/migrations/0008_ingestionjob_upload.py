@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_analyzer', '0007_screeningreport_screeninganswer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='upload',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
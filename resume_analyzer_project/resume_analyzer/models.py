@@ -1,9 +1,11 @@
 from django.db import models
 import hashlib
+import json
 import os
+import threading
+import zlib
 from django.conf import settings
 from django.utils import timezone
-from langchain_huggingface import HuggingFaceEmbeddings
 from pinecone import Pinecone
 import logging
 
@@ -13,6 +15,7 @@ class EmbeddingModelSingleton:
     """Singleton class for the embedding model to avoid reloading it for each request"""
     _instance = None
     _model = None
+    _lock = threading.Lock()
 
     @classmethod
     def get_instance(cls):
@@ -20,17 +23,57 @@ class EmbeddingModelSingleton:
             cls._instance = cls()
         return cls._instance
 
+    @property
+    def model_name(self):
+        return settings.EMBEDDING_MODEL_NAME
+
+    @property
+    def cache_name(self):
+        """Identifies the configured model and backend in embedding cache keys"""
+        from .embedding_backends import backend_id
+        return backend_id(settings.EMBEDDING_BACKEND, self.model_name, settings.EMBEDDING_ONNX_QUANTIZED)
+
+    def load_local_model(self):
+        """Load the configured embedding backend in this process"""
+        from .embedding_backends import load_embedding_backend
+        model = load_embedding_backend(
+            settings.EMBEDDING_BACKEND,
+            self.model_name,
+            onnx_model_dir=settings.EMBEDDING_ONNX_MODEL_DIR,
+            quantized=settings.EMBEDDING_ONNX_QUANTIZED,
+            max_length=settings.EMBEDDING_MAX_SEQ_LENGTH,
+            threads=settings.EMBEDDING_ONNX_THREADS
+        )
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            from .embeddings import BatchingEmbeddings
+            model = BatchingEmbeddings(
+                model,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait=settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000.0
+            )
+        return model
+
     def get_embedding_model(self):
         if self._model is None:
-            logger.info("Loading embedding model (singleton instance)")
-            try:
-                self._model = HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/paraphrase-MiniLM-L3-v2"
-                )
-                logger.info("Embedding model loaded successfully")
-            except Exception as e:
-                logger.error(f"Error loading embedding model: {str(e)}")
-                raise
+            with self._lock:
+                if self._model is None:
+                    try:
+                        if settings.EMBEDDING_SIDECAR_SOCKET:
+                            # The sidecar owns the model; load it here only if the sidecar is down
+                            from .embedding_server import SidecarEmbeddings
+                            logger.info(f"Using embedding sidecar at {settings.EMBEDDING_SIDECAR_SOCKET}")
+                            self._model = SidecarEmbeddings(
+                                settings.EMBEDDING_SIDECAR_SOCKET,
+                                fallback=self.load_local_model,
+                                timeout=settings.EMBEDDING_SIDECAR_TIMEOUT
+                            )
+                        else:
+                            logger.info(f"Loading embedding model with {settings.EMBEDDING_BACKEND} backend (singleton instance)")
+                            self._model = self.load_local_model()
+                            logger.info("Embedding model loaded successfully")
+                    except Exception as e:
+                        logger.error(f"Error loading embedding model: {str(e)}")
+                        raise
         return self._model
 
 class PineconeSingleton:
@@ -72,11 +115,28 @@ def resume_upload_path(instance, filename):
 
 class Resume(models.Model):
     """Model to store uploaded resume files and their metadata"""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
     file = models.FileField(upload_to=resume_upload_path)
     original_filename = models.CharField(max_length=255)
     file_hash = models.CharField(max_length=64, unique=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     vector_namespace = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default=PENDING)
+
+    @property
+    def is_ready(self):
+        return self.status == self.READY
 
     def __str__(self):
         return self.original_filename
@@ -87,6 +147,7 @@ class Resume(models.Model):
             self.file_hash = hashlib.md5(file_content).hexdigest()
             self.file.seek(0)
 
+        if self.file_hash and not self.vector_namespace:
             self.vector_namespace = f"resume_{self.file_hash}"
 
         super().save(*args, **kwargs)
@@ -127,3 +188,154 @@ class ChatMessage(models.Model):
 
     def __str__(self):
         return f"{self.message_type}: {self.content[:50]}..."
+
+class ResumeText(models.Model):
+    """Compressed extracted text and chunks for a resume file, keyed by its content hash"""
+    file_hash = models.CharField(max_length=64, unique=True)
+    compressed_text = models.BinaryField()
+    compressed_chunks = models.BinaryField(null=True, blank=True)
+    chunker = models.CharField(max_length=100, blank=True)
+    text_length = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_hash} ({self.text_length} chars)"
+
+    @property
+    def text(self):
+        return zlib.decompress(bytes(self.compressed_text)).decode("utf-8")
+
+    @text.setter
+    def text(self, value):
+        self.compressed_text = zlib.compress(value.encode("utf-8"))
+        self.text_length = len(value)
+
+    def get_chunks(self, chunker):
+        """Return the stored chunk list if it was produced by ``chunker``, else None"""
+        if not self.compressed_chunks or self.chunker != chunker:
+            return None
+        return json.loads(zlib.decompress(bytes(self.compressed_chunks)).decode("utf-8"))
+
+    def set_chunks(self, chunks, chunker):
+        """Store a list of ``{"text", "start", "metadata"}`` dicts produced by ``chunker``"""
+        self.compressed_chunks = zlib.compress(json.dumps(chunks).encode("utf-8"))
+        self.chunker = chunker
+
+class IngestionJob(models.Model):
+    """Queued background job that extracts, chunks and embeds an uploaded resume"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='ingestion_jobs')
+    status = models.CharField(max_length=20, choices=STATUSES, default=QUEUED, db_index=True)
+    stage = models.CharField(max_length=50, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    # The uploaded PDF, for workers that cannot read the web process's MEDIA_ROOT; cleared when the job ends
+    upload = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Ingestion of {self.resume_id}: {self.status} ({self.progress}%)"
+
+class EmbeddingCacheEntry(models.Model):
+    """Cached embedding vector for a normalized chunk of text, shared across resumes"""
+    model_name = models.CharField(max_length=200)
+    text_hash = models.CharField(max_length=64)
+    vector = models.BinaryField()
+    dimensions = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = [('model_name', 'text_hash')]
+
+    def __str__(self):
+        return f"{self.model_name}:{self.text_hash}"
+
+class VectorTombstone(models.Model):
+    """A vector namespace waiting to be deleted from the index by the sweeper"""
+    namespace = models.CharField(max_length=100, db_index=True)
+    index_name = models.CharField(max_length=200)
+    reason = models.CharField(max_length=20, default='deleted')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    swept_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.index_name}/{self.namespace} ({'swept' if self.swept_at else 'pending'})"
+
+class ConversationSummary(models.Model):
+    """Rolling summary of the chat turns about a resume that no longer fit in the prompt verbatim"""
+    resume = models.OneToOneField(Resume, on_delete=models.CASCADE, related_name='conversation_summary')
+    summary = models.TextField(blank=True)
+    last_message_id = models.BigIntegerField(default=0)
+    summarized_messages = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary of {self.resume_id} through message {self.last_message_id}"
+
+class ScreeningReport(models.Model):
+    """Answers to a batch of screening questions about one resume"""
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUSES = [
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='screening_reports')
+    model = models.CharField(max_length=100)
+    temperature = models.FloatField(default=0.0)
+    max_tokens = models.PositiveIntegerField(default=1000)
+    status = models.CharField(max_length=20, choices=STATUSES, default=RUNNING)
+    seconds = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Screening of {self.resume_id}: {self.status}"
+
+class ScreeningAnswer(models.Model):
+    """One question of a screening report and its answer, or the error that prevented it"""
+    report = models.ForeignKey(ScreeningReport, on_delete=models.CASCADE, related_name='answers')
+    position = models.PositiveSmallIntegerField()
+    question = models.TextField()
+    answer = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    cached = models.BooleanField(default=False)
+    seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        ordering = ['position']
+
+    def __str__(self):
+        return f"{self.position}: {self.question[:50]}"
@@ -0,0 +1,184 @@
+"""
+PDF text extraction engine.
+
+Pages are produced lazily by ``iter_page_texts``. Small documents are read
+inline on the calling thread; documents at or above the page threshold are
+split into page ranges and fanned out to a bounded process pool, so a large
+upload does not pin a web thread on PyPDF2's pure-Python parser.
+
+Pages that have no text layer can be passed to ``ocr_pages``, which
+rasterises only those pages and runs Tesseract on them in the same pool,
+within a per-document page and time budget.
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from PyPDF2 import PdfReader
+
+# Try to import pdf2image, but don't fail if it's not available
+try:
+    from pdf2image import convert_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+    print("Warning: pdf2image not available. Some features may be limited.")
+
+# Tesseract is a local binary; pytesseract is only a thin wrapper around it
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+    print("Warning: pytesseract not available. OCR fallback is disabled.")
+
+OCR_AVAILABLE = PDF2IMAGE_AVAILABLE and PYTESSERACT_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(max_workers):
+    """Return the shared extraction pool, creating it on first use"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            logger.info(f"Starting PDF extraction pool with {max_workers} workers")
+            # spawn rather than fork: gunicorn workers are threaded and forking
+            # a process that holds model weights and sockets is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = max_workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared extraction pool if it was started"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+            _pool_workers = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _extract_page_range(source, start, stop):
+    """Extract text for pages [start, stop) of a PDF. Runs in a pool worker."""
+    reader = PdfReader(source)
+    texts = []
+    for page_number in range(start, stop):
+        try:
+            texts.append(reader.pages[page_number].extract_text() or "")
+        except Exception as e:
+            logger.warning(f"Could not extract text from page {page_number}: {str(e)}")
+            texts.append("")
+    return start, texts
+
+
+def count_pages(source):
+    """Return the number of pages in a PDF path or binary file object"""
+    return len(PdfReader(source).pages)
+
+
+def iter_page_texts(file_path, parallel_threshold=8, max_workers=2, pages_per_task=4):
+    """
+    Yield ``(page_number, text)`` for every page of the PDF, in page order.
+
+    Pages are extracted inline when the document has fewer than
+    ``parallel_threshold`` pages or ``max_workers`` is below 2. Otherwise
+    page ranges of ``pages_per_task`` pages are extracted in the shared
+    process pool and yielded as each range completes.
+    """
+    with open(file_path, "rb") as file:
+        reader = PdfReader(file)
+        page_count = len(reader.pages)
+
+        if page_count < parallel_threshold or max_workers < 2:
+            for page_number, page in enumerate(reader.pages):
+                try:
+                    yield page_number, page.extract_text() or ""
+                except Exception as e:
+                    logger.warning(f"Could not extract text from page {page_number}: {str(e)}")
+                    yield page_number, ""
+            return
+
+    logger.info(f"Extracting {page_count} pages across {max_workers} worker processes")
+    pool = _get_pool(max_workers)
+    starts = list(range(0, page_count, pages_per_task))
+    stops = [min(start + pages_per_task, page_count) for start in starts]
+    results = pool.map(_extract_page_range, [file_path] * len(starts), starts, stops)
+    for start, texts in results:
+        for offset, text in enumerate(texts):
+            yield start + offset, text
+
+
+def _ocr_page(file_path, page_number, dpi, lang):
+    """Rasterise a single page and OCR it. Runs in a pool worker."""
+    images = convert_from_path(
+        file_path,
+        dpi=dpi,
+        first_page=page_number + 1,
+        last_page=page_number + 1
+    )
+    text = "\n".join(pytesseract.image_to_string(image, lang=lang) for image in images)
+    return page_number, text
+
+
+def ocr_pages(file_path, page_numbers, dpi=200, lang="eng", max_pages=10,
+              time_budget=30.0, max_workers=2):
+    """
+    OCR the given pages of a PDF and return ``{page_number: text}``.
+
+    At most ``max_pages`` pages are processed. Pages still queued when
+    ``time_budget`` seconds have elapsed are cancelled and left out of the
+    result; a page already being OCR'd in a worker is allowed to finish but
+    its text is discarded.
+    """
+    if not OCR_AVAILABLE:
+        logger.warning("OCR requested but pdf2image or pytesseract is not available")
+        return {}
+
+    page_numbers = list(page_numbers)[:max_pages]
+    if not page_numbers:
+        return {}
+
+    logger.info(f"Running OCR on {len(page_numbers)} pages at {dpi} DPI")
+    deadline = time.monotonic() + time_budget
+    pool = _get_pool(max(max_workers, 1))
+    pending = {
+        pool.submit(_ocr_page, file_path, page_number, dpi, lang)
+        for page_number in page_numbers
+    }
+    results = {}
+
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                page_number, text = future.result()
+                results[page_number] = text
+            except Exception as e:
+                logger.error(f"Error running OCR on page: {str(e)}")
+
+    if pending:
+        logger.warning(f"OCR time budget of {time_budget}s exhausted, skipping {len(pending)} pages")
+        for future in pending:
+            future.cancel()
+
+    return results
@@ -0,0 +1,102 @@
+"""
+LLM response cache on Django's cache framework.
+
+Answers are stored in the ``LLM_CACHE_ALIAS`` cache (file- or
+database-backed, see ``CACHES``), so every worker process shares them and
+they survive worker recycling. The key covers everything that determines the
+answer: model, temperature, max tokens, the normalized question, and hashes
+of the retrieved context and of the chat history.
+
+Entries expire after ``LLM_CACHE_TTL`` seconds, and the TTL is refreshed on
+every hit, so answers that are not being reused expire first. Eviction is not
+LRU: once ``LLM_CACHE_MAX_ENTRIES`` is exceeded, both the file and the
+database backend cull a quarter of the entries (``CULL_FREQUENCY``) without
+regard to use. Size ``LLM_CACHE_MAX_ENTRIES`` above the working set so culls
+stay rare and the TTL does the evicting.
+
+Hit and miss counts are kept in process memory, so lookups only read from
+the shared cache and ``response_cache_stats`` reports the current worker.
+
+Each resume's keys include a generation number. Deleting a resume bumps its
+generation, which invalidates all of its answers at once.
+"""
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.LLM_CACHE_ALIAS]
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def _increment(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def resume_generation(resume_id):
+    return _cache().get(f"llm_generation:{resume_id}", 0)
+
+
+def response_cache_key(resume_id, model, temperature, max_tokens, query, context, history):
+    """Cache key for an answer; ``context`` and ``history`` are the exact strings sent in the prompt"""
+    params = json.dumps({
+        'model': model,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'query': " ".join(query.lower().split()),
+        'context': _digest(context),
+        'history': _digest(history),
+    }, sort_keys=True)
+    return f"llm:{resume_id}:{resume_generation(resume_id)}:{_digest(params)}"
+
+
+def get_cached_response(key):
+    """Return the cached answer for ``key`` or None, counting the hit or miss"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    cache = _cache()
+    response = cache.get(key)
+    if response is None:
+        _increment('misses')
+        return None
+    cache.touch(key, settings.LLM_CACHE_TTL)
+    _increment('hits')
+    return response
+
+
+def cache_response(key, response):
+    if settings.LLM_CACHE_ENABLED and response:
+        _cache().set(key, response, timeout=settings.LLM_CACHE_TTL)
+
+
+def invalidate_resume_responses(resume_id):
+    """Invalidate every cached answer about a resume"""
+    key = f"llm_generation:{resume_id}"
+    _cache().set(key, resume_generation(resume_id) + 1, timeout=None)
+    logger.info(f"Invalidated cached LLM responses for resume {resume_id}")
+
+
+def response_cache_stats():
+    """Hit and miss counts of this process"""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else 0.0,
+    }
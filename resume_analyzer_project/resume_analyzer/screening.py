@@ -0,0 +1,140 @@
+"""
+Screening questionnaires: many questions about one resume in one request.
+
+``run_screening`` retrieves context for all questions at once. Questions the
+retrieval cache has not seen are embedded in a single batch and their index
+queries run concurrently. The LLM calls then fan out over
+``SCREENING_CONCURRENCY`` threads, so a questionnaire takes about as long as
+its slowest question instead of the sum of all of them.
+
+Each question is answered without chat history, so screening answers share
+the LLM response cache across reports. Results are stored as a
+``ScreeningReport`` with one ``ScreeningAnswer`` per question. They are not
+added to the resume's chat.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import ScreeningAnswer, ScreeningReport
+from .response_cache import cache_response, get_cached_response, response_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def clean_questions(questions):
+    """Strip questions and drop blanks, keeping their order; raises ValueError for an unusable list"""
+    if not isinstance(questions, list) or not all(isinstance(question, str) for question in questions):
+        raise ValueError("Questions must be a list of strings")
+    questions = [question.strip() for question in questions if question.strip()]
+    if not questions:
+        raise ValueError("At least one question is required")
+    if len(questions) > settings.SCREENING_MAX_QUESTIONS:
+        raise ValueError(f"At most {settings.SCREENING_MAX_QUESTIONS} questions can be screened at once")
+    return questions
+
+
+def _answer(question, docs_content, model, temperature, max_tokens, resume_id):
+    """Answer one question from its retrieved context; returns (answer, error, cached, seconds)"""
+    from .utils import build_resume_prompt, get_chat_model
+
+    start_time = time.perf_counter()
+    try:
+        cache_key = None
+        if temperature == 0.0:
+            cache_key = response_cache_key(resume_id, model, temperature, max_tokens, question, docs_content, "")
+            cached = get_cached_response(cache_key)
+            if cached is not None:
+                return cached, "", True, time.perf_counter() - start_time
+
+        llm = get_chat_model(model, temperature, max_tokens)
+        response = llm.invoke(build_resume_prompt(question, docs_content, ""))
+        answer = response.content if hasattr(response, 'content') else str(response)
+        if cache_key:
+            cache_response(cache_key, answer)
+        return answer, "", False, time.perf_counter() - start_time
+    except Exception as e:
+        logger.error(f"Error answering screening question '{question}': {str(e)}")
+        return "", str(e), False, time.perf_counter() - start_time
+    finally:
+        # Worker threads open their own connections when the cache is database-backed
+        connections.close_all()
+
+
+def run_screening(resume, questions, model="llama3-8b-8192", temperature=0.0, max_tokens=1000):
+    """Answer ``questions`` about ``resume`` concurrently and store them as a screening report"""
+    from .utils import get_retriever, retrieve_documents_batch
+
+    start_time = time.perf_counter()
+    report = ScreeningReport.objects.create(
+        resume=resume,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    logger.info(f"Screening resume {resume.pk} with {len(questions)} questions")
+
+    try:
+        namespace = resume.vector_namespace if resume.vector_namespace.strip() else None
+        vector_store, _ = get_retriever(namespace)
+        documents = retrieve_documents_batch(
+            vector_store,
+            questions,
+            namespace,
+            concurrency=settings.SCREENING_CONCURRENCY
+        )
+        contexts = ["\n\n".join(doc.page_content for doc in docs) for docs in documents]
+
+        with ThreadPoolExecutor(max_workers=min(settings.SCREENING_CONCURRENCY, len(questions))) as pool:
+            results = list(pool.map(
+                lambda item: _answer(item[0], item[1], model, temperature, max_tokens, resume.file_hash),
+                zip(questions, contexts)
+            ))
+    except Exception as e:
+        logger.error(f"Error screening resume {resume.pk}: {str(e)}")
+        results = [("", str(e), False, 0.0)] * len(questions)
+
+    ScreeningAnswer.objects.bulk_create([
+        ScreeningAnswer(
+            report=report,
+            position=position,
+            question=question,
+            answer=answer,
+            error=error,
+            cached=cached,
+            seconds=seconds
+        )
+        for position, (question, (answer, error, cached, seconds)) in enumerate(zip(questions, results))
+    ])
+
+    report.status = ScreeningReport.FAILED if all(result[1] for result in results) else ScreeningReport.DONE
+    report.seconds = time.perf_counter() - start_time
+    report.finished_at = timezone.now()
+    report.save(update_fields=['status', 'seconds', 'finished_at'])
+    logger.info(f"Screened resume {resume.pk} in {report.seconds:.2f} seconds")
+    return report
+
+
+def report_as_dict(report):
+    return {
+        'id': report.pk,
+        'resume_id': report.resume_id,
+        'model': report.model,
+        'status': report.status,
+        'seconds': report.seconds,
+        'created_at': report.created_at.isoformat(),
+        'answers': [
+            {
+                'question': answer.question,
+                'answer': answer.answer,
+                'error': answer.error,
+                'cached': answer.cached,
+                'seconds': answer.seconds,
+            }
+            for answer in report.answers.all()
+        ],
+    }
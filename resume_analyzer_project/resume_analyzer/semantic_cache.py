@@ -0,0 +1,110 @@
+"""
+Semantic answer cache.
+
+Questions that open a conversation about a resume ("list their skills",
+"what skills do they have?") are embedded with the query embedding model.
+The answer to the most similar earlier question about the same resume is
+reused when its cosine similarity reaches ``SEMANTIC_CACHE_THRESHOLD``.
+
+Follow-up questions depend on the conversation, so the cache is only used
+when the chat history is empty. Entries live in the shared LLM response cache
+as one bounded list per (resume, generation, model, max tokens). Deleting a
+resume therefore drops its entries along with its exact-match answers.
+"""
+import logging
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .embeddings import CachedEmbeddings
+from .models import EmbeddingModelSingleton
+from .response_cache import _cache, resume_generation
+
+logger = logging.getLogger(__name__)
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hit_similarity = 0.0
+        self.miss_similarity = 0.0
+
+    def record(self, hit, similarity):
+        with self.lock:
+            if hit:
+                self.hits += 1
+                self.hit_similarity += similarity
+            else:
+                self.misses += 1
+                self.miss_similarity += similarity
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'mean_hit_similarity': self.hit_similarity / self.hits if self.hits else 0.0,
+            'mean_best_miss_similarity': self.miss_similarity / self.misses if self.misses else 0.0,
+            'threshold': settings.SEMANTIC_CACHE_THRESHOLD,
+        }
+
+
+_stats = _Stats()
+
+
+def semantic_cache_stats():
+    return _stats.as_dict()
+
+
+def applies(chat_history, temperature):
+    """Whether a question can be answered from the semantic cache"""
+    return settings.SEMANTIC_CACHE_ENABLED and temperature == 0.0 and not chat_history
+
+
+def _key(resume_id, model, max_tokens):
+    return f"semantic:{resume_id}:{resume_generation(resume_id)}:{model}:{max_tokens}"
+
+
+def embed_question(query):
+    """Unit-length embedding of a question, served from the query embedding cache when possible"""
+    embedding_singleton = EmbeddingModelSingleton.get_instance()
+    embedding_model = CachedEmbeddings(
+        embedding_singleton.get_embedding_model(),
+        embedding_singleton.cache_name
+    )
+    vector = np.asarray(embedding_model.embed_query(query), dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def lookup(resume_id, model, max_tokens, vector):
+    """Return the cached answer to the most similar earlier question, or None"""
+    entries = _cache().get(_key(resume_id, model, max_tokens)) or []
+    best_similarity, best_answer = 0.0, None
+    if entries:
+        matrix = np.frombuffer(b"".join(entry['vector'] for entry in entries), dtype=np.float32)
+        similarities = matrix.reshape(len(entries), -1) @ vector
+        best = int(np.argmax(similarities))
+        best_similarity, best_answer = float(similarities[best]), entries[best]['answer']
+
+    hit = best_answer is not None and best_similarity >= settings.SEMANTIC_CACHE_THRESHOLD
+    _stats.record(hit, best_similarity)
+    if hit:
+        logger.info(f"Semantic cache hit for resume {resume_id} (similarity {best_similarity:.3f})")
+        return best_answer
+    return None
+
+
+def store(resume_id, model, max_tokens, query, vector, answer):
+    """Remember an answer, keeping the most recent ``SEMANTIC_CACHE_MAX_ENTRIES`` per resume"""
+    if not answer:
+        return
+    key = _key(resume_id, model, max_tokens)
+    cache = _cache()
+    # Concurrent stores for one resume may drop one another's entry; that only costs a future miss
+    entries = cache.get(key) or []
+    entries.append({'question': query, 'vector': vector.astype(np.float32).tobytes(), 'answer': answer})
+    cache.set(key, entries[-settings.SEMANTIC_CACHE_MAX_ENTRIES:], timeout=settings.LLM_CACHE_TTL)
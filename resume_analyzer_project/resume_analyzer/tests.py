@@ -1,3 +1,1272 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from langchain.schema import Document
+
+from . import candidate_search, embeddings, response_cache, semantic_cache, utils, views
+from .caching import LRUCache
+from .chunking import PAGE_BREAK, strip_page_boilerplate
+from .embedding_backends import ONNX, TORCH, backend_id, load_embedding_backend
+from .embedding_server import EmbeddingServer, SidecarEmbeddings
+from .embeddings import BatchingEmbeddings, CachedEmbeddings, evict_embedding_cache
+from .llm_clients import ChatClientRegistry
+from .management.commands.run_fake_llm_server import FakeChatHandler
+from .memory import build_chat_history, fold_old_messages
+from .ingestion import (
+    PermanentIngestionError, claim_next_job, enqueue_ingestion, process_next_job, requeue_stale_jobs, run_ingestion_job
+)
+from .models import (
+    ChatMessage, ConversationSummary, EmbeddingCacheEntry, EmbeddingModelSingleton, IngestionJob, Resume, ResumeText,
+    ScreeningAnswer, ScreeningReport, VectorTombstone,
+)
+from .upload_handlers import HashingFileUploadHandler
+from .vector_stores import COMPACT_SLACK, LOCAL, LocalVectorIndex, LocalVectorStore
+from .vector_gc import record_tombstone, sweep_tombstones
+from .vector_upserts import UpsertError, chunk_vector_id, upsert_in_batches
+
+
+class PageBoilerplateTests(SimpleTestCase):
+    def test_single_page_is_untouched(self):
+        text = (
+            "Jane Doe\nExperience\nEngineer, Acme\n2015 - 2019\n"
+            "Engineer, Beta\n2015 - 2019\nEducation\nBSc\n2011 - 2015\nPage 1 of 1\n"
+        )
+        self.assertEqual(strip_page_boilerplate(text), text)
+
+    def test_repeated_headers_and_page_numbers_are_stripped(self):
+        text = PAGE_BREAK.join([
+            "Jane Doe - Resume\nExperience\nAcme\n2015 - 2019\nPage 1 of 2\n\n",
+            "Jane Doe - Resume\nBeta\n2015 - 2019\nEducation\nPage 2 of 2\n\n",
+        ])
+        cleaned = strip_page_boilerplate(text).split("\n")
+        self.assertEqual(cleaned.count("Jane Doe - Resume"), 1)
+        self.assertNotIn("Page 2 of 2", cleaned)
+        # Body lines that happen to repeat are real content
+        self.assertEqual(cleaned.count("2015 - 2019"), 2)
+
+
+class LocalVectorIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+
+    def upsert(self, index, ids):
+        index.upsert('shared', ids, np.random.rand(len(ids), 8), ids, [{'chunk': vector_id} for vector_id in ids])
+
+    def test_writers_sharing_a_directory_see_each_others_batches(self):
+        # Two instances stand in for two worker processes
+        first = LocalVectorIndex(self.root.name)
+        second = LocalVectorIndex(self.root.name)
+        self.upsert(first, ['a', 'b'])
+        self.upsert(second, ['c'])
+        self.upsert(first, ['d'])
+        second.delete('shared', ids=['b'])
+
+        for index in (first, second, LocalVectorIndex(self.root.name)):
+            self.assertEqual(sorted(index.list_ids('shared')), ['a', 'c', 'd'])
+
+    def test_compaction_keeps_live_vectors(self):
+        index = LocalVectorIndex(self.root.name)
+        for number in range(COMPACT_SLACK + 10):
+            self.upsert(index, ['same'])
+        self.assertLess(index.namespaces['shared'].records, COMPACT_SLACK)
+
+        reader = LocalVectorIndex(self.root.name)
+        self.assertEqual(reader.list_ids('shared'), ['same'])
+        self.assertEqual(reader.search('shared', np.random.rand(8), 5)[0][0], 'same')
+
+    def test_delete_all_removes_the_namespace(self):
+        index = LocalVectorIndex(self.root.name)
+        self.upsert(index, ['a'])
+        self.assertEqual(index.list_namespaces(), ['shared'])
+        index.delete('shared', delete_all=True)
+        self.assertEqual(index.list_namespaces(), [])
+        self.assertEqual(LocalVectorIndex(self.root.name).list_ids('shared'), [])
+
+
+@override_settings(SEARCH_TOP_K=4)
+class CandidateSearchTests(TestCase):
+    def setUp(self):
+        candidate_search._search_cache.clear()
+        self.addCleanup(candidate_search._search_cache.clear)
+        for file_hash in ('live1', 'live2'):
+            Resume.objects.create(file=f'resumes/{file_hash}.pdf', original_filename=f'{file_hash}.pdf',
+                                  file_hash=file_hash, status=Resume.READY)
+        Resume.objects.create(file='resumes/pending.pdf', original_filename='pending.pdf',
+                              file_hash='pending', status=Resume.PENDING)
+        # Chunks of a deleted and of a pending resume outrank every live chunk
+        self.hits = [
+            (f'chunk {number}', {'resume_id': resume_id, 'section': 'experience'}, 1.0 - number / 100)
+            for number, resume_id in enumerate(['deleted'] * 4 + ['pending'] * 2 + ['live1', 'live2'] * 3)
+        ]
+        self.queried = []
+        patches = [
+            mock.patch.object(candidate_search, '_query_index', side_effect=self.query_index),
+            mock.patch.object(candidate_search, 'EmbeddingModelSingleton'),
+            mock.patch.object(candidate_search, 'CachedEmbeddings'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def query_index(self, vector, top_k, metadata_filter):
+        self.queried.append(top_k)
+        return self.hits[:top_k]
+
+    def test_chunks_of_missing_resumes_are_dropped_before_ranking(self):
+        ranked = candidate_search.search_candidates('python')
+        self.assertEqual([result['resume_id'] for result in ranked], ['live1', 'live2'])
+        self.assertEqual(sum(result['hits'] for result in ranked), 4)
+        # Over-fetched until SEARCH_TOP_K live chunks were found
+        self.assertEqual(self.queried, [4, 8, 16])
+
+    def test_over_fetched_hits_are_cached(self):
+        candidate_search.search_candidates('python')
+        candidate_search.search_candidates('python')
+        self.assertEqual(self.queried, [4, 8, 16])
+
+
+@override_settings(LLM_CACHE_ENABLED=True)
+class ResponseCacheTests(SimpleTestCase):
+    def test_lookups_only_read_the_shared_cache(self):
+        before = response_cache.response_cache_stats()
+        with mock.patch.object(response_cache, '_cache') as cache:
+            cache.return_value.get.side_effect = [None, 'cached answer']
+            self.assertIsNone(response_cache.get_cached_response('llm:missing'))
+            self.assertEqual(response_cache.get_cached_response('llm:present'), 'cached answer')
+            cache.return_value.set.assert_not_called()
+            cache.return_value.add.assert_not_called()
+            cache.return_value.incr.assert_not_called()
+
+        after = response_cache.response_cache_stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+
+
+def unit_vector(similarity):
+    """A 2-d unit vector whose cosine similarity with (1, 0) is ``similarity``"""
+    return np.array([similarity, np.sqrt(1.0 - similarity ** 2)], dtype=np.float32)
+
+
+@override_settings(
+    CACHES={'semantic-tests': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'semantic'}},
+    LLM_CACHE_ALIAS='semantic-tests',
+    SEMANTIC_CACHE_ENABLED=True,
+    SEMANTIC_CACHE_THRESHOLD=0.9,
+    SEMANTIC_CACHE_MAX_ENTRIES=2,
+)
+class SemanticCacheTests(SimpleTestCase):
+    def setUp(self):
+        # LocMemCache contents outlive the override, so start every test empty
+        response_cache._cache().clear()
+        semantic_cache.store('abc', 'llama', 100, 'What skills do they have?', unit_vector(1.0), 'Python and Go')
+
+    def test_similar_questions_reuse_the_answer(self):
+        self.assertEqual(semantic_cache.lookup('abc', 'llama', 100, unit_vector(0.95)), 'Python and Go')
+
+    def test_questions_below_the_threshold_miss(self):
+        self.assertIsNone(semantic_cache.lookup('abc', 'llama', 100, unit_vector(0.85)))
+
+    def test_entries_are_per_resume_model_and_max_tokens(self):
+        self.assertIsNone(semantic_cache.lookup('def', 'llama', 100, unit_vector(1.0)))
+        self.assertIsNone(semantic_cache.lookup('abc', 'mixtral', 100, unit_vector(1.0)))
+        self.assertIsNone(semantic_cache.lookup('abc', 'llama', 200, unit_vector(1.0)))
+
+    def test_only_the_most_recent_entries_are_kept(self):
+        semantic_cache.store('abc', 'llama', 100, 'Where did they study?', unit_vector(0.0), 'MIT')
+        semantic_cache.store('abc', 'llama', 100, 'Any awards?', unit_vector(-1.0), 'None')
+        self.assertIsNone(semantic_cache.lookup('abc', 'llama', 100, unit_vector(1.0)))
+        self.assertEqual(semantic_cache.lookup('abc', 'llama', 100, unit_vector(0.0)), 'MIT')
+
+    def test_changed_resumes_invalidate_their_answers(self):
+        response_cache.invalidate_resume_responses('abc')
+        self.assertIsNone(semantic_cache.lookup('abc', 'llama', 100, unit_vector(1.0)))
+
+    def test_follow_ups_and_sampled_answers_bypass_the_cache(self):
+        self.assertTrue(semantic_cache.applies([], 0.0))
+        self.assertFalse(semantic_cache.applies([{'type': 'human', 'content': 'Hi'}], 0.0))
+        self.assertFalse(semantic_cache.applies([], 0.7))
+        with override_settings(SEMANTIC_CACHE_ENABLED=False):
+            self.assertFalse(semantic_cache.applies([], 0.0))
+
+        with mock.patch.object(semantic_cache, 'embed_question') as embed:
+            history = [{'type': 'human', 'content': 'Hi'}]
+            self.assertEqual(utils._semantic_lookup('Skills?', history, 'llama', 0.0, 100, 'abc'), (None, None))
+            self.assertEqual(utils._semantic_lookup('Skills?', [], 'llama', 0.7, 100, 'abc'), (None, None))
+        embed.assert_not_called()
+
+
+@override_settings(GROQ_API_KEY='test', GROQ_API_BASE='http://127.0.0.1:9')
+class ChatClientRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = ChatClientRegistry()
+
+    async def get_async_pool(self):
+        return self.registry.get('llama3-8b-8192', 0.0, 100).http_async_client
+
+    def test_new_event_loop_closes_the_previous_pool(self):
+        first_loop = asyncio.new_event_loop()
+        self.addCleanup(first_loop.close)
+        first_pool = first_loop.run_until_complete(self.get_async_pool())
+
+        second_pool = asyncio.run(self.get_async_pool())
+        self.assertIsNot(second_pool, first_pool)
+        self.assertFalse(first_pool.is_closed)
+        # The close waits for the owner to run its loop again
+        first_loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertTrue(first_pool.is_closed)
+
+    def test_same_parameters_share_a_client_and_all_clients_share_a_pool(self):
+        with mock.patch.object(ChatClientRegistry, '_instance', self.registry):
+            first = utils.get_chat_model('llama3-8b-8192', 0, 100)
+            self.assertIs(utils.get_chat_model('llama3-8b-8192', 0.0, 100), first)
+            other = utils.get_chat_model('llama3-8b-8192', 0.7, 100)
+        self.assertIsNot(other, first)
+        self.assertIs(other.http_client, first.http_client)
+        self.assertEqual(self.registry.stats()['clients'], 2)
+
+    def test_requests_reuse_pooled_connections(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeChatHandler)
+        server.daemon_threads = True
+        server.latency = server.token_delay = 0.0
+        server.response_text = 'Pooled answer'
+        server.verbose = False
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with override_settings(GROQ_API_BASE=f"http://127.0.0.1:{server.server_address[1]}"):
+            answers = [self.registry.get('llama3-8b-8192', 0.0, 100).invoke('Hi').content for _ in range(3)]
+        self.assertEqual(answers, ['Pooled answer'] * 3)
+        stats = self.registry.stats()
+        self.assertEqual((stats['requests'], stats['new_connections'], stats['reused_connections']), (3, 1, 2))
+
+    def test_aclose_closes_the_pool_of_the_running_loop(self):
+        async def get_and_close():
+            pool = await self.get_async_pool()
+            await self.registry.aclose()
+            return pool
+
+        self.assertTrue(asyncio.run(get_and_close()).is_closed)
+        self.assertEqual(self.registry.stats()['clients'], 0)
+
+
+@override_settings(MEMORY_MAX_TURNS=2, MEMORY_FOLD_BATCH=2, MEMORY_TOKEN_BUDGET=1000,
+                   CHAT_LLM_BACKEND='fake', CHAT_FAKE_RESPONSE='Folded summary')
+class ConversationMemoryTests(TestCase):
+    def setUp(self):
+        self.resume = Resume.objects.create(file='resumes/memory.pdf', original_filename='memory.pdf',
+                                            file_hash='memory', status=Resume.READY)
+
+    def add_messages(self, count):
+        for number in range(count):
+            message_type = ChatMessage.HUMAN if number % 2 == 0 else ChatMessage.AI
+            ChatMessage.objects.create(resume=self.resume, message_type=message_type, content=f'message {number}')
+
+    def test_messages_are_folded_in_batches(self):
+        # One message past the window of four is not worth a summary call yet
+        self.add_messages(5)
+        self.assertEqual(fold_old_messages(self.resume).summarized_messages, 0)
+        history = build_chat_history(self.resume)
+        self.assertEqual([entry['content'] for entry in history], [f'message {number}' for number in range(5)])
+
+        self.add_messages(1)
+        summary = fold_old_messages(self.resume)
+        self.assertEqual((summary.summary, summary.summarized_messages), ('Folded summary', 2))
+        history = build_chat_history(self.resume)
+        self.assertEqual(history[0], {'type': 'summary', 'content': 'Folded summary'})
+        self.assertEqual(len(history), 5)
+        self.assertEqual(ConversationSummary.objects.count(), 1)
+
+
+class RecordingEmbeddings:
+    """Embeds each text as its length and remembers every batch it was sent"""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class LocalBackendMixin:
+    """Runs a test against the local vector backend in a temp directory, embedding with RecordingEmbeddings"""
+
+    def use_local_backend(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        local_dir = override_settings(VECTOR_STORE_LOCAL_DIR=root.name)
+        local_dir.enable()
+        self.addCleanup(local_dir.disable)
+        for cache in (utils._vector_store_cache, utils._retrieval_cache, embeddings._query_cache):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+        self.embeddings = RecordingEmbeddings()
+        singleton = mock.Mock(cache_name='recording')
+        singleton.get_embedding_model.return_value = self.embeddings
+        patch = mock.patch.object(EmbeddingModelSingleton, 'get_instance', return_value=singleton)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+
+class EmbeddingBackendTests(SimpleTestCase):
+    def test_backends_have_distinct_cache_names(self):
+        names = {
+            backend_id(TORCH, 'all-MiniLM-L6-v2'),
+            backend_id(ONNX, 'all-MiniLM-L6-v2', quantized=False),
+            backend_id(ONNX, 'all-MiniLM-L6-v2', quantized=True),
+        }
+        self.assertEqual(len(names), 3)
+
+    def test_misconfigured_backends_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'EMBEDDING_ONNX_MODEL_DIR'):
+            load_embedding_backend(ONNX, 'all-MiniLM-L6-v2', onnx_model_dir='')
+        with self.assertRaisesMessage(ValueError, "Unknown embedding backend 'tensorflow'"):
+            load_embedding_backend('tensorflow', 'all-MiniLM-L6-v2')
+
+    @override_settings(EMBEDDING_BACKEND=ONNX, EMBEDDING_BATCHING_ENABLED=True, EMBEDDING_BATCH_MAX_SIZE=16)
+    def test_singleton_wraps_the_backend_in_the_batching_executor(self):
+        backend = RecordingEmbeddings()
+        with mock.patch('resume_analyzer_project.resume_analyzer.embedding_backends.load_embedding_backend',
+                        return_value=backend) as load:
+            model = EmbeddingModelSingleton().load_local_model()
+        self.assertEqual(load.call_args.args[0], ONNX)
+        self.assertIsInstance(model, BatchingEmbeddings)
+        self.assertIs(model.embedding_model, backend)
+        self.assertEqual(model.max_batch_size, 16)
+
+
+class EmbeddingServerTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.socket_path = os.path.join(root.name, 'embed.sock')
+        self.model = RecordingEmbeddings()
+
+    def start_server(self):
+        server = EmbeddingServer(self.socket_path, self.model)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_round_trip_over_the_socket(self):
+        self.start_server()
+        client = SidecarEmbeddings(self.socket_path)
+        self.assertTrue(client.ping())
+        self.assertEqual(client.embed_documents(['ab', 'résumé']), [[2.0, 1.0], [6.0, 1.0]])
+        self.assertEqual(client.embed_query('abc'), [3.0, 1.0])
+        self.assertEqual(client.embed_documents([]), [])
+        self.assertEqual(self.model.batches, [['ab', 'résumé'], ['abc'], []])
+        client._close()
+
+    def test_server_errors_are_raised_by_the_client(self):
+        self.model.embed_documents = mock.Mock(side_effect=RuntimeError('model crashed'))
+        self.start_server()
+        client = SidecarEmbeddings(self.socket_path)
+        with self.assertRaisesMessage(ValueError, 'model crashed'):
+            client.embed_documents(['ab'])
+        client._close()
+
+    def test_missing_socket_falls_back_to_the_local_model(self):
+        local = RecordingEmbeddings()
+        fallback = mock.Mock(return_value=local)
+        client = SidecarEmbeddings(self.socket_path, fallback=fallback, retry_interval=60)
+        self.assertFalse(client.ping())
+        self.assertEqual(client.embed_query('abc'), [3.0, 1.0])
+        self.assertEqual(client.embed_documents(['ab']), [[2.0, 1.0]])
+        fallback.assert_called_once_with()
+        self.assertEqual(local.batches, [['abc'], ['ab']])
+
+    def test_missing_socket_without_fallback_raises(self):
+        client = SidecarEmbeddings(self.socket_path)
+        with self.assertRaises(ConnectionError):
+            client.embed_query('abc')
+
+    def test_sigterm_stops_the_command(self):
+        singleton = mock.Mock()
+        singleton.load_local_model.return_value = self.model
+        previous = signal.getsignal(signal.SIGTERM)
+        self.addCleanup(signal.signal, signal.SIGTERM, previous)
+
+        def terminate_when_listening():
+            client = SidecarEmbeddings(self.socket_path)
+            deadline = time.monotonic() + 10
+            while not client.ping() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            client._close()
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        threading.Thread(target=terminate_when_listening, daemon=True).start()
+        with mock.patch.object(EmbeddingModelSingleton, 'get_instance', return_value=singleton):
+            call_command('run_embedding_server', socket=self.socket_path, stdout=io.StringIO())
+        self.assertEqual(self.model.batches, [['warm up']])
+
+
+class BatchingEmbeddingsTests(SimpleTestCase):
+    def test_concurrent_queries_share_a_batch_and_get_their_own_vectors(self):
+        backend = RecordingEmbeddings()
+        batching = BatchingEmbeddings(backend, max_batch_size=64, max_wait=0.2)
+        texts = ['x' * length for length in range(1, 9)]
+        results = {}
+        start = threading.Barrier(len(texts))
+
+        def query(text):
+            start.wait()
+            results[text] = batching.embed_query(text)
+
+        threads = [threading.Thread(target=query, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {text: [float(len(text)), 1.0] for text in texts})
+        self.assertLess(len(backend.batches), len(texts))
+        self.assertEqual(sorted(text for batch in backend.batches for text in batch), sorted(texts))
+
+    def test_batches_are_capped_and_documents_keep_their_order(self):
+        backend = RecordingEmbeddings()
+        batching = BatchingEmbeddings(backend, max_batch_size=2, max_wait=0.0)
+        texts = ['a', 'bb', 'ccc', 'dddd', 'eeeee']
+        self.assertEqual(batching.embed_documents(texts), [[float(len(text)), 1.0] for text in texts])
+        self.assertEqual(backend.batches, [['a', 'bb'], ['ccc', 'dddd'], ['eeeee']])
+        self.assertEqual(batching.stats()['texts'], 5)
+
+    def test_queries_overtake_the_rest_of_an_ingest(self):
+        backend = RecordingEmbeddings()
+        first_batch_started = threading.Event()
+        release = threading.Event()
+        embed_documents = backend.embed_documents
+
+        def slow_embed_documents(texts):
+            first_batch_started.set()
+            release.wait(5)
+            return embed_documents(texts)
+
+        backend.embed_documents = slow_embed_documents
+        batching = BatchingEmbeddings(backend, max_batch_size=4, max_wait=0.0)
+        ingest = threading.Thread(target=batching.embed_documents, args=([f'chunk {n}' for n in range(12)],))
+        ingest.start()
+        self.assertTrue(first_batch_started.wait(5))
+
+        query = threading.Thread(target=batching.embed_query, args=('python',))
+        query.start()
+        while batching._queue.qsize() < 3:
+            time.sleep(0.001)
+        release.set()
+        ingest.join()
+        query.join()
+
+        self.assertEqual([len(batch) for batch in backend.batches], [4, 1, 4, 4])
+        self.assertEqual(backend.batches[1], ['python'])
+
+    def test_a_forked_process_gets_its_own_queue(self):
+        backend = RecordingEmbeddings()
+        batching = BatchingEmbeddings(backend, max_wait=0.0)
+        batching.embed_query('before')
+        parent_queue = batching._queue
+        # What the child of a fork sees: the parent's pid and queue, but no dispatcher thread
+        batching._dispatcher_pid = -1
+        self.assertEqual(batching.embed_query('after'), [5.0, 1.0])
+        self.assertIsNot(batching._queue, parent_queue)
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        backend = mock.Mock()
+        backend.embed_documents.side_effect = RuntimeError('model crashed')
+        batching = BatchingEmbeddings(backend, max_wait=0.0)
+        with self.assertRaisesMessage(RuntimeError, 'model crashed'):
+            batching.embed_query('python')
+        # The dispatcher survives a failed batch
+        backend.embed_documents.side_effect = None
+        backend.embed_documents.return_value = [[0.5]]
+        self.assertEqual(batching.embed_query('python'), [0.5])
+
+
+class VectorUpsertTests(SimpleTestCase):
+    def test_chunk_ids_are_deterministic(self):
+        self.assertEqual(chunk_vector_id('abc', 0, 'Python'), chunk_vector_id('abc', 0, 'Python'))
+        self.assertNotEqual(chunk_vector_id('abc', 0, 'Python'), chunk_vector_id('abc', 0, 'Go'))
+        self.assertTrue(chunk_vector_id('abc', 3, 'Python').startswith('abc:3:'))
+
+    def test_only_failed_batches_are_retried(self):
+        calls = []
+        failures = {3: 1}
+        lock = threading.Lock()
+
+        def upsert_batch(batch):
+            with lock:
+                calls.append(batch[0])
+                if failures.get(batch[0]):
+                    failures[batch[0]] -= 1
+                    raise ConnectionError('dropped')
+
+        stats = upsert_in_batches(upsert_batch, list(range(10)), batch_size=3, concurrency=2, backoff=0)
+        self.assertEqual((stats['vectors'], stats['batches'], stats['retries']), (10, 4, 1))
+        self.assertEqual(sorted(calls), [0, 3, 3, 6, 9])
+
+    def test_batches_that_keep_failing_raise(self):
+        def upsert_batch(batch):
+            if 0 in batch:
+                raise ConnectionError('dropped')
+
+        with self.assertRaisesMessage(UpsertError, '1 of 2 upsert batches failed: dropped'):
+            upsert_in_batches(upsert_batch, list(range(4)), batch_size=2, max_retries=2, backoff=0)
+
+
+class UpsertChunksTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(
+            VECTOR_STORE_BACKEND=LOCAL,
+            VECTOR_STORE_LOCAL_DIR=root.name,
+            INDEX_NAME='tests',
+            VECTOR_UPSERT_BATCH_SIZE=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.index = LocalVectorIndex.get('tests', root.name)
+
+    def ingest(self, texts):
+        chunks = [Document(page_content=text, metadata={'section': 'experience'}) for text in texts]
+        utils.upsert_chunks(chunks, 'abc', 'resume_abc', RecordingEmbeddings())
+
+    def test_reingesting_overwrites_instead_of_duplicating(self):
+        texts = ['Python at Acme', 'Go at Beta', 'BSc Physics']
+        self.ingest(texts)
+        self.ingest(texts)
+        expected = sorted(chunk_vector_id('abc', number, text) for number, text in enumerate(texts))
+        self.assertEqual(sorted(self.index.list_ids('resume_abc')), expected)
+        self.assertEqual(sorted(self.index.list_ids(settings.SEARCH_NAMESPACE)), expected)
+
+    def test_vectors_of_removed_chunks_are_deleted(self):
+        self.ingest(['Python at Acme', 'Go at Beta', 'BSc Physics'])
+        self.ingest(['Python at Acme'])
+        self.assertEqual(self.index.list_ids('resume_abc'), [chunk_vector_id('abc', 0, 'Python at Acme')])
+
+
+@override_settings(
+    VECTOR_STORE_BACKEND=LOCAL,
+    INDEX_NAME='chat-stream-tests',
+    CHAT_LLM_BACKEND='fake',
+    CHAT_FAKE_RESPONSE='Five years of Python at Acme.',
+    CHAT_FAKE_TOKEN_DELAY=0.0,
+    LLM_CACHE_ENABLED=False,
+    SEMANTIC_CACHE_ENABLED=False,
+    RETRIEVAL_CACHE_ENABLED=False,
+    MEMORY_SUMMARY_ASYNC=False,
+)
+class ChatStreamTests(LocalBackendMixin, TestCase):
+    def setUp(self):
+        self.use_local_backend()
+
+        self.resume = Resume.objects.create(file='resumes/stream.pdf', original_filename='stream.pdf',
+                                            file_hash='stream', vector_namespace='resume_stream',
+                                            status=Resume.READY)
+        LocalVectorStore('chat-stream-tests', self.embeddings, namespace='resume_stream').add_texts(
+            ['Python developer at Acme since 2019']
+        )
+
+    def ask(self, question):
+        return self.client.post(reverse('chat_stream', args=[self.resume.pk]), {'content': question}, secure=True)
+
+    def events(self, response):
+        body = b''.join(response.streaming_content).decode()
+        events = []
+        for message in body.strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in message.split('\n'))
+            events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+        return events
+
+    def test_answer_is_streamed_as_tokens_then_stored(self):
+        response = self.ask('Python experience?')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        events = self.events(response)
+        tokens = [data['token'] for event, data in events if event == 'message']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(''.join(tokens), 'Five years of Python at Acme.')
+
+        event, data = events[-1]
+        self.assertEqual((event, data['status']), ('done', 'success'))
+        answer = ChatMessage.objects.get(pk=data['message_id'])
+        self.assertEqual((answer.message_type, answer.content), (ChatMessage.AI, 'Five years of Python at Acme.'))
+        # The question was embedded to retrieve context from the resume's namespace
+        self.assertIn(['Python experience?'], self.embeddings.batches)
+
+    def test_resumes_still_processing_are_rejected(self):
+        self.resume.status = Resume.PENDING
+        self.resume.save()
+        response = self.ask('Python experience?')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ChatMessage.objects.exists())
+
+
+@override_settings(
+    VECTOR_STORE_BACKEND=LOCAL,
+    INDEX_NAME='async-chat-tests',
+    CHAT_LLM_BACKEND='fake',
+    CHAT_FAKE_RESPONSE='Five years of Python at Acme.',
+    CHAT_FAKE_TOKEN_DELAY=0.0,
+    CACHES={'async-chat-tests': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async'}},
+    LLM_CACHE_ALIAS='async-chat-tests',
+    LLM_CACHE_ENABLED=True,
+    SEMANTIC_CACHE_ENABLED=True,
+    RETRIEVAL_CACHE_ENABLED=False,
+    MEMORY_SUMMARY_ASYNC=False,
+)
+class AsyncChatTests(LocalBackendMixin, TestCase):
+    def setUp(self):
+        self.use_local_backend()
+        response_cache._cache().clear()
+        self.resume = Resume.objects.create(file='resumes/async.pdf', original_filename='async.pdf',
+                                            file_hash='async', vector_namespace='resume_async',
+                                            status=Resume.READY)
+        self.vector_store = LocalVectorStore('async-chat-tests', self.embeddings, namespace='resume_async')
+        self.vector_store.add_texts(['Python developer at Acme since 2019'])
+
+    async def test_async_view_answers_and_stores_the_reply(self):
+        request = AsyncRequestFactory().post(f'/resume/{self.resume.pk}/chat/', {'content': 'Python experience?'})
+        response = await views.achat_message(request, self.resume.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['ai_message'], 'Five years of Python at Acme.')
+        messages = [message async for message in ChatMessage.objects.order_by('pk').values_list('message_type', 'content')]
+        self.assertEqual(messages, [
+            (ChatMessage.HUMAN, 'Python experience?'),
+            (ChatMessage.AI, 'Five years of Python at Acme.'),
+        ])
+
+    async def test_async_view_rejects_resumes_still_processing(self):
+        await Resume.objects.filter(pk=self.resume.pk).aupdate(status=Resume.PENDING)
+        request = AsyncRequestFactory().post(f'/resume/{self.resume.pk}/chat/', {'content': 'Python experience?'})
+        response = await views.achat_message(request, self.resume.pk)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(await ChatMessage.objects.aexists())
+
+    async def test_repeat_questions_are_answered_from_the_cache(self):
+        with mock.patch.object(utils, 'get_chat_model', wraps=utils.get_chat_model) as get_chat_model:
+            first = await utils.aquery_resume('Python experience?', self.vector_store, [], resume_id='async')
+            second = await utils.aquery_resume('python experience', self.vector_store, [], resume_id='async')
+        self.assertEqual((first, second), ('Five years of Python at Acme.',) * 2)
+        self.assertEqual(get_chat_model.call_count, 1)
+        self.assertIn(['Python experience?'], self.embeddings.batches)
+
+
+@override_settings(ASYNC_CHAT=True)
+class AsgiThreadingTests(SimpleTestCase):
+    def test_wrapped_views_run_off_the_calling_thread(self):
+        threads = []
+
+        def view(request, pk):
+            threads.append(threading.current_thread())
+            return pk
+
+        wrapped = views._own_thread_under_asgi(view)
+        self.assertTrue(asyncio.iscoroutinefunction(wrapped))
+        self.assertEqual(async_to_sync(wrapped)(None, 7), 7)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+        with override_settings(ASYNC_CHAT=False):
+            self.assertIs(views._own_thread_under_asgi(view), view)
+
+    def test_streams_run_on_one_thread_of_their_own(self):
+        threads = []
+        closed = []
+
+        def tokens():
+            try:
+                for token in ('a', 'b', 'c'):
+                    threads.append(threading.current_thread())
+                    yield token
+            finally:
+                closed.append(True)
+
+        async def consume():
+            return [token async for token in views._iterate_in_thread(tokens())]
+
+        self.assertEqual(asyncio.run(consume()), ['a', 'b', 'c'])
+        self.assertEqual(len(set(threads)), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertEqual(closed, [True])
+
+
+class ContextEchoChatModel:
+    """Answers with the resume content in its prompt, failing for questions about ``fail_on``"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def invoke(self, prompt):
+        context = prompt.split('Resume Content:')[1].split('Chat History:')[0].strip()
+        if self.fail_on and self.fail_on in context:
+            raise ConnectionError('model unavailable')
+        return mock.Mock(content=context)
+
+
+@override_settings(
+    CHAT_LLM_BACKEND='fake',
+    CHAT_FAKE_RESPONSE='Yes.',
+    CHAT_FAKE_TOKEN_DELAY=0.0,
+    CACHES={'screening-tests': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'screening'}},
+    LLM_CACHE_ALIAS='screening-tests',
+    LLM_CACHE_ENABLED=True,
+    SCREENING_CONCURRENCY=3,
+)
+class ScreeningTests(TestCase):
+    def setUp(self):
+        response_cache._cache().clear()
+        self.resume = Resume.objects.create(file='resumes/screen.pdf', original_filename='screen.pdf',
+                                            file_hash='screen', vector_namespace='resume_screen',
+                                            status=Resume.READY)
+        patch = mock.patch.object(utils, 'get_retriever', return_value=(mock.Mock(), mock.Mock()))
+        patch.start()
+        self.addCleanup(patch.stop)
+        patch = mock.patch.object(utils, 'retrieve_documents_batch', side_effect=lambda vector_store, queries, *args, **kwargs: [
+            [Document(page_content=f'Context for {query}')] for query in queries
+        ])
+        self.retrieve = patch.start()
+        self.addCleanup(patch.stop)
+
+    def screen(self, questions, **options):
+        return self.client.post(reverse('screen_resume', args=[self.resume.pk]),
+                                json.dumps({'questions': questions, **options}),
+                                content_type='application/json', secure=True)
+
+    def test_every_question_is_answered_in_order(self):
+        response = self.screen([' Which languages? ', '', 'Years in management?', 'Any degree?'])
+        self.assertEqual(response.status_code, 200)
+        report = response.json()['report']
+        self.assertEqual(report['status'], ScreeningReport.DONE)
+        self.assertEqual(
+            [(answer['question'], answer['answer'], answer['error']) for answer in report['answers']],
+            [('Which languages?', 'Yes.', ''), ('Years in management?', 'Yes.', ''), ('Any degree?', 'Yes.', '')]
+        )
+        # All questions are retrieved for in one batch
+        self.retrieve.assert_called_once()
+        self.assertEqual(self.retrieve.call_args.args[1], ['Which languages?', 'Years in management?', 'Any degree?'])
+        self.assertEqual(list(ScreeningAnswer.objects.values_list('position', flat=True)), [0, 1, 2])
+
+    def test_each_answer_comes_from_its_own_context(self):
+        questions = [f'Requirement {number}?' for number in range(10)]
+        with mock.patch.object(utils, 'get_chat_model', return_value=ContextEchoChatModel()):
+            report = self.screen(questions).json()['report']
+        self.assertEqual([answer['answer'] for answer in report['answers']],
+                         [f'Context for {question}' for question in questions])
+
+    def test_failed_questions_are_reported_on_their_own(self):
+        with mock.patch.object(utils, 'get_chat_model', return_value=ContextEchoChatModel(fail_on='Any degree?')):
+            response = self.screen(['Which languages?', 'Any degree?'])
+        self.assertEqual(response.status_code, 200)
+        answers = response.json()['report']['answers']
+        self.assertEqual([answer['error'] for answer in answers], ['', 'model unavailable'])
+        self.assertEqual(answers[0]['answer'], 'Context for Which languages?')
+
+        with mock.patch.object(utils, 'get_chat_model', return_value=ContextEchoChatModel(fail_on='Context')):
+            response = self.screen(['Years in management?', 'Any degree?'])
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.json()['report']['status'], ScreeningReport.FAILED)
+
+    def test_repeat_questions_are_served_from_the_response_cache(self):
+        self.screen(['Which languages?'])
+        report = self.screen(['Which languages?', 'Any degree?']).json()['report']
+        self.assertEqual([answer['cached'] for answer in report['answers']], [True, False])
+
+    def test_empty_or_malformed_question_lists_are_rejected(self):
+        for questions in ([], ['  ', ''], 'Which languages?', [1, 2]):
+            with self.subTest(questions=questions):
+                self.assertEqual(self.screen(questions).status_code, 400)
+        self.assertFalse(ScreeningReport.objects.exists())
+        self.retrieve.assert_not_called()
+
+    def test_resumes_still_processing_are_rejected(self):
+        Resume.objects.filter(pk=self.resume.pk).update(status=Resume.PENDING)
+        self.assertEqual(self.screen(['Which languages?']).status_code, 409)
+        self.assertFalse(ScreeningReport.objects.exists())
+
+    def test_stored_reports_can_be_fetched(self):
+        report_id = self.screen(['Which languages?']).json()['report']['id']
+        response = self.client.get(reverse('screening_report', args=[self.resume.pk, report_id]), secure=True)
+        self.assertEqual(response.json()['report']['answers'][0]['question'], 'Which languages?')
+        response = self.client.get(reverse('screening_report', args=[self.resume.pk + 1, report_id]), secure=True)
+        self.assertEqual(response.status_code, 404)
+
+
+class UploadHashingTests(TestCase):
+    content = b'%PDF-1.4 resume body ' * 5000
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def upload(self, chunk_size=4096):
+        handler = HashingFileUploadHandler(RequestFactory().post('/upload/'))
+        handler.new_file('file', 'resume.pdf', 'application/pdf', len(self.content))
+        for start in range(0, len(self.content), chunk_size):
+            handler.receive_data_chunk(self.content[start:start + chunk_size], start)
+        return handler.file_complete(len(self.content))
+
+    def test_streamed_hash_matches_the_hash_resume_save_computes(self):
+        uploaded = self.upload()
+        self.assertIsNone(uploaded.duplicate_of)
+        self.assertEqual(uploaded.read(), self.content)
+
+        resume = Resume(file=SimpleUploadedFile('resume.pdf', self.content), original_filename='resume.pdf')
+        resume.save()
+        self.assertEqual(uploaded.file_hash, resume.file_hash)
+        uploaded.close()
+
+    def test_duplicates_are_discarded_as_soon_as_they_complete(self):
+        resume = Resume(file=SimpleUploadedFile('resume.pdf', self.content), original_filename='resume.pdf')
+        resume.save()
+
+        uploaded = self.upload(chunk_size=1000)
+        self.assertEqual(uploaded.duplicate_of, resume.pk)
+        self.assertEqual(uploaded.size, 0)
+
+
+@override_settings(VECTOR_STORE_BACKEND=LOCAL, INDEX_NAME='sweep-tests', VECTOR_GC_CONCURRENCY=1)
+class VectorSweepTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        local_dir = override_settings(VECTOR_STORE_LOCAL_DIR=root.name)
+        local_dir.enable()
+        self.addCleanup(local_dir.disable)
+        self.index = LocalVectorIndex.get('sweep-tests', root.name)
+
+    def add_resume_vectors(self, file_hash):
+        ids = [f'{file_hash}:0:abc']
+        self.index.upsert(f'resume_{file_hash}', ids, np.random.rand(1, 4), ['chunk'], [{}])
+        self.index.upsert(settings.SEARCH_NAMESPACE, ids, np.random.rand(1, 4), ['chunk'], [{'resume_id': file_hash}])
+
+    def test_tombstoned_namespaces_are_swept(self):
+        self.add_resume_vectors('gone')
+        self.add_resume_vectors('kept')
+        tombstones = [record_tombstone('resume_gone'), record_tombstone('resume_gone')]
+
+        self.assertEqual(sweep_tombstones(), 1)
+        self.assertEqual(self.index.list_namespaces(), sorted([settings.SEARCH_NAMESPACE, 'resume_kept']))
+        self.assertEqual(self.index.list_ids(settings.SEARCH_NAMESPACE), ['kept:0:abc'])
+        for tombstone in tombstones:
+            tombstone.refresh_from_db()
+            self.assertIsNotNone(tombstone.swept_at)
+            self.assertEqual(tombstone.error, '')
+
+    def test_failed_sweeps_are_recorded_and_retried(self):
+        self.add_resume_vectors('gone')
+        tombstone = record_tombstone('resume_gone')
+        with mock.patch.object(utils, 'clear_pinecone_data', side_effect=ConnectionError('index unavailable')):
+            self.assertEqual(sweep_tombstones(), 0)
+        tombstone.refresh_from_db()
+        self.assertEqual((tombstone.swept_at, tombstone.attempts, tombstone.error), (None, 1, 'index unavailable'))
+        self.assertIn('resume_gone', self.index.list_namespaces())
+
+        self.assertEqual(sweep_tombstones(), 1)
+        tombstone.refresh_from_db()
+        self.assertIsNotNone(tombstone.swept_at)
+
+    def test_namespaces_in_use_again_are_kept(self):
+        self.add_resume_vectors('back')
+        tombstone = record_tombstone('resume_back')
+        Resume.objects.create(file='resumes/back.pdf', original_filename='back.pdf', file_hash='back')
+
+        self.assertEqual(sweep_tombstones(), 0)
+        tombstone.refresh_from_db()
+        self.assertEqual(tombstone.error, 'namespace in use')
+        self.assertIn('resume_back', self.index.list_namespaces())
+        self.assertEqual(VectorTombstone.objects.filter(swept_at__isnull=True).count(), 0)
+
+
+class DeleteResumeTests(TestCase):
+    def setUp(self):
+        self.resume = Resume.objects.create(
+            file='resumes/gone.pdf', original_filename='gone.pdf', file_hash='gone', vector_namespace='resume_gone'
+        )
+        self.url = reverse('delete_resume', args=[self.resume.pk])
+
+    @override_settings(VECTOR_STORE_BACKEND=LOCAL, INDEX_NAME='delete-tests')
+    def test_delete_queues_the_namespace_for_the_sweeper(self):
+        response = self.client.post(self.url, secure=True)
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertFalse(Resume.objects.filter(pk=self.resume.pk).exists())
+        self.assertEqual(list(VectorTombstone.objects.values_list('namespace', 'index_name')),
+                         [('resume_gone', 'delete-tests')])
+
+    @override_settings(VECTOR_STORE_BACKEND='pinecone', INDEX_NAME='')
+    def test_vector_cleanup_failures_do_not_block_the_delete(self):
+        with mock.patch.dict(os.environ, {'INDEX_NAME': ''}), \
+                mock.patch('resume_analyzer_project.resume_analyzer.views.invalidate_resume_responses',
+                           side_effect=ConnectionError('cache unavailable')):
+            response = self.client.post(self.url, secure=True)
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertFalse(Resume.objects.filter(pk=self.resume.pk).exists())
+        self.assertFalse(VectorTombstone.objects.exists())
+
+    def test_search_vectors_deleted_by_filter_count_as_zero(self):
+        index = mock.Mock()
+        with mock.patch.object(utils, '_list_vector_ids', side_effect=ValueError('listing not supported')), \
+                mock.patch.object(utils, 'get_pinecone_index', return_value=index):
+            self.assertEqual(utils.delete_search_vectors('gone', 'pod-index'), 0)
+        index.delete.assert_called_once_with(
+            filter={'resume_id': {'$eq': 'gone'}}, namespace=settings.SEARCH_NAMESPACE
+        )
+
+
+class IngestionQueueMixin:
+    text = "Jane Doe\nExperience\nPython engineer at Acme, 2019 - 2024\n"
+
+    def use_media_root(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def create_resume(self, name='resume'):
+        resume = Resume(file=SimpleUploadedFile(f'{name}.pdf', f'%PDF {name}'.encode()),
+                        original_filename=f'{name}.pdf')
+        resume.save()
+        return resume
+
+    def patch_pipeline(self, load_resume=None):
+        """Stub text extraction and embedding; returns the load_resume mock"""
+        load = mock.patch.object(utils, 'load_resume', side_effect=load_resume or (lambda path: self.text))
+        embed = mock.patch.object(utils, 'get_embeddings')
+        self.addCleanup(load.stop)
+        self.addCleanup(embed.stop)
+        embed.start()
+        return load.start()
+
+
+@override_settings(INDEX_NAME='ingestion-tests', VECTOR_STORE_BACKEND=LOCAL, SEARCH_INDEX_ENABLED=False)
+class ResumeTextTests(IngestionQueueMixin, LocalBackendMixin, TestCase):
+    text = "Jane Doe\nExperience\nSenior engineer at Café Zürich, 2019 - 2024\nSkills\nPython, Go, SQL\n" * 3
+
+    def test_compressed_text_and_chunks_survive_a_reload(self):
+        stored = ResumeText(file_hash='abc')
+        stored.text = self.text
+        stored.set_chunks([{'text': 'Python, Go, SQL', 'start': 0, 'metadata': {'section': 'skills'}}], 'section:112')
+        stored.save()
+
+        reloaded = ResumeText.objects.get(file_hash='abc')
+        self.assertEqual(reloaded.text, self.text)
+        self.assertEqual(reloaded.text_length, len(self.text))
+        self.assertLess(len(bytes(reloaded.compressed_text)), len(self.text.encode('utf-8')))
+        self.assertEqual(reloaded.get_chunks('section:112')[0]['metadata'], {'section': 'skills'})
+        self.assertIsNone(reloaded.get_chunks('recursive'))
+
+    def test_ingestion_stores_the_text_and_chunks(self):
+        self.use_local_backend()
+        self.use_media_root()
+        resume = self.create_resume('text')
+        job = enqueue_ingestion(resume)
+        with mock.patch.object(utils, 'load_resume', return_value=self.text) as load_resume:
+            run_ingestion_job(job)
+        self.assertEqual(load_resume.call_count, 1)
+        self.assertEqual(job.status, IngestionJob.DONE)
+
+        stored = ResumeText.objects.get(file_hash=resume.file_hash)
+        self.assertEqual(stored.text, self.text)
+        chunks = stored.get_chunks(utils.get_chunker_name())
+        self.assertTrue(chunks)
+        self.assertEqual(sorted(self.embeddings.batches[0]), sorted(chunk['text'] for chunk in chunks))
+
+        # A re-run reuses the stored text instead of extracting the PDF again
+        with mock.patch.object(utils, 'load_resume') as load_resume:
+            run_ingestion_job(enqueue_ingestion(resume))
+        load_resume.assert_not_called()
+
+
+@override_settings(INGESTION_MAX_ATTEMPTS=2)
+class IngestionJobTests(IngestionQueueMixin, TestCase):
+    def setUp(self):
+        self.use_media_root()
+
+    def test_jobs_are_claimed_once_in_order(self):
+        first = enqueue_ingestion(self.create_resume('first'))
+        second = enqueue_ingestion(self.create_resume('second'))
+        self.assertEqual(claim_next_job().pk, first.pk)
+        claimed = claim_next_job()
+        self.assertEqual((claimed.pk, claimed.status), (second.pk, IngestionJob.RUNNING))
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(INGESTION_JOB_TIMEOUT=0)
+    def test_jobs_of_dead_workers_are_requeued(self):
+        job = enqueue_ingestion(self.create_resume())
+        claim_next_job()
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_next_job().pk, job.pk)
+
+    def test_transient_failures_are_retried_until_max_attempts(self):
+        self.patch_pipeline(load_resume=ConnectionError('storage unavailable'))
+        resume = self.create_resume()
+        job = enqueue_ingestion(resume)
+
+        self.assertTrue(process_next_job())
+        job.refresh_from_db()
+        resume.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (IngestionJob.QUEUED, 1, 'storage unavailable'))
+        self.assertEqual(resume.status, Resume.PENDING)
+
+        self.assertTrue(process_next_job())
+        job.refresh_from_db()
+        resume.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (IngestionJob.FAILED, 2))
+        self.assertEqual(resume.status, Resume.FAILED)
+        self.assertFalse(process_next_job())
+
+    def test_permanent_failures_are_not_retried(self):
+        self.patch_pipeline(load_resume=PermanentIngestionError('no text'))
+        job = enqueue_ingestion(self.create_resume())
+        process_next_job()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (IngestionJob.FAILED, 1))
+
+    @override_settings(INGESTION_ASYNC=True)
+    def test_workers_read_the_upload_from_the_job_without_the_media_file(self):
+        load_resume = self.patch_pipeline()
+        pdfs = []
+        load_resume.side_effect = lambda path: pdfs.append(open(path, 'rb').read()) or self.text
+        resume = self.create_resume()
+        job = enqueue_ingestion(resume)
+        # The worker runs on another machine, without the web process's MEDIA_ROOT
+        resume.file.storage.delete(resume.file.name)
+
+        process_next_job()
+        job.refresh_from_db()
+        self.assertEqual(pdfs, [b'%PDF resume'])
+        self.assertEqual(job.status, IngestionJob.DONE)
+        self.assertIsNone(job.upload)
+
+    def test_status_endpoint_reports_job_progress(self):
+        self.patch_pipeline()
+        resume = self.create_resume()
+        job = enqueue_ingestion(resume)
+        url = reverse('resume_status', args=[resume.pk])
+
+        status = self.client.get(url, secure=True).json()
+        self.assertEqual((status['status'], status['ready'], status['job_id']), (Resume.PENDING, False, job.pk))
+        self.assertEqual((status['job_status'], status['progress']), (IngestionJob.QUEUED, 0))
+
+        process_next_job()
+        status = self.client.get(url, secure=True).json()
+        self.assertEqual((status['status'], status['ready']), (Resume.READY, True))
+        self.assertEqual((status['job_status'], status['stage'], status['progress']), (IngestionJob.DONE, 'done', 100))
+        self.assertEqual(self.client.get(reverse('resume_status', args=[resume.pk + 1]), secure=True).status_code, 404)
+
+
+class ProcessIngestionJobsCommandTests(IngestionQueueMixin, TransactionTestCase):
+    def test_workers_drain_the_queue(self):
+        self.use_media_root()
+        self.patch_pipeline()
+        resumes = [self.create_resume(f'resume{number}') for number in range(4)]
+        for resume in resumes:
+            enqueue_ingestion(resume)
+
+        # One worker thread: the sqlite test database locks whole tables between connections
+        with open(os.devnull, 'w') as devnull:
+            call_command('process_ingestion_jobs', workers=1, once=True, stdout=devnull)
+        self.assertEqual(set(IngestionJob.objects.values_list('status', flat=True)), {IngestionJob.DONE})
+        self.assertEqual(Resume.objects.filter(status=Resume.READY).count(), 4)
+        self.assertEqual(utils.get_embeddings.call_count, 4)
+
+
+@override_settings(EMBEDDING_CACHE_ENABLED=True, EMBEDDING_CACHE_MAX_ENTRIES=100, EMBEDDING_CACHE_EVICT_INTERVAL=100)
+class CachedEmbeddingsTests(TestCase):
+    def setUp(self):
+        embeddings._unchecked_inserts = 0
+        self.model = RecordingEmbeddings()
+        self.cached = CachedEmbeddings(self.model, 'recording')
+
+    def test_repeated_chunks_are_served_from_the_cache(self):
+        first = self.cached.embed_documents(['Python at Acme', 'Go at Beta'])
+        second = self.cached.embed_documents(['Python   at Acme', 'SQL at Gamma', 'Go at Beta'])
+        self.assertEqual(self.model.batches, [['Python at Acme', 'Go at Beta'], ['SQL at Gamma']])
+        self.assertEqual([second[0], second[2]], first)
+        self.assertEqual(EmbeddingCacheEntry.objects.count(), 3)
+
+    def test_hits_refresh_last_used_at(self):
+        self.cached.embed_documents(['Python at Acme'])
+        long_ago = timezone.now() - timedelta(days=30)
+        EmbeddingCacheEntry.objects.update(last_used_at=long_ago)
+        self.cached.embed_documents(['Python at Acme'])
+        self.assertGreater(EmbeddingCacheEntry.objects.get().last_used_at, long_ago)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cached.embed_documents(['old', 'recent', 'newest'])
+        now = timezone.now()
+        for age, text in enumerate(['newest', 'recent', 'old']):
+            EmbeddingCacheEntry.objects.filter(text_hash=embeddings.text_hash(text)).update(
+                last_used_at=now - timedelta(minutes=age)
+            )
+        self.assertEqual(evict_embedding_cache(max_entries=2), 1)
+        self.assertFalse(EmbeddingCacheEntry.objects.filter(text_hash=embeddings.text_hash('old')).exists())
+
+    @override_settings(EMBEDDING_CACHE_MAX_ENTRIES=1, EMBEDDING_CACHE_EVICT_INTERVAL=3)
+    def test_the_table_size_is_only_checked_every_interval(self):
+        with mock.patch.object(embeddings, 'evict_embedding_cache', wraps=evict_embedding_cache) as evict:
+            self.cached.embed_documents(['a', 'b'])
+            self.assertEqual((evict.call_count, EmbeddingCacheEntry.objects.count()), (0, 2))
+            self.cached.embed_documents(['c'])
+            self.assertEqual((evict.call_count, EmbeddingCacheEntry.objects.count()), (1, 1))
+
+
+@override_settings(VECTOR_STORE_BACKEND=LOCAL, INDEX_NAME='retriever-cache-tests')
+class RetrieverCacheTests(LocalBackendMixin, SimpleTestCase):
+    def setUp(self):
+        self.use_local_backend()
+        patch = mock.patch.object(utils, 'get_vector_store', wraps=utils.get_vector_store)
+        self.create = patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_least_recently_used_entries_are_evicted_first(self):
+        lru = LRUCache(max_size=2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        lru.get('a')
+        lru.put('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        self.assertEqual(lru.evictions, 1)
+
+    def test_retrievers_are_reused_per_namespace(self):
+        first = utils.get_retriever('resume_a')
+        self.assertIs(utils.get_retriever('resume_a'), first)
+        self.assertIsNot(utils.get_retriever('resume_b'), first)
+        self.assertEqual([call.args[0] for call in self.create.call_args_list], ['resume_a', 'resume_b'])
+
+    def test_evicted_retrievers_are_rebuilt(self):
+        with mock.patch.object(utils, '_vector_store_cache', LRUCache(max_size=2)):
+            for namespace in ('resume_a', 'resume_b', 'resume_a', 'resume_c', 'resume_a', 'resume_b'):
+                utils.get_retriever(namespace)
+        self.assertEqual(
+            [call.args[0] for call in self.create.call_args_list],
+            ['resume_a', 'resume_b', 'resume_c', 'resume_b']
+        )
+
+    def test_invalidation_only_drops_that_namespace(self):
+        first = utils.get_retriever('resume_a')
+        other = utils.get_retriever('resume_b')
+        utils.invalidate_vector_store_cache('resume_a')
+        self.assertIsNot(utils.get_retriever('resume_a'), first)
+        self.assertIs(utils.get_retriever('resume_b'), other)
+        utils.invalidate_vector_store_cache()
+        self.assertIsNot(utils.get_retriever('resume_b'), other)
+
+
+@override_settings(VECTOR_STORE_BACKEND=LOCAL, INDEX_NAME='retrieval-cache-tests', RETRIEVAL_CACHE_ENABLED=True)
+class RetrievalCacheTests(LocalBackendMixin, TestCase):
+    def setUp(self):
+        self.use_local_backend()
+        self.retriever = mock.Mock()
+        self.retriever.get_relevant_documents.side_effect = lambda query: [Document(page_content=query)]
+
+    def retrieve(self, query, namespace='resume_abc', k=5):
+        return utils.retrieve_documents(self.retriever, query, namespace, k=k)
+
+    def test_repeat_questions_are_served_from_the_cache(self):
+        first = self.retrieve('What Python experience?')
+        self.assertIs(self.retrieve('  what python   EXPERIENCE '), first)
+        self.assertEqual(self.retriever.get_relevant_documents.call_count, 1)
+
+    def test_namespaces_and_k_are_cached_separately(self):
+        self.retrieve('Python')
+        self.retrieve('Python', namespace='resume_def')
+        self.retrieve('Python', k=10)
+        self.assertEqual(self.retriever.get_relevant_documents.call_count, 3)
+
+    def test_reingesting_a_resume_invalidates_its_retrievals(self):
+        self.retrieve('Python')
+        self.retrieve('Python', namespace=settings.SEARCH_NAMESPACE)
+        utils.get_embeddings("Experience\nPython developer at Acme", 'abc')
+        self.retrieve('Python')
+        self.retrieve('Python', namespace=settings.SEARCH_NAMESPACE)
+        self.assertEqual(self.retriever.get_relevant_documents.call_count, 4)
+
+    def test_deleting_search_vectors_invalidates_search_retrievals(self):
+        utils.get_embeddings("Experience\nPython developer at Acme", 'abc')
+        self.retrieve('Python', namespace=settings.SEARCH_NAMESPACE)
+        self.retrieve('Python', namespace='resume_other')
+        self.assertEqual(utils.delete_search_vectors('abc'), 1)
+        self.retrieve('Python', namespace=settings.SEARCH_NAMESPACE)
+        self.retrieve('Python', namespace='resume_other')
+        self.assertEqual(self.retriever.get_relevant_documents.call_count, 3)
+
+    @override_settings(RETRIEVAL_CACHE_ENABLED=False)
+    def test_disabled_cache_always_retrieves(self):
+        self.retrieve('Python')
+        self.retrieve('Python')
+        self.assertEqual(self.retriever.get_relevant_documents.call_count, 2)
+
+
+@override_settings(QUERY_EMBEDDING_CACHE_ENABLED=True, QUERY_EMBEDDING_CACHE_PERSIST=False)
+class QueryEmbeddingCacheTests(TestCase):
+    def setUp(self):
+        embeddings._query_cache.clear()
+        self.addCleanup(embeddings._query_cache.clear)
+        self.model = RecordingEmbeddings()
+
+    def test_cache_hits_skip_the_model_across_resumes(self):
+        vector = CachedEmbeddings(self.model, 'recording').embed_query('Python  experience?')
+        self.assertEqual(CachedEmbeddings(self.model, 'recording').embed_query(' Python experience? '), vector)
+        self.assertEqual(self.model.batches, [['Python  experience?']])
+
+    def test_models_do_not_share_query_vectors(self):
+        CachedEmbeddings(self.model, 'recording').embed_query('Python')
+        CachedEmbeddings(self.model, 'other').embed_query('Python')
+        self.assertEqual(len(self.model.batches), 2)
+
+    def test_batches_only_embed_unseen_queries(self):
+        cached = CachedEmbeddings(self.model, 'recording')
+        cached.embed_query('Python')
+        vectors = cached.embed_queries(['Python', 'Go', 'Go'])
+        self.assertEqual(vectors, [[6.0, 1.0], [2.0, 1.0], [2.0, 1.0]])
+        self.assertEqual(self.model.batches, [['Python'], ['Go']])
+
+    @override_settings(QUERY_EMBEDDING_CACHE_PERSIST=True)
+    def test_persisted_vectors_survive_a_cleared_lru(self):
+        CachedEmbeddings(self.model, 'recording').embed_query('Python')
+        embeddings._query_cache.clear()
+        self.assertEqual(CachedEmbeddings(self.model, 'recording').embed_query('Python'), [6.0, 1.0])
+        self.assertEqual(self.model.batches, [['Python']])
+        self.assertTrue(EmbeddingCacheEntry.objects.filter(model_name='recording:query').exists())
+
+    @override_settings(VECTOR_STORE_BACKEND=LOCAL, INDEX_NAME='query-cache-tests', RETRIEVAL_CACHE_ENABLED=False)
+    def test_batch_retrieval_reuses_cached_query_vectors(self):
+        cached = CachedEmbeddings(self.model, 'recording')
+        cached.embed_query('Python')
+        singleton = mock.Mock(cache_name='recording')
+        singleton.get_embedding_model.return_value = self.model
+        vector_store = mock.Mock()
+        vector_store.similarity_search_by_vector_with_score.return_value = []
+        with mock.patch.object(EmbeddingModelSingleton, 'get_instance', return_value=singleton):
+            utils.retrieve_documents_batch(vector_store, ['Python', 'Go'], 'resume_abc')
+        self.assertEqual(self.model.batches, [['Python'], ['Go']])
+        self.assertEqual(vector_store.similarity_search_by_vector_with_score.call_count, 2)
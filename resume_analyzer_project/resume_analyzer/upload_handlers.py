@@ -0,0 +1,51 @@
+import hashlib
+import logging
+
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+logger = logging.getLogger(__name__)
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """
+    Upload handler that streams each uploaded file to a single temporary file
+    on disk while computing its MD5 hash chunk by chunk.
+
+    When the file is complete its hash is checked against ``Resume.file_hash``.
+    A duplicate is discarded straight away and replaced by an empty file that
+    carries ``duplicate_of`` (the existing resume's pk), so the view can
+    redirect without validating, extracting or saving anything.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.md5()
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        from .models import Resume
+
+        file_hash = self.hasher.hexdigest()
+        duplicate_of = Resume.objects.filter(file_hash=file_hash).values_list('pk', flat=True).first()
+
+        if duplicate_of is not None:
+            logger.info(f"Upload {self.file_name} duplicates resume {duplicate_of}, discarding data")
+            self.file.close()
+            uploaded = SimpleUploadedFile(self.file_name, b'', self.content_type)
+        else:
+            self.file.seek(0)
+            self.file.size = file_size
+            uploaded = self.file
+
+        uploaded.file_hash = file_hash
+        uploaded.duplicate_of = duplicate_of
+        return uploaded
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
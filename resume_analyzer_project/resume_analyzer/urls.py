@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -5,6 +6,12 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('upload/', views.upload_resume, name='upload_resume'),
     path('resume/<int:pk>/', views.resume_detail, name='resume_detail'),
-    path('resume/<int:pk>/chat/', views.chat_message, name='chat_message'),
+    path('resume/<int:pk>/chat/', views.achat_message if settings.ASYNC_CHAT else views.chat_message, name='chat_message'),
+    path('resume/<int:pk>/chat/stream/', views.chat_stream, name='chat_stream'),
+    path('resume/<int:pk>/screen/', views.screen_resume, name='screen_resume'),
+    path('resume/<int:pk>/screen/<int:report_id>/', views.screening_report, name='screening_report'),
+    path('resume/<int:pk>/status/', views.resume_status, name='resume_status'),
     path('resume/<int:pk>/delete/', views.delete_resume, name='delete_resume'),
+    path('search/', views.search_resumes, name='search_resumes'),
+    path('stats/caches/', views.cache_stats, name='cache_stats'),
 ]
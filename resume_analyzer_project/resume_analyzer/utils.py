@@ -1,28 +1,30 @@
 import os
 import tempfile
-from PyPDF2 import PdfReader
-
-# Try to import pdf2image, but don't fail if it's not available
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
-    print("Warning: pdf2image not available. Some features may be limited.")
 import hashlib
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from langchain_huggingface import HuggingFaceEmbeddings
+from django.core.cache import cache
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone
-from langchain_groq import ChatGroq
 from langchain.chains import RetrievalQA
 from langchain.prompts import ChatPromptTemplate
+from langchain.schema import Document
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
-from .models import EmbeddingModelSingleton, PineconeSingleton
+from .models import EmbeddingModelSingleton, PineconeSingleton, ResumeText
+from .caching import LRUCache
+from .chunking import PAGE_BREAK, chunk_resume
+from .embeddings import CachedEmbeddings, query_cache_stats
+from .llm_clients import ChatClientRegistry
+from . import semantic_cache
+from .response_cache import cache_response, get_cached_response, response_cache_key, response_cache_stats
+from .vector_stores import LOCAL, LocalVectorIndex, LocalVectorStore
+from .vector_upserts import chunk_vector_id, upsert_in_batches
+from .pdf_extraction import iter_page_texts, ocr_pages, OCR_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
@@ -42,25 +44,36 @@ def timing_decorator(func):
 def load_resume(file_path):
     """Load and process a resume file"""
     try:
-        with open(file_path, "rb") as file:
-            reader = PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-
-            # If we got very little text, try using pdf2image if available
-            if len(text.strip()) < 100 and PDF2IMAGE_AVAILABLE:
-                try:
-                    logger.info("Attempting to extract text using pdf2image as fallback")
-                    # This part will only run if pdf2image is available
-                    images = convert_from_path(file_path)
-                    # Process images if needed
-                except Exception as img_error:
-                    logger.error(f"Error using pdf2image: {str(img_error)}")
-
-            return text
+        page_texts = dict(iter_page_texts(
+            file_path,
+            parallel_threshold=settings.PDF_PARALLEL_PAGE_THRESHOLD,
+            max_workers=settings.PDF_EXTRACTION_WORKERS,
+            pages_per_task=settings.PDF_PAGES_PER_TASK
+        ))
+
+        # Only pages without a text layer are rasterised and OCR'd
+        empty_pages = [number for number, page_text in sorted(page_texts.items()) if not page_text.strip()]
+        if empty_pages and settings.PDF_OCR_ENABLED and OCR_AVAILABLE:
+            try:
+                logger.info(f"Attempting OCR fallback for {len(empty_pages)} pages without text")
+                page_texts.update(ocr_pages(
+                    file_path,
+                    empty_pages,
+                    dpi=settings.PDF_OCR_DPI,
+                    lang=settings.PDF_OCR_LANG,
+                    max_pages=settings.PDF_OCR_MAX_PAGES,
+                    time_budget=settings.PDF_OCR_TIME_BUDGET,
+                    max_workers=settings.PDF_EXTRACTION_WORKERS
+                ))
+            except Exception as ocr_error:
+                logger.error(f"Error running OCR fallback: {str(ocr_error)}")
+
+        # Pages stay separated so the chunker can recognise their headers and footers
+        return PAGE_BREAK.join(
+            page_texts[number] + "\n\n"
+            for number in sorted(page_texts)
+            if page_texts[number].strip()
+        )
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         return None
@@ -69,65 +82,410 @@ def compute_file_hash(file_content):
     """Compute a hash for the file content to identify duplicate uploads"""
     return hashlib.md5(file_content).hexdigest()
 
-@timing_decorator
-def get_embeddings(resume_text, resume_id):
-    """Create embeddings for the resume text and store in Pinecone"""
+def get_chunk_tokens():
+    """Chunk token budget, capped so no chunk is truncated by the embedding model ([CLS]/[SEP] included)"""
+    return min(settings.RESUME_CHUNK_TOKENS, settings.EMBEDDING_MAX_SEQ_LENGTH - 2)
+
+def get_chunker_name():
+    """Identifies the chunker configuration that produced a stored chunk list"""
+    if settings.RESUME_CHUNKER == 'section':
+        return f"section:{get_chunk_tokens()}:{settings.RESUME_MIN_SECTION_TOKENS}"
+    return "recursive:1000:200"
+
+def get_stored_resume_text(file_hash):
+    """Return previously extracted text for a file hash, or None if it was never stored"""
+    stored = ResumeText.objects.filter(file_hash=file_hash).first()
+    if stored is None:
+        return None
+    logger.info(f"Using stored text for {file_hash} ({stored.text_length} chars)")
+    return stored.text
+
+def store_resume_text(file_hash, resume_text):
+    """Persist extracted text for a file hash, replacing any stored chunks"""
+    stored, _ = ResumeText.objects.get_or_create(file_hash=file_hash, defaults={'compressed_text': b''})
+    stored.text = resume_text
+    stored.compressed_chunks = None
+    stored.chunker = ""
+    stored.save()
+    return stored
+
+def chunk_resume_text(resume_text):
+    """Chunk resume text with the configured chunker into ``{"text", "start", "metadata"}`` dicts"""
+    if settings.RESUME_CHUNKER == 'section':
+        return chunk_resume(
+            resume_text,
+            max_tokens=get_chunk_tokens(),
+            min_section_tokens=settings.RESUME_MIN_SECTION_TOKENS
+        )
+
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
-        separators=["\n\n", "\n", " ", ""]
+        separators=["\n\n", "\n", " ", ""],
+        add_start_index=True
     )
+    return [
+        {
+            "text": chunk.page_content,
+            "start": chunk.metadata.get("start_index", -1),
+            "metadata": chunk.metadata
+        }
+        for chunk in text_splitter.create_documents([resume_text])
+    ]
+
+def split_resume_text(resume_text, file_hash=None):
+    """Split resume text into chunk documents, reusing stored chunks for the file hash when available"""
+    chunker_name = get_chunker_name()
+    stored = ResumeText.objects.filter(file_hash=file_hash).first() if file_hash else None
+    chunks = stored.get_chunks(chunker_name) if stored is not None else None
+
+    if chunks is not None:
+        logger.info(f"Using {len(chunks)} stored chunks for {file_hash}")
+    else:
+        chunks = chunk_resume_text(resume_text)
+        if file_hash:
+            if stored is None:
+                stored = ResumeText(file_hash=file_hash)
+                stored.text = resume_text
+            stored.set_chunks(chunks, chunker_name)
+            stored.save()
+
+    return [Document(page_content=chunk["text"], metadata=chunk["metadata"]) for chunk in chunks]
+
+def get_index_name():
+    """Return the configured vector index name"""
+    index_name = settings.INDEX_NAME or os.environ.get('INDEX_NAME')
+    if not index_name and settings.VECTOR_STORE_BACKEND == LOCAL:
+        index_name = 'resumes'
+    if not index_name:
+        raise ValueError("Pinecone index name not found in settings or environment variables")
+    return index_name
+
+def get_vector_store(namespace=None, embedding_model=None, index_name=None):
+    """Create a vector store for a namespace using the configured backend"""
+    if embedding_model is None:
+        embedding_singleton = EmbeddingModelSingleton.get_instance()
+        embedding_model = CachedEmbeddings(
+            embedding_singleton.get_embedding_model(),
+            embedding_singleton.cache_name
+        )
+    index_name = index_name or get_index_name()
 
-    chunks = text_splitter.create_documents([resume_text])
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        return LocalVectorStore(index_name=index_name, embedding=embedding_model, namespace=namespace)
 
-    try:
-        embedding_model = EmbeddingModelSingleton.get_instance().get_embedding_model()
-    except Exception as e:
-        logger.error(f"Error getting embedding model from singleton: {str(e)}")
-        raise ValueError(f"Failed to get embedding model: {str(e)}")
+    PineconeSingleton.get_instance().get_client()
+    api_key = settings.PINECONE_API_KEY or os.environ.get('PINECONE_API_KEY')
+    if not api_key:
+        raise ValueError("Pinecone API key not found in settings or environment variables")
 
-    try:
-        PineconeSingleton.get_instance().get_client()
+    os.environ['PINECONE_API_KEY'] = api_key
 
-        index_name = settings.INDEX_NAME or os.environ.get('INDEX_NAME')
+    logger.info(f"Creating vector store with index: {index_name}, namespace: {namespace}")
+    return PineconeVectorStore(
+        index_name=index_name,
+        embedding=embedding_model,
+        namespace=namespace
+    )
 
-        if not index_name:
-            raise ValueError("Pinecone index name not found in settings or environment variables")
+# Ready-to-use vector stores, retrievers and index handles, keyed by index and namespace
+_vector_store_cache = LRUCache(
+    max_size=settings.VECTOR_STORE_CACHE_SIZE,
+    ttl=settings.VECTOR_STORE_CACHE_TTL
+)
+
+def get_retriever(namespace, vector_store=None, k=5):
+    """Return a cached ``(vector_store, retriever)`` pair for a namespace"""
+    key = ('retriever', get_index_name(), namespace, k)
+    entry = _vector_store_cache.get(key)
+    if entry is None:
+        if vector_store is None:
+            vector_store = get_vector_store(namespace)
+        logger.info(f"Creating retriever with namespace: {namespace}")
+        retriever = vector_store.as_retriever(
+            search_kwargs={"k": k, "namespace": namespace}
+        )
+        entry = (vector_store, retriever)
+        _vector_store_cache.put(key, entry)
+    return entry
+
+def get_pinecone_index(index_name):
+    """Return a cached Pinecone index handle"""
+    key = ('index', index_name)
+    index = _vector_store_cache.get(key)
+    if index is None:
+        index = PineconeSingleton.get_instance().get_client().Index(index_name)
+        _vector_store_cache.put(key, index)
+    return index
+
+def invalidate_vector_store_cache(namespace=None):
+    """Drop cached retrievers for a namespace, or everything when no namespace is given"""
+    if namespace is None:
+        _vector_store_cache.clear()
+        return
+    removed = _vector_store_cache.invalidate(lambda key: key[0] == 'retriever' and key[2] == namespace)
+    logger.info(f"Invalidated {removed} cached retrievers for namespace {namespace}")
+
+# Top-k retrieval results keyed by (namespace, vectors version, normalized query, k)
+_retrieval_cache = LRUCache(
+    max_size=settings.RETRIEVAL_CACHE_SIZE,
+    ttl=settings.RETRIEVAL_CACHE_TTL
+)
+
+def normalize_query(query):
+    """Normalize a question for cache keys: case, whitespace and trailing punctuation"""
+    return " ".join(query.lower().split()).rstrip(" ?.!")
+
+def get_vectors_version(namespace):
+    """Return the version of a namespace's vectors, bumped whenever they change"""
+    return cache.get(f"vectors_version:{namespace}", 0)
+
+def bump_vectors_version(namespace):
+    """Mark a namespace's vectors as changed so cached retrievals for it are not reused"""
+    key = f"vectors_version:{namespace}"
+    cache.set(key, get_vectors_version(namespace) + 1, timeout=None)
+    removed = _retrieval_cache.invalidate(lambda cache_key: cache_key[0] == namespace)
+    logger.info(f"Invalidated {removed} cached retrievals for namespace {namespace}")
+
+def retrieve_documents(retriever, query, namespace, k=5):
+    """Run a retrieval, serving repeat questions from the retrieval cache"""
+    if not settings.RETRIEVAL_CACHE_ENABLED:
+        return retriever.get_relevant_documents(query)
+
+    key = (namespace, get_vectors_version(namespace), normalize_query(query), k)
+    documents = _retrieval_cache.get(key)
+    if documents is not None:
+        logger.info(f"Using cached retrieval for query: {query}")
+        return documents
+
+    logger.info(f"Retrieving documents for query: {query}")
+    documents = retriever.get_relevant_documents(query)
+    _retrieval_cache.put(key, documents)
+    return documents
+
+def retrieve_documents_batch(vector_store, queries, namespace, k=5, concurrency=4):
+    """
+    Run many retrievals against one namespace. Queries the retrieval cache has
+    not seen are embedded in one batch, then searched concurrently.
+    """
+    version = get_vectors_version(namespace)
+    keys = [(namespace, version, normalize_query(query), k) for query in queries]
+    documents = [
+        _retrieval_cache.get(key) if settings.RETRIEVAL_CACHE_ENABLED else None
+        for key in keys
+    ]
+    missing = [number for number, docs in enumerate(documents) if docs is None]
+    if not missing:
+        return documents
+
+    embedding_singleton = EmbeddingModelSingleton.get_instance()
+    embedding_model = CachedEmbeddings(embedding_singleton.get_embedding_model(), embedding_singleton.cache_name)
+    vectors = embedding_model.embed_queries([queries[number] for number in missing])
+
+    def search(vector):
+        results = vector_store.similarity_search_by_vector_with_score(vector, k=k, namespace=namespace)
+        return [doc for doc, _ in results]
+
+    logger.info(f"Retrieving documents for {len(missing)} queries in namespace {namespace}")
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(missing)))) as pool:
+        for number, docs in zip(missing, pool.map(search, vectors)):
+            documents[number] = docs
+            if settings.RETRIEVAL_CACHE_ENABLED:
+                _retrieval_cache.put(keys[number], docs)
+    return documents
+
+async def aretrieve_documents(retriever, query, namespace, k=5):
+    """Async ``retrieve_documents``: awaits the retriever instead of blocking a thread"""
+    if not settings.RETRIEVAL_CACHE_ENABLED:
+        return await retriever.ainvoke(query)
+
+    version = await cache.aget(f"vectors_version:{namespace}", 0)
+    key = (namespace, version, normalize_query(query), k)
+    documents = _retrieval_cache.get(key)
+    if documents is not None:
+        logger.info(f"Using cached retrieval for query: {query}")
+        return documents
+
+    logger.info(f"Retrieving documents for query: {query}")
+    documents = await retriever.ainvoke(query)
+    _retrieval_cache.put(key, documents)
+    return documents
+
+def get_cache_stats():
+    """Hit/miss statistics for the in-process caches"""
+    return {
+        'vector_stores': _vector_store_cache.stats(),
+        'retrievals': _retrieval_cache.stats(),
+        'query_embeddings': query_cache_stats(),
+        'llm_responses': response_cache_stats(),
+        'semantic_answers': semantic_cache.semantic_cache_stats(),
+        'llm_clients': ChatClientRegistry.get_instance().stats(),
+    }
+
+def _list_vector_ids(namespace, index_name, prefix=''):
+    """Ids of the vectors stored in a namespace, optionally only those starting with ``prefix``"""
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        ids = LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR).list_ids(namespace)
+        return [vector_id for vector_id in ids if vector_id.startswith(prefix)]
+    pages = get_pinecone_index(index_name).list(namespace=namespace, **({'prefix': prefix} if prefix else {}))
+    return [vector_id for page in pages for vector_id in page]
+
+def list_vector_namespaces(index_name=None):
+    """Names of all namespaces that hold vectors in the index"""
+    index_name = index_name or get_index_name()
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        return LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR).list_namespaces()
+    stats = get_pinecone_index(index_name).describe_index_stats()
+    return sorted(stats.namespaces.keys())
+
+def _delete_vector_ids(namespace, index_name, ids):
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR).delete(namespace, ids=ids)
+        return
+    index = get_pinecone_index(index_name)
+    for start in range(0, len(ids), 1000):
+        index.delete(ids=ids[start:start + 1000], namespace=namespace)
+
+def _upsert_vectors(namespace, index_name, ids, vectors, texts, metadatas):
+    """Upsert vectors into one namespace in concurrent batches"""
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        local_index = LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR)
+
+        def upsert_batch(batch):
+            batch_ids, batch_vectors, batch_texts, batch_metadatas = zip(*batch)
+            local_index.upsert(namespace, list(batch_ids), batch_vectors, list(batch_texts), list(batch_metadatas))
+
+        records = list(zip(ids, vectors, texts, metadatas))
+    else:
+        pinecone_index = get_pinecone_index(index_name)
+
+        def upsert_batch(batch):
+            pinecone_index.upsert(vectors=batch, namespace=namespace)
+
+        # PineconeVectorStore reads the chunk text from the "text" metadata key
+        records = [
+            {'id': vector_id, 'values': list(vector), 'metadata': {**metadata, 'text': text}}
+            for vector_id, vector, text, metadata in zip(ids, vectors, texts, metadatas)
+        ]
+
+    return upsert_in_batches(
+        upsert_batch,
+        records,
+        batch_size=settings.VECTOR_UPSERT_BATCH_SIZE,
+        concurrency=settings.VECTOR_UPSERT_CONCURRENCY,
+        max_retries=settings.VECTOR_UPSERT_MAX_RETRIES
+    )
 
-        namespace = f"resume_{resume_id}"
+def _delete_stale_vectors(namespace, index_name, current_ids, prefix=''):
+    """Remove vectors an earlier ingestion left in a namespace"""
+    try:
+        current = set(current_ids)
+        stale = [vector_id for vector_id in _list_vector_ids(namespace, index_name, prefix) if vector_id not in current]
+        if stale:
+            logger.info(f"Deleting {len(stale)} stale vectors from namespace {namespace}")
+            _delete_vector_ids(namespace, index_name, stale)
+    except Exception as e:
+        # Listing ids is not supported on every Pinecone index type
+        logger.warning(f"Could not remove stale vectors from namespace {namespace}: {str(e)}")
+
+def upsert_chunks(chunks, file_hash, namespace, embedding_model, index_name=None):
+    """
+    Embed chunk documents and upsert them under deterministic ids into the
+    resume's namespace and, for cross-resume search, the shared search
+    namespace. Returns the upsert stats of the resume's namespace.
+    """
+    index_name = index_name or get_index_name()
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [dict(chunk.metadata) for chunk in chunks]
+    vectors = embedding_model.embed_documents(texts)
+    ids = [chunk_vector_id(file_hash, number, text) for number, text in enumerate(texts)]
+
+    stats = _upsert_vectors(namespace, index_name, ids, vectors, texts, metadatas)
+    _delete_stale_vectors(namespace, index_name, ids)
+
+    if settings.SEARCH_INDEX_ENABLED:
+        search_metadatas = [{**metadata, 'resume_id': file_hash} for metadata in metadatas]
+        _upsert_vectors(settings.SEARCH_NAMESPACE, index_name, ids, vectors, texts, search_metadatas)
+        _delete_stale_vectors(settings.SEARCH_NAMESPACE, index_name, ids, prefix=f"{file_hash}:")
+        bump_vectors_version(settings.SEARCH_NAMESPACE)
+
+    return stats
+
+def delete_search_vectors(file_hash, index_name=None):
+    """
+    Remove a resume's chunks from the shared search namespace. Returns the
+    number of vectors deleted, or 0 when they had to be deleted by metadata
+    filter, which does not report a count.
+    """
+    index_name = index_name or get_index_name()
+    try:
+        ids = _list_vector_ids(settings.SEARCH_NAMESPACE, index_name, prefix=f"{file_hash}:")
+    except Exception as e:
+        # Listing ids only works on serverless indexes; pod indexes can delete by metadata instead
+        logger.info(f"Listing search vectors failed ({str(e)}), deleting them by metadata filter")
+        get_pinecone_index(index_name).delete(
+            filter={'resume_id': {'$eq': file_hash}},
+            namespace=settings.SEARCH_NAMESPACE
+        )
+        bump_vectors_version(settings.SEARCH_NAMESPACE)
+        return 0
+    if ids:
+        _delete_vector_ids(settings.SEARCH_NAMESPACE, index_name, ids)
+        bump_vectors_version(settings.SEARCH_NAMESPACE)
+    return len(ids)
 
-        logger.info(f"Storing vectors in Pinecone index: {index_name}, namespace: {namespace}")
+@timing_decorator
+def get_embeddings(resume_text, resume_id):
+    """Create embeddings for the resume text and store them in the vector store"""
+    chunks = split_resume_text(resume_text, resume_id)
 
-        api_key = settings.PINECONE_API_KEY or os.environ.get('PINECONE_API_KEY')
-        if not api_key:
-            raise ValueError("Pinecone API key not found in settings or environment variables")
+    try:
+        embedding_singleton = EmbeddingModelSingleton.get_instance()
+        embedding_model = CachedEmbeddings(
+            embedding_singleton.get_embedding_model(),
+            embedding_singleton.cache_name
+        )
+    except Exception as e:
+        logger.error(f"Error getting embedding model from singleton: {str(e)}")
+        raise ValueError(f"Failed to get embedding model: {str(e)}")
 
-        os.environ['PINECONE_API_KEY'] = api_key
+    try:
+        namespace = f"resume_{resume_id}"
 
-        logger.info(f"Creating vector store with index: {index_name}, namespace: {namespace}")
-        vector_store = PineconeVectorStore.from_documents(
-            chunks,
-            embedding=embedding_model,
-            index_name=index_name,
-            namespace=namespace
-        )
+        logger.info(f"Storing vectors with {settings.VECTOR_STORE_BACKEND} backend, namespace: {namespace}")
+        upsert_chunks(chunks, resume_id, namespace, embedding_model)
+        bump_vectors_version(namespace)
 
-        logger.info(f"Successfully stored {len(chunks)} chunks in Pinecone")
-        return vector_store
+        logger.info(f"Successfully stored {len(chunks)} chunks")
+        return get_vector_store(namespace, embedding_model=embedding_model)
 
     except Exception as e:
-        logger.error(f"Error with Pinecone: {str(e)}")
+        logger.error(f"Error with vector store: {str(e)}")
         raise ValueError(f"Failed to create vector store: {str(e)}")
 
 @timing_decorator
 def clear_pinecone_data(index_name, namespace=None):
-    """Clear existing vectors from Pinecone index"""
+    """Clear existing vectors from the vector index"""
+    if not index_name and settings.VECTOR_STORE_BACKEND == LOCAL:
+        index_name = get_index_name()
+
     if not index_name:
         logger.error("No index name provided to clear_pinecone_data")
         raise ValueError("Index name must be provided")
 
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        logger.info(f"Clearing local vector data from index {index_name}, namespace: {namespace}")
+        index = LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR)
+        if namespace:
+            index.delete(namespace, delete_all=True)
+            bump_vectors_version(namespace)
+        else:
+            index.delete_all_namespaces()
+            _retrieval_cache.clear()
+        return
+
     try:
-        pinecone_client = PineconeSingleton.get_instance().get_client()
+        PineconeSingleton.get_instance().get_client()
 
         api_key = settings.PINECONE_API_KEY or os.environ.get('PINECONE_API_KEY')
         if not api_key:
@@ -138,7 +496,7 @@ def clear_pinecone_data(index_name, namespace=None):
         logger.info(f"Clearing Pinecone data from index {index_name}, namespace: {namespace}")
 
         try:
-            index = pinecone_client.Index(index_name)
+            index = get_pinecone_index(index_name)
         except Exception as index_error:
             logger.error(f"Error getting Pinecone index: {str(index_error)}")
             raise ValueError(f"Could not access Pinecone index '{index_name}': {str(index_error)}")
@@ -147,9 +505,11 @@ def clear_pinecone_data(index_name, namespace=None):
             if namespace:
                 logger.info(f"Deleting all vectors in namespace: {namespace}")
                 index.delete(delete_all=True, namespace=namespace)
+                bump_vectors_version(namespace)
             else:
                 logger.info("Deleting all vectors in the index (no namespace specified)")
                 index.delete(delete_all=True)
+                _retrieval_cache.clear()
 
             logger.info(f"Successfully cleared vectors from index {index_name}")
         except Exception as delete_error:
@@ -160,41 +520,41 @@ def clear_pinecone_data(index_name, namespace=None):
         logger.error(f"Error clearing Pinecone data: {str(e)}")
         raise ValueError(f"Failed to clear Pinecone data: {str(e)}")
 
-_llm_cache = {}
-
-@timing_decorator
-def query_resume(query, vector_store, chat_history, model="llama3-8b-8192", temperature=0.0, max_tokens=1000, resume_id=None):
-    """Query the resume using the vector store and LLM"""
-    try:
-        cache_key = f"{query}_{model}_{temperature}_{resume_id}"
-        if temperature == 0.0 and cache_key in _llm_cache:
-            logger.info(f"Using cached response for query: {query}")
-            return _llm_cache[cache_key]
-        groq_api_key = settings.GROQ_API_KEY or os.environ.get('GROQ_API_KEY')
-
-        if not groq_api_key:
-            raise ValueError("Groq API key not found in settings or environment variables")
-
-        logger.info(f"Setting up LLM with model: {model}, temperature: {temperature}")
-        llm = ChatGroq(
-            api_key=groq_api_key,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        formatted_chat_history = ""
-        for message in chat_history:
-            role = "User" if message["type"] == "human" else "Assistant"
-            formatted_chat_history += f"{role}: {message['content']}\n"
-        namespace = f"resume_{resume_id}" if resume_id else None
-        logger.info(f"Creating retriever with namespace: {namespace}")
-        retriever = vector_store.as_retriever(
-            search_kwargs={"k": 5, "namespace": namespace}
-        )
-        logger.info(f"Retrieving documents for query: {query}")
-        relevant_docs = retriever.get_relevant_documents(query)
-        docs_content = "\n\n".join([doc.page_content for doc in relevant_docs])
-        prompt = f"""
+def get_chat_model(model, temperature, max_tokens):
+    """Return the shared chat client for a query; ``CHAT_LLM_BACKEND=fake`` serves canned answers without Groq"""
+    if settings.CHAT_LLM_BACKEND == 'fake':
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=[settings.CHAT_FAKE_RESPONSE], sleep=settings.CHAT_FAKE_TOKEN_DELAY)
+
+    return ChatClientRegistry.get_instance().get(model, temperature, max_tokens)
+
+def format_chat_history(chat_history):
+    formatted_chat_history = ""
+    for message in chat_history:
+        if message["type"] == "summary":
+            formatted_chat_history += f"Summary of earlier conversation: {message['content']}\n"
+            continue
+        role = "User" if message["type"] == "human" else "Assistant"
+        formatted_chat_history += f"{role}: {message['content']}\n"
+    return formatted_chat_history
+
+def retrieve_context(query, vector_store, resume_id=None):
+    """Retrieve the chunks relevant to a question, joined for the prompt"""
+    namespace = f"resume_{resume_id}" if resume_id else None
+    _, retriever = get_retriever(namespace, vector_store=vector_store)
+    relevant_docs = retrieve_documents(retriever, query, namespace)
+    return "\n\n".join([doc.page_content for doc in relevant_docs])
+
+async def aretrieve_context(query, vector_store, resume_id=None):
+    """Async ``retrieve_context``"""
+    namespace = f"resume_{resume_id}" if resume_id else None
+    # Building a retriever may load the embedding model, so keep it off the event loop
+    _, retriever = await sync_to_async(get_retriever, thread_sensitive=False)(namespace, vector_store=vector_store)
+    relevant_docs = await aretrieve_documents(retriever, query, namespace)
+    return "\n\n".join([doc.page_content for doc in relevant_docs])
+
+def build_resume_prompt(query, docs_content, formatted_chat_history):
+    return f"""
         You are an AI assistant analyzing a resume. Answer the question based on the resume content.
 
         Resume Content:
@@ -207,15 +567,66 @@ def query_resume(query, vector_store, chat_history, model="llama3-8b-8192", temp
 
         Answer:
         """
+
+def _prepare_query(query, vector_store, chat_history, model, temperature, max_tokens, resume_id):
+    """Build the prompt and, for deterministic answers, the response cache key"""
+    docs_content = retrieve_context(query, vector_store, resume_id)
+    formatted_chat_history = format_chat_history(chat_history)
+    prompt = build_resume_prompt(query, docs_content, formatted_chat_history)
+    cache_key = None
+    if temperature == 0.0:
+        cache_key = response_cache_key(
+            resume_id, model, temperature, max_tokens, query, docs_content, formatted_chat_history
+        )
+    return prompt, cache_key
+
+def _semantic_lookup(query, chat_history, model, temperature, max_tokens, resume_id):
+    """Return a semantically cached answer (or None) and the question vector to store a new answer under"""
+    if not resume_id or not semantic_cache.applies(chat_history, temperature):
+        return None, None
+    try:
+        vector = semantic_cache.embed_question(query)
+        return semantic_cache.lookup(resume_id, model, max_tokens, vector), vector
+    except Exception as e:
+        logger.warning(f"Semantic answer cache unavailable: {str(e)}")
+        return None, None
+
+def _remember_answer(cache_key, semantic_vector, query, model, max_tokens, resume_id, answer):
+    if cache_key:
+        cache_response(cache_key, answer)
+        logger.info(f"Cached response for query: {query}")
+    if semantic_vector is not None:
+        semantic_cache.store(resume_id, model, max_tokens, query, semantic_vector, answer)
+
+@timing_decorator
+def query_resume(query, vector_store, chat_history, model="llama3-8b-8192", temperature=0.0, max_tokens=1000, resume_id=None):
+    """Query the resume using the vector store and LLM"""
+    try:
+        cached, semantic_vector = _semantic_lookup(query, chat_history, model, temperature, max_tokens, resume_id)
+        if cached is not None:
+            return cached
+
+        prompt, cache_key = _prepare_query(
+            query, vector_store, chat_history, model, temperature, max_tokens, resume_id
+        )
+        if cache_key:
+            cached = get_cached_response(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached response for query: {query}")
+                if semantic_vector is not None:
+                    semantic_cache.store(resume_id, model, max_tokens, query, semantic_vector, cached)
+                return cached
+
+        llm = get_chat_model(model, temperature, max_tokens)
         logger.info("Sending query to LLM")
+        generation_start = time.perf_counter()
         response = llm.invoke(prompt)
+        ChatClientRegistry.get_instance().record_generation(time.perf_counter() - generation_start)
         if hasattr(response, 'content'):
             result = response.content
         else:
             result = str(response)
-        if temperature == 0.0:
-            _llm_cache[cache_key] = result
-            logger.info(f"Cached response for query: {query}")
+        _remember_answer(cache_key, semantic_vector, query, model, max_tokens, resume_id, result)
 
         logger.info("Query completed successfully")
         return result
@@ -223,3 +634,95 @@ def query_resume(query, vector_store, chat_history, model="llama3-8b-8192", temp
     except Exception as e:
         logger.error(f"Error querying resume: {str(e)}")
         raise ValueError(f"Failed to query resume: {str(e)}")
+
+async def aquery_resume(query, vector_store, chat_history, model="llama3-8b-8192", temperature=0.0, max_tokens=1000, resume_id=None):
+    """
+    Async ``query_resume`` for ASGI workers. Retrieval and the LLM call are
+    awaited, so one worker can keep many chats in flight. The file- or
+    database-backed answer caches are consulted in a thread.
+    """
+    start_time = time.time()
+    try:
+        cached, semantic_vector = await sync_to_async(_semantic_lookup, thread_sensitive=False)(
+            query, chat_history, model, temperature, max_tokens, resume_id
+        )
+        if cached is not None:
+            return cached
+
+        docs_content = await aretrieve_context(query, vector_store, resume_id)
+        formatted_chat_history = format_chat_history(chat_history)
+        prompt = build_resume_prompt(query, docs_content, formatted_chat_history)
+        cache_key = None
+        if temperature == 0.0:
+            cache_key = await sync_to_async(response_cache_key, thread_sensitive=False)(
+                resume_id, model, temperature, max_tokens, query, docs_content, formatted_chat_history
+            )
+            cached = await sync_to_async(get_cached_response, thread_sensitive=False)(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached response for query: {query}")
+                if semantic_vector is not None:
+                    await sync_to_async(semantic_cache.store, thread_sensitive=False)(
+                        resume_id, model, max_tokens, query, semantic_vector, cached
+                    )
+                return cached
+
+        llm = get_chat_model(model, temperature, max_tokens)
+        logger.info("Sending query to LLM")
+        generation_start = time.perf_counter()
+        response = await llm.ainvoke(prompt)
+        ChatClientRegistry.get_instance().record_generation(time.perf_counter() - generation_start)
+        if hasattr(response, 'content'):
+            result = response.content
+        else:
+            result = str(response)
+        await sync_to_async(_remember_answer, thread_sensitive=False)(
+            cache_key, semantic_vector, query, model, max_tokens, resume_id, result
+        )
+
+        logger.info(f"Async query completed in {time.time() - start_time:.2f} seconds")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error querying resume: {str(e)}")
+        raise ValueError(f"Failed to query resume: {str(e)}")
+
+def stream_query_resume(query, vector_store, chat_history, model="llama3-8b-8192", temperature=0.0, max_tokens=1000, resume_id=None):
+    """Like ``query_resume``, but yield the answer in pieces as the LLM generates them"""
+    try:
+        cached, semantic_vector = _semantic_lookup(query, chat_history, model, temperature, max_tokens, resume_id)
+        if cached is None:
+            prompt, cache_key = _prepare_query(
+                query, vector_store, chat_history, model, temperature, max_tokens, resume_id
+            )
+            cached = get_cached_response(cache_key) if cache_key else None
+            if cached is not None and semantic_vector is not None:
+                semantic_cache.store(resume_id, model, max_tokens, query, semantic_vector, cached)
+        llm = get_chat_model(model, temperature, max_tokens) if cached is None else None
+    except Exception as e:
+        logger.error(f"Error querying resume: {str(e)}")
+        raise ValueError(f"Failed to query resume: {str(e)}")
+
+    if cached is not None:
+        logger.info(f"Using cached response for query: {query}")
+        yield cached
+        return
+
+    logger.info("Streaming query to LLM")
+    start_time = time.time()
+    parts = []
+    try:
+        for chunk in llm.stream(prompt):
+            token = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if not token:
+                continue
+            if not parts:
+                logger.info(f"First token after {time.time() - start_time:.2f} seconds")
+            parts.append(token)
+            yield token
+    except Exception as e:
+        logger.error(f"Error streaming resume query: {str(e)}")
+        raise ValueError(f"Failed to query resume: {str(e)}")
+
+    _remember_answer(cache_key, semantic_vector, query, model, max_tokens, resume_id, "".join(parts))
+    ChatClientRegistry.get_instance().record_generation(time.time() - start_time)
+    logger.info(f"Streamed query completed in {time.time() - start_time:.2f} seconds")
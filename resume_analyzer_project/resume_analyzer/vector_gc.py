@@ -0,0 +1,142 @@
+"""
+Background deletion of vector namespaces.
+
+``delete_resume`` records a ``VectorTombstone`` for the resume's namespace and
+returns without touching the index. The ``sweep_vector_tombstones``
+management command deletes tombstoned namespaces in batches, and from time to
+time reconciles the namespaces in the index against ``Resume.vector_namespace``
+so namespaces leaked by earlier failures are tombstoned and purged as well.
+
+A namespace is never deleted while a ``Resume`` still points at it, so a
+resume re-uploaded before the sweep keeps its vectors. Sweeping a resume's
+namespace also removes its chunks from the shared search namespace.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Resume, VectorTombstone
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_PREFIX = 'resume_'
+
+
+def record_tombstone(namespace, index_name=None, reason='deleted'):
+    """Queue a namespace for deletion by the sweeper"""
+    from .utils import get_index_name
+
+    tombstone = VectorTombstone.objects.create(
+        namespace=namespace,
+        index_name=index_name or get_index_name(),
+        reason=reason
+    )
+    logger.info(f"Recorded tombstone {tombstone.pk} for namespace {namespace}")
+    return tombstone
+
+
+def _live_namespaces(namespaces):
+    return set(
+        Resume.objects.filter(vector_namespace__in=list(namespaces)).values_list('vector_namespace', flat=True)
+    )
+
+
+def _sweep_one(tombstone):
+    from .utils import clear_pinecone_data, delete_search_vectors, invalidate_vector_store_cache
+
+    close_old_connections()
+    try:
+        clear_pinecone_data(tombstone.index_name, tombstone.namespace)
+        invalidate_vector_store_cache(tombstone.namespace)
+        if settings.SEARCH_INDEX_ENABLED and tombstone.namespace.startswith(NAMESPACE_PREFIX):
+            delete_search_vectors(tombstone.namespace[len(NAMESPACE_PREFIX):], tombstone.index_name)
+        return None
+    except Exception as e:
+        return str(e)
+    finally:
+        close_old_connections()
+
+
+def sweep_tombstones(batch_size=None, concurrency=None):
+    """
+    Delete the namespaces of up to ``batch_size`` pending tombstones, with up
+    to ``concurrency`` deletes in flight. Returns the number swept.
+    """
+    batch_size = batch_size or settings.VECTOR_GC_BATCH_SIZE
+    concurrency = concurrency or settings.VECTOR_GC_CONCURRENCY
+
+    tombstones = list(
+        VectorTombstone.objects.filter(
+            swept_at__isnull=True,
+            attempts__lt=settings.VECTOR_GC_MAX_ATTEMPTS
+        )[:batch_size]
+    )
+    if not tombstones:
+        return 0
+
+    # Several tombstones can name the same namespace; delete it once
+    by_namespace = {}
+    for tombstone in tombstones:
+        by_namespace.setdefault((tombstone.index_name, tombstone.namespace), []).append(tombstone)
+
+    live = _live_namespaces(namespace for _, namespace in by_namespace)
+    now = timezone.now()
+    for key, group in list(by_namespace.items()):
+        if key[1] in live:
+            logger.info(f"Namespace {key[1]} is in use again, dropping its tombstones")
+            VectorTombstone.objects.filter(pk__in=[tombstone.pk for tombstone in group]).update(
+                swept_at=now, error='namespace in use'
+            )
+            del by_namespace[key]
+
+    representatives = [group[0] for group in by_namespace.values()]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='vector-gc') as pool:
+        errors = list(pool.map(_sweep_one, representatives))
+
+    swept = 0
+    for tombstone, error in zip(representatives, errors):
+        group_ids = [member.pk for member in by_namespace[(tombstone.index_name, tombstone.namespace)]]
+        if error is None:
+            VectorTombstone.objects.filter(pk__in=group_ids).update(swept_at=timezone.now(), error='')
+            swept += 1
+        else:
+            logger.error(f"Failed to delete namespace {tombstone.namespace}: {error}")
+            VectorTombstone.objects.filter(pk__in=group_ids).update(
+                attempts=tombstone.attempts + 1, error=error
+            )
+
+    logger.info(f"Swept {swept} of {len(representatives)} vector namespaces")
+    return swept
+
+
+def reconcile_namespaces(index_name=None):
+    """
+    Tombstone every resume namespace in the index that no ``Resume`` points
+    at and that is not already awaiting deletion. Returns the namespaces found.
+    """
+    from .utils import get_index_name, list_vector_namespaces
+
+    index_name = index_name or get_index_name()
+    namespaces = {
+        namespace for namespace in list_vector_namespaces(index_name)
+        if namespace.startswith(NAMESPACE_PREFIX)
+    }
+    live = _live_namespaces(namespaces)
+    pending = set(
+        VectorTombstone.objects.filter(
+            index_name=index_name,
+            namespace__in=list(namespaces),
+            swept_at__isnull=True
+        ).values_list('namespace', flat=True)
+    )
+    orphans = sorted(namespaces - live - pending)
+    VectorTombstone.objects.bulk_create([
+        VectorTombstone(namespace=namespace, index_name=index_name, reason='orphan')
+        for namespace in orphans
+    ])
+    if orphans:
+        logger.warning(f"Found {len(orphans)} orphaned namespaces in index {index_name}")
+    return orphans
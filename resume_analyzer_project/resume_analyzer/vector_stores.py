@@ -0,0 +1,386 @@
+"""
+Vector store backends selectable with the ``VECTOR_STORE_BACKEND`` setting.
+
+``pinecone``
+    ``PineconeVectorStore`` against ``INDEX_NAME``, one namespace per resume.
+
+``local``
+    ``LocalVectorStore``: exact cosine search over NumPy matrices held in
+    memory, one per namespace, persisted under ``VECTOR_STORE_LOCAL_DIR``.
+    A resume is a handful of chunks, so brute-force search is microseconds
+    and needs no network. It supports the same add / search / delete
+    operations the app uses on Pinecone.
+
+    Each namespace is an append-only log file with one JSON line per upsert
+    or delete batch. Web and ingestion worker processes share it through an
+    ``fcntl`` lock file, so a batch costs one append rather than a rewrite of
+    the namespace. Readers only apply complete lines they have not seen yet.
+    Once the log holds far more records than live vectors, it is compacted
+    into a new file that replaces the old one atomically. Without ``fcntl``
+    (Windows), writes are only serialized within one process.
+"""
+import base64
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PINECONE = 'pinecone'
+LOCAL = 'local'
+BACKENDS = (PINECONE, LOCAL)
+
+DEFAULT_NAMESPACE = '__default__'
+
+_unsafe_filename = re.compile(r"[^A-Za-z0-9_.-]")
+
+# Log records allowed beyond the live vector count before a namespace is compacted
+COMPACT_SLACK = 64
+
+
+@contextmanager
+def _file_lock(path, exclusive):
+    """Hold a shared or exclusive lock on ``path`` across processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _upsert_record(ids, vectors, texts, metadatas):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return {
+        'op': 'upsert',
+        'ids': list(ids),
+        'texts': list(texts),
+        'metadatas': list(metadatas),
+        'vectors': base64.b64encode(vectors.tobytes()).decode('ascii'),
+    }
+
+
+def _matches(metadata, metadata_filter):
+    """Evaluate the subset of Pinecone's metadata filter language used by the app"""
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == '$and':
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        values = value if isinstance(value, list) else [value]
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, operand in condition.items():
+            if operator == '$eq' and operand not in values:
+                return False
+            if operator == '$ne' and operand in values:
+                return False
+            if operator == '$in' and not any(item in operand for item in values):
+                return False
+            if operator == '$nin' and any(item in operand for item in values):
+                return False
+    return True
+
+
+class _Namespace:
+    """Vectors, ids, texts and metadata of one namespace"""
+
+    def __init__(self, dimensions=0):
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self.matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self.positions = {}
+        # Position in the namespace's log file up to which records have been applied
+        self.generation = None
+        self.inode = None
+        self.offset = 0
+        self.records = 0
+
+    def apply(self, record):
+        if record['op'] == 'upsert':
+            vectors = np.frombuffer(base64.b64decode(record['vectors']), dtype=np.float32)
+            self.upsert(record['ids'], vectors.reshape(len(record['ids']), -1), record['texts'], record['metadatas'])
+        elif record['op'] == 'delete':
+            self.delete(record['ids'])
+        self.records += 1
+
+    def upsert(self, ids, vectors, texts, metadatas):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.clip(norms, 1e-12, None)
+        if self.matrix.shape[0] == 0:
+            self.matrix = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+
+        new_rows = []
+        for row, vector_id in enumerate(ids):
+            position = self.positions.get(vector_id)
+            if position is not None:
+                self.matrix[position] = vectors[row]
+                self.texts[position] = texts[row]
+                self.metadatas[position] = metadatas[row]
+            else:
+                self.positions[vector_id] = len(self.ids) + len(new_rows)
+                new_rows.append(row)
+        if new_rows:
+            self.ids.extend(ids[row] for row in new_rows)
+            self.texts.extend(texts[row] for row in new_rows)
+            self.metadatas.extend(metadatas[row] for row in new_rows)
+            self.matrix = np.vstack([self.matrix, vectors[new_rows]])
+
+    def delete(self, ids):
+        doomed = {self.positions[vector_id] for vector_id in ids if vector_id in self.positions}
+        if not doomed:
+            return
+        keep = [position for position in range(len(self.ids)) if position not in doomed]
+        self.ids = [self.ids[position] for position in keep]
+        self.texts = [self.texts[position] for position in keep]
+        self.metadatas = [self.metadatas[position] for position in keep]
+        self.matrix = self.matrix[keep]
+        self.positions = {vector_id: position for position, vector_id in enumerate(self.ids)}
+
+    def search(self, vector, k, metadata_filter=None):
+        if not self.ids:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.matrix @ query
+        if metadata_filter:
+            allowed = np.array([_matches(metadata, metadata_filter) for metadata in self.metadatas])
+            scores = np.where(allowed, scores, -np.inf)
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self.ids[position], self.texts[position], self.metadatas[position], float(scores[position]))
+            for position in top
+            if np.isfinite(scores[position])
+        ]
+
+
+class LocalVectorIndex:
+    """A named local index: a set of namespaces persisted to one directory"""
+
+    _indexes = {}
+    _indexes_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, index_name, root):
+        key = (index_name, root)
+        with cls._indexes_lock:
+            if key not in cls._indexes:
+                cls._indexes[key] = cls(os.path.join(root, _unsafe_filename.sub('_', index_name)))
+            return cls._indexes[key]
+
+    def __init__(self, path):
+        self.path = path
+        self.namespaces = {}
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+    def _files(self, namespace):
+        base = os.path.join(self.path, _unsafe_filename.sub('_', namespace))
+        return base + '.log', base + '.lock'
+
+    def _up_to_date(self, namespace):
+        data = self.namespaces.get(namespace)
+        if data is None:
+            return None
+        log_path, _ = self._files(namespace)
+        try:
+            stat = os.stat(log_path)
+        except FileNotFoundError:
+            return data if data.inode is None else None
+        return data if (stat.st_ino, stat.st_size) == (data.inode, data.offset) else None
+
+    def _refresh(self, namespace):
+        """Apply records appended by other processes since the last read; the caller holds the file lock"""
+        log_path, _ = self._files(namespace)
+        data = self.namespaces.get(namespace) or _Namespace()
+        try:
+            log_file = open(log_path, 'rb')
+        except FileNotFoundError:
+            data = _Namespace()
+            self.namespaces[namespace] = data
+            return data
+
+        with log_file:
+            stat = os.fstat(log_file.fileno())
+            header = json.loads(log_file.readline())
+            # A compacted or recreated log starts a new generation and is read from the start
+            if header['generation'] != data.generation:
+                data = _Namespace()
+                data.generation = header['generation']
+                data.offset = log_file.tell()
+            data.inode = stat.st_ino
+            log_file.seek(data.offset)
+            tail = log_file.read(stat.st_size - data.offset)
+
+        complete = tail.rfind(b"\n") + 1
+        for line in tail[:complete].splitlines():
+            if line.strip():
+                data.apply(json.loads(line))
+        data.offset += complete
+        self.namespaces[namespace] = data
+        return data
+
+    def _compact(self, namespace, data):
+        """Replace the log with a single record of the live vectors; the caller holds the exclusive lock"""
+        log_path, _ = self._files(namespace)
+        if not data.ids:
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            self.namespaces[namespace] = _Namespace()
+            return
+
+        generation = uuid.uuid4().hex
+        with tempfile.NamedTemporaryFile('wb', dir=self.path, delete=False, prefix='.compact-', suffix='.log') as log_file:
+            log_file.write((json.dumps({'op': 'header', 'generation': generation}) + "\n").encode('utf-8'))
+            log_file.write((json.dumps(_upsert_record(data.ids, data.matrix, data.texts, data.metadatas)) + "\n").encode('utf-8'))
+            log_file.flush()
+            os.fsync(log_file.fileno())
+        os.replace(log_file.name, log_path)
+        stat = os.stat(log_path)
+        data.generation, data.inode, data.offset, data.records = generation, stat.st_ino, stat.st_size, 1
+
+    def _append(self, namespace, record):
+        log_path, lock_path = self._files(namespace)
+        with self.lock, _file_lock(lock_path, exclusive=True):
+            data = self._refresh(namespace)
+            data.apply(record)
+            if data.generation is None or data.records > 2 * len(data.ids) + COMPACT_SLACK:
+                self._compact(namespace, data)
+                return
+            line = (json.dumps(record) + "\n").encode('utf-8')
+            # One write per batch, so readers see all of it or none of it
+            with open(log_path, 'ab') as log_file:
+                log_file.write(line)
+            data.offset += len(line)
+
+    def upsert(self, namespace, ids, vectors, texts, metadatas):
+        self._append(namespace, _upsert_record(ids, vectors, texts, metadatas))
+
+    def delete(self, namespace, ids=None, delete_all=False):
+        log_path, lock_path = self._files(namespace)
+        if not delete_all:
+            if ids:
+                self._append(namespace, {'op': 'delete', 'ids': list(ids)})
+            return
+        with self.lock, _file_lock(lock_path, exclusive=True):
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            self.namespaces[namespace] = _Namespace()
+
+    def delete_all_namespaces(self):
+        with self.lock:
+            for namespace in self.list_namespaces():
+                self.delete(namespace, delete_all=True)
+
+    def _read(self, namespace):
+        data = self._up_to_date(namespace)
+        if data is not None:
+            return data
+        _, lock_path = self._files(namespace)
+        with _file_lock(lock_path, exclusive=False):
+            return self._refresh(namespace)
+
+    def search(self, namespace, vector, k, metadata_filter=None):
+        with self.lock:
+            return self._read(namespace).search(vector, k, metadata_filter)
+
+    def list_ids(self, namespace):
+        with self.lock:
+            return list(self._read(namespace).ids)
+
+    def list_namespaces(self):
+        return sorted(
+            filename[:-len('.log')]
+            for filename in os.listdir(self.path)
+            if filename.endswith('.log') and not filename.startswith('.')
+        )
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store over a ``LocalVectorIndex`` namespace"""
+
+    def __init__(self, index_name, embedding, namespace=None, root=None):
+        from django.conf import settings
+        self.index = LocalVectorIndex.get(index_name, root or settings.VECTOR_STORE_LOCAL_DIR)
+        self._embedding = embedding
+        self.namespace = namespace or DEFAULT_NAMESPACE
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def add_texts(self, texts, metadatas=None, ids=None, namespace=None, **kwargs):
+        texts = list(texts)
+        metadatas = [dict(metadata) for metadata in metadatas] if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = self._embedding.embed_documents(texts)
+        self.index.upsert(namespace or self.namespace, ids, vectors, texts, metadatas)
+        return ids
+
+    def add_vectors(self, ids, vectors, texts, metadatas, namespace=None):
+        """Upsert precomputed vectors"""
+        self.index.upsert(namespace or self.namespace, list(ids), vectors, list(texts), list(metadatas))
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None, namespace=None, **kwargs):
+        return [
+            (Document(page_content=text, metadata=metadata), score)
+            for _, text, metadata, score in self.index.search(namespace or self.namespace, embedding, k, filter)
+        ]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, namespace=None, **kwargs):
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k=k, filter=filter, namespace=namespace
+        )
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, namespace=None, **kwargs):
+        return [
+            document for document, _ in
+            self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter, namespace=namespace)
+        ]
+
+    def similarity_search(self, query, k=4, filter=None, namespace=None, **kwargs):
+        return [
+            document for document, _ in
+            self.similarity_search_with_score(query, k=k, filter=filter, namespace=namespace)
+        ]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    def delete(self, ids=None, delete_all=None, namespace=None, **kwargs):
+        self.index.delete(namespace or self.namespace, ids=ids, delete_all=bool(delete_all))
+        return True
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, index_name=None, namespace=None, **kwargs):
+        store = cls(index_name=index_name, embedding=embedding, namespace=namespace)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
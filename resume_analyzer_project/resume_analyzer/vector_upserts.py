@@ -0,0 +1,80 @@
+"""
+Idempotent, batched vector upserts.
+
+Vector ids are derived from (file hash, chunk index, chunk text hash), so
+ingesting the same resume twice overwrites its vectors instead of adding a
+second copy. ``upsert_in_batches`` sends the vectors in ``batch_size``
+batches over a bounded thread pool and retries only the batches that failed.
+"""
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+class UpsertError(Exception):
+    """Raised when some batches still fail after all retries"""
+
+
+def chunk_vector_id(file_hash, chunk_index, text):
+    """Deterministic id for a chunk's vector"""
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    return f"{file_hash}:{chunk_index}:{digest}"
+
+
+def upsert_in_batches(upsert_batch, records, batch_size=100, concurrency=4, max_retries=3, backoff=0.5):
+    """
+    Call ``upsert_batch`` on ``batch_size`` slices of ``records`` from up to
+    ``concurrency`` threads. Batches that raise are retried, alone, up to
+    ``max_retries`` times with exponential backoff.
+
+    Returns a stats dict with ``vectors``, ``batches``, ``retries``,
+    ``seconds`` and ``vectors_per_second``.
+    """
+    batches = [records[start:start + batch_size] for start in range(0, len(records), batch_size)]
+    pending = list(range(len(batches)))
+    errors = {}
+    retries = 0
+    start_time = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='vector-upsert') as pool:
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                retries += len(pending)
+                time.sleep(backoff * 2 ** (attempt - 1))
+                logger.warning(f"Retrying {len(pending)} failed upsert batches (attempt {attempt + 1})")
+
+            futures = {pool.submit(upsert_batch, batches[number]): number for number in pending}
+            pending = []
+            for future in as_completed(futures):
+                number = futures[future]
+                try:
+                    future.result()
+                    errors.pop(number, None)
+                except Exception as e:
+                    logger.warning(f"Upsert batch {number} failed: {str(e)}")
+                    errors[number] = e
+                    pending.append(number)
+
+    elapsed = time.perf_counter() - start_time
+    if pending:
+        raise UpsertError(
+            f"{len(pending)} of {len(batches)} upsert batches failed: {str(errors[pending[0]])}"
+        )
+
+    stats = {
+        'vectors': len(records),
+        'batches': len(batches),
+        'retries': retries,
+        'seconds': elapsed,
+        'vectors_per_second': len(records) / elapsed if elapsed else 0.0,
+    }
+    logger.info(
+        f"Upserted {stats['vectors']} vectors in {stats['batches']} batches "
+        f"({stats['vectors_per_second']:.0f} vectors/s, {retries} retried batches)"
+    )
+    return stats
@@ -1,23 +1,64 @@
-import os
-import tempfile
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.urls import reverse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.contrib import messages
 from django.conf import settings
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.core.paginator import Paginator
+from django.db import close_old_connections, connections
 
-from .models import Resume, ChatMessage
+from .models import Resume, ChatMessage, IngestionJob, ScreeningReport
 from .forms import ResumeUploadForm, ChatMessageForm
+from .upload_handlers import HashingFileUploadHandler
+from .ingestion import enqueue_ingestion, run_ingestion_job, get_ingestion_status
+from .vector_gc import record_tombstone
+from .response_cache import invalidate_resume_responses
+from .memory import abuild_chat_history, build_chat_history, schedule_fold
+from .candidate_search import search_cache_stats, search_candidates
+from .chunking import SECTION_ALIASES
+from .screening import clean_questions, report_as_dict, run_screening
 from .utils import (
-    load_resume,
+    aquery_resume,
     compute_file_hash,
-    get_embeddings,
-    clear_pinecone_data,
-    query_resume
+    get_cache_stats,
+    get_retriever,
+    invalidate_vector_store_cache,
+    query_resume,
+    stream_query_resume
 )
 
+def _own_thread_under_asgi(view):
+    """
+    Under ASGI (``ASYNC_CHAT=True``) Django runs every sync view on one shared
+    thread, so one slow upload, search or screening request would hold up all
+    the others. A wrapped view runs on a thread from the event loop's default
+    executor instead, with that thread's own database connection, recycled
+    like the request thread's. Under WSGI the view is returned unchanged.
+    """
+    if not settings.ASYNC_CHAT:
+        return view
+
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    run_in_thread = sync_to_async(run, thread_sensitive=False)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_thread(request, *args, **kwargs)
+
+    return wrapper
+
 def home(request):
     """Home page view"""
     import logging
@@ -46,50 +87,51 @@ def home(request):
         'is_render': is_render
     })
 
+@_own_thread_under_asgi
+@csrf_exempt
 def upload_resume(request):
     """Handle resume upload"""
+    # Upload handlers must be swapped before anything reads request.POST,
+    # including the CSRF middleware, so CSRF is enforced on the inner view.
+    request.upload_handlers = [HashingFileUploadHandler(request)]
+    return _upload_resume(request)
+
+@csrf_protect
+def _upload_resume(request):
     if request.method == 'POST':
-        form = ResumeUploadForm(request.POST, request.FILES)
-        if form.is_valid():
-            file = request.FILES['file']
+        file = request.FILES.get('file')
 
-            file_content = file.read()
-            file_hash = compute_file_hash(file_content)
-            file.seek(0)
+        if file is not None and getattr(file, 'duplicate_of', None) is not None:
+            messages.info(request, "This resume has already been uploaded. Using existing data.")
+            return redirect('resume_detail', pk=file.duplicate_of)
 
-            existing_resume = Resume.objects.filter(file_hash=file_hash).first()
-            if existing_resume:
-                messages.info(request, "This resume has already been uploaded. Using existing data.")
-                return redirect('resume_detail', pk=existing_resume.pk)
+        form = ResumeUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            file_hash = getattr(file, 'file_hash', None)
+            if file_hash is None:
+                file_hash = compute_file_hash(file.read())
+                file.seek(0)
 
             resume = form.save(commit=False)
             resume.original_filename = file.name
             resume.file_hash = file_hash
+            resume.status = Resume.PENDING
             resume.save()
 
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                    temp_file.write(file_content)
-                    temp_path = temp_file.name
-
-                resume_text = load_resume(temp_path)
-
-                os.unlink(temp_path)
-
-                if not resume_text or len(resume_text) < 10:
-                    messages.error(request, "Could not extract text from this PDF. Please try another file.")
-                    resume.delete()
-                    return redirect('home')
+            job = enqueue_ingestion(resume)
 
-                vector_store = get_embeddings(resume_text, resume.file_hash)
+            if settings.INGESTION_ASYNC:
+                messages.success(request, "Resume uploaded! It is being processed and will be ready shortly.")
+                return redirect('resume_detail', pk=resume.pk)
 
+            run_ingestion_job(job)
+            if job.status == IngestionJob.DONE:
                 messages.success(request, "Resume uploaded and processed successfully!")
                 return redirect('resume_detail', pk=resume.pk)
 
-            except Exception as e:
-                messages.error(request, f"Error processing resume: {str(e)}")
-                resume.delete()
-                return redirect('home')
+            messages.error(request, f"Error processing resume: {job.error}")
+            resume.delete()
+            return redirect('home')
         else:
             messages.error(request, "There was an error with your submission. Please check the form.")
     else:
@@ -112,31 +154,18 @@ def resume_detail(request, pk):
     ]
 
     try:
-        if not request.session.get(f'resume_{pk}_preloaded', False):
-            from langchain_pinecone import PineconeVectorStore
-            import os
-            from .models import EmbeddingModelSingleton, PineconeSingleton
+        if not resume.is_ready:
+            logger.info(f"Resume {pk} is still being processed, skipping preload")
+        elif not request.session.get(f'resume_{pk}_preloaded', False):
             from dotenv import load_dotenv
             load_dotenv()
             logger.info("Silently preloading resources for resume detail page")
-            embedding_model = EmbeddingModelSingleton.get_instance().get_embedding_model()
-            PineconeSingleton.get_instance().get_client()
-            index_name = settings.INDEX_NAME or os.environ.get('INDEX_NAME')
-            api_key = settings.PINECONE_API_KEY or os.environ.get('PINECONE_API_KEY')
+            namespace = resume.vector_namespace if resume.vector_namespace.strip() else None
+            get_retriever(namespace)
+            request.session[f'resume_{pk}_preloaded'] = True
+            request.session.modified = True
 
-            if index_name and api_key:
-                os.environ['PINECONE_API_KEY'] = api_key
-                namespace = resume.vector_namespace if resume.vector_namespace.strip() else None
-                vector_store = PineconeVectorStore(
-                    index_name=index_name,
-                    embedding=embedding_model,
-                    namespace=namespace
-                )
-                _ = vector_store.as_retriever()
-                request.session[f'resume_{pk}_preloaded'] = True
-                request.session.modified = True
-
-                logger.info("Resources successfully preloaded")
+            logger.info("Resources successfully preloaded")
         else:
             logger.info(f"Resume {pk} already preloaded according to session")
 
@@ -160,6 +189,12 @@ def chat_message(request, pk):
 
     resume = get_object_or_404(Resume, pk=pk)
 
+    if not resume.is_ready:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'This resume is still being processed. Please try again shortly.'
+        }, status=409)
+
     if request.method == 'POST':
         form = ChatMessageForm(request.POST)
         if form.is_valid():
@@ -175,47 +210,17 @@ def chat_message(request, pk):
             logger.info(f"Processing chat message for resume {pk} with model {model}")
 
             try:
-                chat_history = []
-                for msg in resume.chat_messages.all().order_by('timestamp'):
-                    if msg.id != user_message.id:
-                        chat_history.append({
-                            "type": msg.message_type,
-                            "content": msg.content
-                        })
-
-                from langchain_pinecone import PineconeVectorStore
-                import os
-                from .models import EmbeddingModelSingleton, PineconeSingleton
-
-                index_name = settings.INDEX_NAME or os.environ.get('INDEX_NAME')
-
-                if not index_name:
-                    raise ValueError("Pinecone index name not found in settings or environment variables")
+                chat_history = build_chat_history(resume, user_message)
+
                 if request.session.get(f'resume_{pk}_preloaded', False):
                     logger.info(f"Resume {pk} already preloaded according to session")
                 else:
                     logger.info(f"Resume {pk} not marked as preloaded in session, setting flag")
                     request.session[f'resume_{pk}_preloaded'] = True
                     request.session.modified = True
-                logger.info("Getting embedding model from singleton (should be preloaded)")
-                embedding_model = EmbeddingModelSingleton.get_instance().get_embedding_model()
-                logger.info("Getting Pinecone client from singleton (should be preloaded)")
-                PineconeSingleton.get_instance().get_client()
-
-                api_key = settings.PINECONE_API_KEY or os.environ.get('PINECONE_API_KEY')
-                if not api_key:
-                    raise ValueError("Pinecone API key not found in settings or environment variables")
-
-                os.environ['PINECONE_API_KEY'] = api_key
 
                 namespace = resume.vector_namespace if resume.vector_namespace.strip() else None
-                logger.info(f"Using Pinecone index: {index_name}, namespace: {namespace}")
-                logger.info(f"Creating vector store with index: {index_name}, namespace: {namespace}")
-                vector_store = PineconeVectorStore(
-                    index_name=index_name,
-                    embedding=embedding_model,
-                    namespace=namespace
-                )
+                vector_store, _ = get_retriever(namespace)
                 response = query_resume(
                     query=user_message.content,
                     vector_store=vector_store,
@@ -231,6 +236,7 @@ def chat_message(request, pk):
                     content=response
                 )
                 ai_message.save()
+                schedule_fold(resume)
 
                 logger.info("Successfully processed chat message")
                 return JsonResponse({
@@ -257,6 +263,294 @@ def chat_message(request, pk):
         'message': 'Invalid request method'
     }, status=405)
 
+async def achat_message(request, pk):
+    """
+    Async ``chat_message`` for ASGI workers (``ASYNC_CHAT=True``). Database,
+    retrieval and LLM calls are awaited rather than holding a worker thread,
+    so a single worker can serve many chats at once.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+
+    if request.method != 'POST':
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid request method'
+        }, status=405)
+
+    try:
+        resume = await Resume.objects.aget(pk=pk)
+    except Resume.DoesNotExist:
+        raise Http404("No Resume matches the given query.")
+
+    if not resume.is_ready:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'This resume is still being processed. Please try again shortly.'
+        }, status=409)
+
+    form = ChatMessageForm(request.POST)
+    if not form.is_valid():
+        logger.warning("Invalid form submission")
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid form submission'
+        }, status=400)
+
+    user_message = form.save(commit=False)
+    user_message.resume = resume
+    user_message.message_type = ChatMessage.HUMAN
+    await user_message.asave()
+    model = request.POST.get('model', 'llama3-8b-8192')
+    temperature = float(request.POST.get('temperature', 0.0))
+    max_tokens = int(request.POST.get('max_tokens', 1000))
+
+    logger.info(f"Processing async chat message for resume {pk} with model {model}")
+
+    try:
+        chat_history = await abuild_chat_history(resume, user_message)
+
+        namespace = resume.vector_namespace if resume.vector_namespace.strip() else None
+        vector_store, _ = await sync_to_async(get_retriever, thread_sensitive=False)(namespace)
+        response = await aquery_resume(
+            query=user_message.content,
+            vector_store=vector_store,
+            chat_history=chat_history,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            resume_id=resume.file_hash
+        )
+        await ChatMessage.objects.acreate(
+            resume=resume,
+            message_type=ChatMessage.AI,
+            content=response
+        )
+        await sync_to_async(schedule_fold)(resume)
+
+        logger.info("Successfully processed chat message")
+        return JsonResponse({
+            'status': 'success',
+            'user_message': user_message.content,
+            'ai_message': response
+        })
+
+    except Exception as e:
+        logger.error(f"Error processing chat message: {str(e)}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+def _finish_stream(iterator):
+    iterator.close()
+    connections.close_all()
+
+async def _iterate_in_thread(iterator):
+    """
+    Drive a blocking generator so ASGI servers stream it instead of buffering
+    it. The generator runs on a thread of its own for the whole stream, not on
+    the thread shared by sync views, which it would otherwise hold between
+    tokens.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-stream')
+    next_item = sync_to_async(next, thread_sensitive=False, executor=executor)
+    done = object()
+    try:
+        while True:
+            item = await next_item(iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        # The thread goes away with the stream, so its connection must not outlive it
+        await sync_to_async(_finish_stream, thread_sensitive=False, executor=executor)(iterator)
+        executor.shutdown(wait=False)
+
+def _sse_event(data, event=None):
+    """Format one Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@require_POST
+def chat_stream(request, pk):
+    """Answer a chat message as a Server-Sent Events stream of tokens"""
+    import logging
+    logger = logging.getLogger(__name__)
+
+    resume = get_object_or_404(Resume, pk=pk)
+
+    if not resume.is_ready:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'This resume is still being processed. Please try again shortly.'
+        }, status=409)
+
+    form = ChatMessageForm(request.POST)
+    if not form.is_valid():
+        logger.warning("Invalid form submission")
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid form submission'
+        }, status=400)
+
+    user_message = form.save(commit=False)
+    user_message.resume = resume
+    user_message.message_type = ChatMessage.HUMAN
+    user_message.save()
+    model = request.POST.get('model', 'llama3-8b-8192')
+    temperature = float(request.POST.get('temperature', 0.0))
+    max_tokens = int(request.POST.get('max_tokens', 1000))
+    chat_history = build_chat_history(resume, user_message)
+
+    logger.info(f"Streaming chat message for resume {pk} with model {model}")
+
+    def events():
+        parts = []
+        try:
+            namespace = resume.vector_namespace if resume.vector_namespace.strip() else None
+            vector_store, _ = get_retriever(namespace)
+            for token in stream_query_resume(
+                query=user_message.content,
+                vector_store=vector_store,
+                chat_history=chat_history,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                resume_id=resume.file_hash
+            ):
+                parts.append(token)
+                yield _sse_event({'token': token})
+
+            # The answer is only stored once the whole stream has been generated
+            ai_message = ChatMessage.objects.create(
+                resume=resume,
+                message_type=ChatMessage.AI,
+                content="".join(parts)
+            )
+            schedule_fold(resume)
+            logger.info("Successfully streamed chat message")
+            yield _sse_event({'status': 'success', 'message_id': ai_message.pk}, event='done')
+        except Exception as e:
+            logger.error(f"Error streaming chat message: {str(e)}")
+            yield _sse_event({'status': 'error', 'message': str(e)}, event='error')
+
+    stream = _iterate_in_thread(events()) if isinstance(request, ASGIRequest) else events()
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@_own_thread_under_asgi
+@require_POST
+def screen_resume(request, pk):
+    """
+    Answer a batch of screening questions about a resume and store them as a
+    report. Expects a JSON body ``{"questions": [...]}`` with optional
+    ``model``, ``temperature`` and ``max_tokens``.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+
+    resume = get_object_or_404(Resume, pk=pk)
+
+    if not resume.is_ready:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'This resume is still being processed. Please try again shortly.'
+        }, status=409)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        questions = clean_questions(payload.get('questions'))
+        model = payload.get('model', 'llama3-8b-8192')
+        temperature = float(payload.get('temperature', 0.0))
+        max_tokens = int(payload.get('max_tokens', 1000))
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"Invalid screening request: {str(e)}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
+    report = run_screening(resume, questions, model=model, temperature=temperature, max_tokens=max_tokens)
+    return JsonResponse({
+        'status': 'success' if report.status == ScreeningReport.DONE else 'error',
+        'report': report_as_dict(report)
+    }, status=200 if report.status == ScreeningReport.DONE else 502)
+
+def screening_report(request, pk, report_id):
+    """Return a stored screening report as JSON"""
+    report = get_object_or_404(ScreeningReport, pk=report_id, resume_id=pk)
+    return JsonResponse({'status': 'success', 'report': report_as_dict(report)})
+
+def resume_status(request, pk):
+    """Report ingestion progress for a resume as JSON"""
+    resume = get_object_or_404(Resume, pk=pk)
+    return JsonResponse(get_ingestion_status(resume))
+
+@_own_thread_under_asgi
+def search_resumes(request):
+    """Rank all resumes against a free-text query, optionally restricted to sections"""
+    import logging
+    logger = logging.getLogger(__name__)
+
+    query = request.GET.get('q', '').strip()
+    sections = [section for section in request.GET.getlist('section') if section]
+    page = None
+
+    if query:
+        try:
+            results = search_candidates(query, sections)
+        except Exception as e:
+            logger.error(f"Error searching resumes: {str(e)}")
+            if request.GET.get('format') == 'json':
+                return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+            messages.error(request, f"Error searching resumes: {str(e)}")
+            results = []
+
+        # Attach resumes before paginating so a resume deleted meanwhile cannot leave a page short
+        resumes = Resume.objects.in_bulk([result['resume_id'] for result in results], field_name='file_hash')
+        results = [
+            {**result, 'resume': resumes[result['resume_id']]}
+            for result in results
+            if result['resume_id'] in resumes
+        ]
+        page = Paginator(results, settings.SEARCH_PAGE_SIZE).get_page(request.GET.get('page'))
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': 'success',
+            'query': query,
+            'sections': sections,
+            'page': page.number if page else 1,
+            'pages': page.paginator.num_pages if page else 0,
+            'total': page.paginator.count if page else 0,
+            'results': [
+                {
+                    'id': result['resume'].pk,
+                    'filename': result['resume'].original_filename,
+                    'url': reverse('resume_detail', args=[result['resume'].pk]),
+                    'score': result['score'],
+                    'hits': result['hits'],
+                    'snippets': result['snippets'],
+                }
+                for result in (page.object_list if page else [])
+            ],
+        })
+
+    return render(request, 'resume_analyzer/search.html', {
+        'query': query,
+        'sections': sections,
+        'section_choices': ['header'] + list(SECTION_ALIASES),
+        'page': page,
+    })
+
+def cache_stats(request):
+    """Report hit rates of the in-process caches as JSON"""
+    return JsonResponse({**get_cache_stats(), 'candidate_search': search_cache_stats()})
+
 def delete_resume(request, pk):
     """Delete a resume and its associated data"""
     import logging
@@ -270,15 +564,21 @@ def delete_resume(request, pk):
 
             namespace = resume.vector_namespace
 
+            # Cleanup failures must not keep the resume around; namespaces left
+            # without a tombstone are found later by reconcile_namespaces
             try:
                 if namespace:
-                    logger.info(f"Clearing Pinecone data for namespace: {namespace}")
-                    clear_pinecone_data(settings.INDEX_NAME, namespace)
+                    # Vectors are deleted in the background by sweep_vector_tombstones
+                    record_tombstone(namespace)
+                    invalidate_vector_store_cache(namespace)
                 else:
-                    logger.warning("No namespace found for this resume, skipping Pinecone data clearing")
-            except Exception as pinecone_error:
-                logger.error(f"Error clearing Pinecone data: {str(pinecone_error)}")
-                messages.warning(request, f"Warning: Could not clear vector data: {str(pinecone_error)}")
+                    logger.warning("No namespace found for this resume, skipping vector data clearing")
+            except Exception as e:
+                logger.error(f"Error queueing vector deletion for namespace {namespace}: {str(e)}")
+            try:
+                invalidate_resume_responses(resume.file_hash)
+            except Exception as e:
+                logger.error(f"Error clearing cached responses for resume {pk}: {str(e)}")
 
             logger.info(f"Deleting resume from database: {resume.original_filename}")
             resume.delete()
@@ -0,0 +1,87 @@
+"""
+Warm-up of the embedding model, tokenizer and vector store client.
+
+Under gunicorn (see ``gunicorn.conf.py``) the model weights are loaded once in
+the master before workers fork, so workers share them copy-on-write, and
+each worker then finishes warming up in a background thread after it boots.
+Anything that opens sockets or starts thread pools (the Pinecone client, the
+first forward pass) is done after the fork. ``readiness`` reports per-process
+progress for the readiness endpoint.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+from .models import EmbeddingModelSingleton, PineconeSingleton
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ('embedding_model', 'tokenizer', 'vector_client')
+
+_state = {component: False for component in COMPONENTS}
+_errors = {}
+_lock = threading.Lock()
+_started_pid = None
+
+
+def load_models():
+    """Load the embedding model weights. Safe to call before forking."""
+    EmbeddingModelSingleton.get_instance().get_embedding_model()
+    _state['embedding_model'] = True
+
+
+def _warm_embedding():
+    load_models()
+    # Runs the tokenizer and one forward pass so the first real query does not pay for it
+    EmbeddingModelSingleton.get_instance().get_embedding_model().embed_query("warm up")
+    _state['tokenizer'] = True
+
+
+def _warm_vector_client():
+    from .utils import get_index_name
+    from .vector_stores import LOCAL, LocalVectorIndex
+
+    index_name = get_index_name()
+    if settings.VECTOR_STORE_BACKEND == LOCAL:
+        LocalVectorIndex.get(index_name, settings.VECTOR_STORE_LOCAL_DIR).list_namespaces()
+    else:
+        client = PineconeSingleton.get_instance().get_client()
+        client.Index(index_name).describe_index_stats()
+    _state['vector_client'] = True
+
+
+def warm_up():
+    """Warm every component in this process, recording failures instead of raising"""
+    for component, warm in (('tokenizer', _warm_embedding), ('vector_client', _warm_vector_client)):
+        try:
+            warm()
+            _errors.pop(component, None)
+            logger.info(f"Warm-up of {component} completed")
+        except Exception as e:
+            logger.error(f"Error warming up {component}: {str(e)}")
+            _errors[component] = str(e)
+
+
+def start_background_warm_up():
+    """Start warming up this process in a daemon thread, once per process"""
+    global _started_pid
+    with _lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+    # Components loaded in a parent process other than the model weights are not inherited
+    _state['tokenizer'] = False
+    _state['vector_client'] = False
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+def readiness():
+    """Return whether this process is warm, with per-component detail"""
+    return {
+        'ready': all(_state.values()),
+        'components': dict(_state),
+        'errors': dict(_errors),
+        'pid': os.getpid(),
+    }
@@ -47,6 +47,122 @@ print(f"ALLOWED_HOSTS: {ALLOWED_HOSTS}")
 PINECONE_API_KEY = env('PINECONE_API_KEY', default='')
 INDEX_NAME = env('INDEX_NAME', default='')
 GROQ_API_KEY = env('GROQ_API_KEY', default='')
+# Override the Groq endpoint, e.g. with a local OpenAI-compatible server from run_fake_llm_server
+GROQ_API_BASE = env('GROQ_API_BASE', default='')
+# Pooled HTTP transport shared by all chat clients of a worker process
+# An ASGI worker can have many chats in flight, each holding one connection
+LLM_HTTP_MAX_CONNECTIONS = env.int('LLM_HTTP_MAX_CONNECTIONS', default=100)
+LLM_HTTP_MAX_KEEPALIVE = env.int('LLM_HTTP_MAX_KEEPALIVE', default=20)
+LLM_HTTP_KEEPALIVE_EXPIRY = env.float('LLM_HTTP_KEEPALIVE_EXPIRY', default=60.0)
+LLM_HTTP_TIMEOUT = env.float('LLM_HTTP_TIMEOUT', default=60.0)
+LLM_HTTP_CONNECT_TIMEOUT = env.float('LLM_HTTP_CONNECT_TIMEOUT', default=5.0)
+# Serve chat messages from the async view; asgi.py turns this on
+ASYNC_CHAT = env.bool('ASYNC_CHAT', default=False)
+# Chat model backend: 'groq', or 'fake' to stream a canned answer locally without an API key
+CHAT_LLM_BACKEND = env('CHAT_LLM_BACKEND', default='groq')
+CHAT_FAKE_RESPONSE = env('CHAT_FAKE_RESPONSE', default='This is a placeholder answer from the fake chat model.')
+CHAT_FAKE_TOKEN_DELAY = env.float('CHAT_FAKE_TOKEN_DELAY', default=0.01)
+# Conversation memory: recent turns kept verbatim within a token budget, older turns folded into a summary
+MEMORY_MAX_TURNS = env.int('MEMORY_MAX_TURNS', default=4)
+MEMORY_TOKEN_BUDGET = env.int('MEMORY_TOKEN_BUDGET', default=1500)
+MEMORY_SUMMARY_MODEL = env('MEMORY_SUMMARY_MODEL', default='llama3-8b-8192')
+MEMORY_SUMMARY_MAX_TOKENS = env.int('MEMORY_SUMMARY_MAX_TOKENS', default=300)
+MEMORY_SUMMARY_ASYNC = env.bool('MEMORY_SUMMARY_ASYNC', default=True)
+# Summarize only once this many messages have left the window (default: half the window)
+MEMORY_FOLD_BATCH = env.int('MEMORY_FOLD_BATCH', default=MEMORY_MAX_TURNS)
+# Screening questionnaires: LLM calls answered in parallel per batch, and the most questions per batch
+SCREENING_CONCURRENCY = env.int('SCREENING_CONCURRENCY', default=8)
+SCREENING_MAX_QUESTIONS = env.int('SCREENING_MAX_QUESTIONS', default=50)
+
+# Vector store: 'pinecone', or 'local' for in-process exact search persisted to disk
+VECTOR_STORE_BACKEND = env('VECTOR_STORE_BACKEND', default='pinecone')
+VECTOR_STORE_LOCAL_DIR = env('VECTOR_STORE_LOCAL_DIR', default=os.path.join(BASE_DIR, 'vector_index'))
+# Per-process LRU of vector stores and retrievers, keyed by (index name, namespace)
+VECTOR_STORE_CACHE_SIZE = env.int('VECTOR_STORE_CACHE_SIZE', default=256)
+VECTOR_STORE_CACHE_TTL = env.int('VECTOR_STORE_CACHE_TTL', default=1800)
+# Vector upserts: vectors per request, concurrent requests, retries of a failed batch
+VECTOR_UPSERT_BATCH_SIZE = env.int('VECTOR_UPSERT_BATCH_SIZE', default=100)
+VECTOR_UPSERT_CONCURRENCY = env.int('VECTOR_UPSERT_CONCURRENCY', default=4)
+VECTOR_UPSERT_MAX_RETRIES = env.int('VECTOR_UPSERT_MAX_RETRIES', default=3)
+# Cross-resume search: every chunk is also written to one shared namespace with resume_id metadata
+SEARCH_INDEX_ENABLED = env.bool('SEARCH_INDEX_ENABLED', default=True)
+SEARCH_NAMESPACE = env('SEARCH_NAMESPACE', default='candidate_search')
+SEARCH_TOP_K = env.int('SEARCH_TOP_K', default=300)
+SEARCH_PAGE_SIZE = env.int('SEARCH_PAGE_SIZE', default=10)
+SEARCH_CACHE_SIZE = env.int('SEARCH_CACHE_SIZE', default=512)
+SEARCH_CACHE_TTL = env.int('SEARCH_CACHE_TTL', default=300)
+# Per-process cache of top-k retrieval results for repeat questions
+RETRIEVAL_CACHE_ENABLED = env.bool('RETRIEVAL_CACHE_ENABLED', default=True)
+RETRIEVAL_CACHE_SIZE = env.int('RETRIEVAL_CACHE_SIZE', default=2048)
+RETRIEVAL_CACHE_TTL = env.int('RETRIEVAL_CACHE_TTL', default=3600)
+
+# Embedding settings
+EMBEDDING_MODEL_NAME = env('EMBEDDING_MODEL_NAME', default='sentence-transformers/paraphrase-MiniLM-L3-v2')
+EMBEDDING_MAX_SEQ_LENGTH = env.int('EMBEDDING_MAX_SEQ_LENGTH', default=128)
+# 'torch' (HuggingFace sentence-transformers) or 'onnx' (ONNX Runtime, no PyTorch)
+EMBEDDING_BACKEND = env('EMBEDDING_BACKEND', default='torch')
+# Directory written by the export_onnx_embedding_model management command
+EMBEDDING_ONNX_MODEL_DIR = env('EMBEDDING_ONNX_MODEL_DIR', default='')
+EMBEDDING_ONNX_QUANTIZED = env.bool('EMBEDDING_ONNX_QUANTIZED', default=True)
+EMBEDDING_ONNX_THREADS = env.int('EMBEDDING_ONNX_THREADS', default=0)
+# Persistent chunk embedding cache shared across resumes, evicted least recently used first
+EMBEDDING_CACHE_ENABLED = env.bool('EMBEDDING_CACHE_ENABLED', default=True)
+EMBEDDING_CACHE_MAX_ENTRIES = env.int('EMBEDDING_CACHE_MAX_ENTRIES', default=100000)
+# Entries a process inserts between checks of the table size; the table can overshoot by this much per process
+EMBEDDING_CACHE_EVICT_INTERVAL = env.int('EMBEDDING_CACHE_EVICT_INTERVAL', default=1000)
+# In-process LRU of query vectors shared by all resumes; optionally persisted to the embedding cache table
+QUERY_EMBEDDING_CACHE_ENABLED = env.bool('QUERY_EMBEDDING_CACHE_ENABLED', default=True)
+QUERY_EMBEDDING_CACHE_SIZE = env.int('QUERY_EMBEDDING_CACHE_SIZE', default=10000)
+QUERY_EMBEDDING_CACHE_PERSIST = env.bool('QUERY_EMBEDDING_CACHE_PERSIST', default=False)
+# Embedding requests from all threads are coalesced into batches of up to
+# EMBEDDING_BATCH_MAX_SIZE texts, waiting at most EMBEDDING_BATCH_MAX_WAIT_MS
+EMBEDDING_BATCHING_ENABLED = env.bool('EMBEDDING_BATCHING_ENABLED', default=True)
+EMBEDDING_BATCH_MAX_SIZE = env.int('EMBEDDING_BATCH_MAX_SIZE', default=32)
+EMBEDDING_BATCH_MAX_WAIT_MS = env.float('EMBEDDING_BATCH_MAX_WAIT_MS', default=5.0)
+# When set, workers embed through the run_embedding_server sidecar on this Unix
+# socket and only load the model themselves if the sidecar is unreachable
+EMBEDDING_SIDECAR_SOCKET = env('EMBEDDING_SIDECAR_SOCKET', default='')
+EMBEDDING_SIDECAR_TIMEOUT = env.float('EMBEDDING_SIDECAR_TIMEOUT', default=30.0)
+
+# Load the embedding model and vector client when a worker starts instead of on first request
+WARMUP_ON_STARTUP = env.bool('WARMUP_ON_STARTUP', default=True)
+
+# Chunking: 'section' packs each resume section into chunks of at most
+# RESUME_CHUNK_TOKENS tokens; 'recursive' is the generic 1000/200 character splitter.
+# Chunks are capped below EMBEDDING_MAX_SEQ_LENGTH, past which the model truncates them
+RESUME_CHUNKER = env('RESUME_CHUNKER', default='section')
+RESUME_CHUNK_TOKENS = env.int('RESUME_CHUNK_TOKENS', default=112)
+RESUME_MIN_SECTION_TOKENS = env.int('RESUME_MIN_SECTION_TOKENS', default=24)
+
+# PDF extraction settings
+# Documents with at least this many pages are extracted in a process pool
+PDF_PARALLEL_PAGE_THRESHOLD = env.int('PDF_PARALLEL_PAGE_THRESHOLD', default=8)
+PDF_EXTRACTION_WORKERS = env.int('PDF_EXTRACTION_WORKERS', default=2)
+PDF_PAGES_PER_TASK = env.int('PDF_PAGES_PER_TASK', default=4)
+
+# OCR fallback for pages without a text layer (requires poppler and tesseract)
+PDF_OCR_ENABLED = env.bool('PDF_OCR_ENABLED', default=True)
+PDF_OCR_DPI = env.int('PDF_OCR_DPI', default=200)
+PDF_OCR_LANG = env('PDF_OCR_LANG', default='eng')
+PDF_OCR_MAX_PAGES = env.int('PDF_OCR_MAX_PAGES', default=10)
+PDF_OCR_TIME_BUDGET = env.float('PDF_OCR_TIME_BUDGET', default=30.0)
+
+# Ingestion queue settings
+# Uploads are processed inline unless INGESTION_ASYNC is on; only turn it on where
+# process_ingestion_jobs runs (Procfile `worker`), or uploads stay pending
+INGESTION_ASYNC = env.bool('INGESTION_ASYNC', default=False)
+INGESTION_WORKERS = env.int('INGESTION_WORKERS', default=2)
+INGESTION_POLL_INTERVAL = env.float('INGESTION_POLL_INTERVAL', default=1.0)
+INGESTION_MAX_ATTEMPTS = env.int('INGESTION_MAX_ATTEMPTS', default=3)
+INGESTION_JOB_TIMEOUT = env.int('INGESTION_JOB_TIMEOUT', default=600)
+
+# Background vector deletion (sweep_vector_tombstones): tombstones per sweep, deletes in flight,
+# idle poll interval, seconds between orphan-namespace reconciliations, attempts per tombstone
+VECTOR_GC_BATCH_SIZE = env.int('VECTOR_GC_BATCH_SIZE', default=50)
+VECTOR_GC_CONCURRENCY = env.int('VECTOR_GC_CONCURRENCY', default=4)
+VECTOR_GC_INTERVAL = env.float('VECTOR_GC_INTERVAL', default=30.0)
+VECTOR_GC_RECONCILE_INTERVAL = env.float('VECTOR_GC_RECONCILE_INTERVAL', default=3600.0)
+VECTOR_GC_MAX_ATTEMPTS = env.int('VECTOR_GC_MAX_ATTEMPTS', default=5)
 
 
 # Application definition
@@ -220,6 +336,38 @@ else:
     }
 
 
+# Caches shared by all worker processes without an external service. 'default' holds small
+# coordination keys (vector version counters); 'llm_responses' holds cached LLM answers.
+# Set CACHE_BACKEND=db to keep them in the database instead (run `manage.py createcachetable`).
+CACHE_BACKEND = env('CACHE_BACKEND', default='file')
+CACHE_DIR = env('CACHE_DIR', default=os.path.join(BASE_DIR, '.cache'))
+LLM_CACHE_ALIAS = 'llm_responses'
+LLM_CACHE_ENABLED = env.bool('LLM_CACHE_ENABLED', default=True)
+LLM_CACHE_TTL = env.int('LLM_CACHE_TTL', default=86400)
+# Past this the backend culls a quarter of the answers regardless of use; keep it above the working set
+LLM_CACHE_MAX_ENTRIES = env.int('LLM_CACHE_MAX_ENTRIES', default=10000)
+# Reuse the answer to a similar opening question about the same resume (cosine similarity of question embeddings)
+SEMANTIC_CACHE_ENABLED = env.bool('SEMANTIC_CACHE_ENABLED', default=True)
+SEMANTIC_CACHE_THRESHOLD = env.float('SEMANTIC_CACHE_THRESHOLD', default=0.9)
+SEMANTIC_CACHE_MAX_ENTRIES = env.int('SEMANTIC_CACHE_MAX_ENTRIES', default=100)
+
+
+def _cache_config(name, timeout, max_entries):
+    if CACHE_BACKEND == 'db':
+        backend = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': f'cache_{name}'}
+    else:
+        backend = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, name),
+        }
+    return {**backend, 'TIMEOUT': timeout, 'OPTIONS': {'MAX_ENTRIES': max_entries, 'CULL_FREQUENCY': 4}}
+
+
+CACHES = {
+    'default': _cache_config('default', 300, 200000),
+    LLM_CACHE_ALIAS: _cache_config('llm_responses', LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 